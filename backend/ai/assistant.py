@@ -7,7 +7,7 @@ from dotenv import load_dotenv
 load_dotenv()
 client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 
-def chat_with_assistant(user_message, trip_context=None):
+async def chat_with_assistant(user_message, trip_context=None):
     gemini_key = os.getenv("GEMINI_API_KEY")
     if not gemini_key:
         return {"reply": "I'm sorry, but my travel brain isn't configured yet! Please check the API settings."}
@@ -20,7 +20,7 @@ def chat_with_assistant(user_message, trip_context=None):
     system_prompt += "Provide concise, helpful, and friendly advice."
 
     try:
-        response = client.models.generate_content(
+        response = await client.aio.models.generate_content(
             model='gemini-2.0-flash',
             contents=user_message,
             config=types.GenerateContentConfig(
@@ -0,0 +1,216 @@
+import math
+import os
+import re
+from itertools import chain, repeat
+import numpy as np
+
+# Columnar cost engine. Places are laid out as parallel NumPy arrays (cost,
+# category code, owning day) so per-day and per-category totals come out of
+# a few bincount calls instead of nested Python loops.
+FOOD, STAY, ACTIVITIES = 0, 1, 2
+# Local transport as a share of each day's spend; re-price stored itineraries
+# with `python -m jobs.reprice` after changing it
+TRANSPORT_RATE = float(os.getenv("TRANSPORT_RATE", "0.15"))
+
+# Numeric part of a cost string: "₹1,200", "$35.50", "1200 INR", "₹500-800" -> first number.
+# A minus sign right before it is kept so "-500" can be rejected below. A
+# leading-dot number (".5") only counts when it does not follow a word or a
+# dot, so the dot of "Rs.500" is not read as 0.5
+_COST = re.compile(r"-?(?:\d[\d,]*(?:\.\d+)?|(?<![\w.])\.\d+)")
+# Same, applied to many newline-joined strings (commas already removed) in one
+# findall: exactly one match per line, empty when the line has no number
+_COST_LINES = re.compile(r"^[^\n]*?(-?(?:\d+(?:\.\d+)?|(?<![\w.])\.\d+)|$)", re.M)
+
+def _valid(cost):
+    # Negative and non-finite costs are model noise, not refunds
+    return cost if math.isfinite(cost) and cost >= 0 else 0.0
+
+def parse_cost(raw):
+    """
+    Cost of one place as a float. A range costs its lower bound ("₹500-800"
+    -> 500); negative, non-finite and unparseable values cost 0.
+    """
+    if raw is None:
+        return 0.0
+    if isinstance(raw, (int, float)) and not isinstance(raw, bool):
+        return _valid(float(raw))
+    if isinstance(raw, str):
+        match = _COST.search(raw)
+        if match:
+            return _valid(float(match.group().replace(",", "")))
+    return 0.0
+
+def parse_costs(raws):
+    """
+    Vectorized parse_cost for a list of raw values: numbers pass through, all
+    strings are parsed by one regex scan, None counts as 0. Same results as
+    parse_cost, including negatives -> 0.
+    """
+    kinds = list(map(type, raws))
+    string_at = [i for i, kind in enumerate(kinds) if kind is str]
+    values = list(raws)
+    for i in string_at:
+        values[i] = 0.0
+    try:
+        # None becomes NaN here and is zeroed below
+        costs = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        costs = np.asarray([parse_cost(raw) for raw in values], dtype=np.float64)
+    np.nan_to_num(costs, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+
+    if string_at:
+        strings = [raws[i] for i in string_at]
+        found = _COST_LINES.findall("\n".join(strings).replace(",", ""))
+        if len(found) == len(strings):
+            costs[string_at] = list(map(float, [m or "0" for m in found]))
+        else:
+            # A cost string contained a newline; parse one by one
+            costs[string_at] = [parse_cost(raw) for raw in strings]
+    costs[costs < 0] = 0.0
+    return costs
+
+def category_code(category):
+    category = (category or "").lower()
+    if category == "food":
+        return FOOD
+    if category == "hotel":
+        return STAY
+    return ACTIVITIES
+
+# Exact-match fast path for the spellings the models actually return
+_CATEGORY_CODES = {
+    "food": FOOD, "Food": FOOD, "hotel": STAY, "Hotel": STAY,
+    "attraction": ACTIVITIES, "Attraction": ACTIVITIES, None: ACTIVITIES
+}
+
+class CostColumns:
+    """
+    Places of one or more itineraries in columnar form. `day_index` is global
+    across the batch; `day_owner` maps each day to its itinerary.
+    """
+
+    def __init__(self, days, costs, categories, day_index, day_owner, n_itineraries):
+        self.days = days
+        self.costs = costs
+        self.categories = categories
+        self.day_index = day_index
+        self.day_owner = day_owner
+        self.n_itineraries = n_itineraries
+
+    @classmethod
+    def from_itineraries(cls, itineraries):
+        """
+        `itineraries` is a list of day lists.
+        """
+        all_days = [d for days in itineraries for d in days]
+        place_lists = [d.get("places", ()) for d in all_days]
+        places = list(chain.from_iterable(place_lists))
+        day_owner = [owner for owner, days in enumerate(itineraries) for _ in days]
+
+        categories = list(map(_CATEGORY_CODES.get, map(dict.get, places, repeat("category")), repeat(-1)))
+        if -1 in categories:
+            categories = [code if code != -1 else category_code(p.get("category")) for code, p in zip(categories, places)]
+        return cls(
+            all_days,
+            parse_costs(list(map(dict.get, places, repeat("estimatedCost")))),
+            np.asarray(categories, dtype=np.int64),
+            np.repeat(np.arange(len(all_days), dtype=np.int64), list(map(len, place_lists))),
+            np.asarray(day_owner, dtype=np.int64),
+            len(itineraries)
+        )
+
+def _rounded(values):
+    """
+    np.round(values, 2) with Python round's result near half-cent ties, where
+    np.round's scale-by-100 can land on the other side (2234.325 -> 2234.32
+    instead of 2234.33). Ties are rare, so only they go through Python.
+    """
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6):
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+def summarize(columns, transport_rate=TRANSPORT_RATE):
+    """
+    One vectorized pass over the batch. Returns (day_totals, summaries): the
+    rounded total per day (transport included) and one cost summary per
+    itinerary with the same rounding as calculate_costs.
+    """
+    n_days = len(columns.day_owner)
+    n = columns.n_itineraries
+    # bincount returns integers for empty input; keep everything float
+    day_sums = np.bincount(columns.day_index, weights=columns.costs, minlength=n_days).astype(np.float64)
+    day_transport = _rounded(day_sums * transport_rate)
+    day_totals = _rounded(day_sums + day_transport)
+
+    # Category totals per itinerary: bucket = owner * 3 + category
+    owners = columns.day_owner[columns.day_index] if len(columns.day_index) else columns.day_index
+    by_category = np.bincount(owners * 3 + columns.categories, weights=columns.costs, minlength=n * 3).astype(np.float64).reshape(n, 3)
+    transport = np.bincount(columns.day_owner, weights=day_transport, minlength=n).astype(np.float64)
+
+    by_category = _rounded(by_category.ravel()).reshape(n, 3)
+    transport = _rounded(transport)
+    totals = _rounded(by_category.sum(axis=1) + transport)
+
+    summaries = [
+        {"food": food, "stay": stay, "activities": activities, "transport": trans, "total": total}
+        for (food, stay, activities), trans, total in zip(by_category.tolist(), transport.tolist(), totals.tolist())
+    ]
+    return day_totals, summaries
+
+def reprice_batch(itineraries, transport_rate=TRANSPORT_RATE):
+    """
+    Re-costs many itineraries (lists of days) at once. Writes totalDayCost on
+    every day in place and returns the cost summaries in input order.
+    """
+    columns = CostColumns.from_itineraries(itineraries)
+    day_totals, summaries = summarize(columns, transport_rate)
+    for day, total in zip(columns.days, day_totals.tolist()):
+        day["totalDayCost"] = total
+    return summaries
+
+def calculate_costs(days, currency_symbol="₹", transport_rate=TRANSPORT_RATE):
+    """
+    Costs one itinerary: sets totalDayCost on each day and returns
+    {food, stay, activities, transport, total}, equal to what reprice_batch
+    gives for it. The original per-item loop, since for a few dozen places
+    the NumPy setup costs more than it saves: numbers and plain "₹1,200" /
+    "$35.50" strings take the old float() path, and only strings that it
+    could not read go through parse_cost.
+    """
+    summary = {"food": 0.0, "stay": 0.0, "activities": 0.0, "transport": 0.0, "total": 0.0}
+    for day in days:
+        day_item_sum = 0.0
+        for place in day.get('places', []):
+            cost_raw = place.get('estimatedCost')
+            kind = type(cost_raw)
+            if kind is int or kind is float:
+                cost = float(cost_raw)
+                if not 0 <= cost < math.inf:
+                    cost = 0.0
+            else:
+                cost = None
+                if kind is str:
+                    clean_str = cost_raw.replace(currency_symbol, "").replace("$", "").replace(",", "").strip()
+                    if clean_str.replace(".", "", 1).isdecimal():
+                        cost = float(clean_str)
+                if cost is None:
+                    cost = parse_cost(cost_raw)
+            category = (place.get('category') or '').lower()
+            if category == "food":
+                summary["food"] += cost
+            elif category == "hotel":
+                summary["stay"] += cost
+            else:
+                summary["activities"] += cost
+            day_item_sum += cost
+        day_transport = round(day_item_sum * transport_rate, 2)
+        summary["transport"] += day_transport
+        day["totalDayCost"] = round(day_item_sum + day_transport, 2)
+    summary["food"] = round(summary["food"], 2)
+    summary["stay"] = round(summary["stay"], 2)
+    summary["activities"] = round(summary["activities"], 2)
+    summary["transport"] = round(summary["transport"], 2)
+    summary["total"] = round(summary["food"] + summary["stay"] + summary["activities"] + summary["transport"], 2)
+    return summary
@@ -0,0 +1,83 @@
+try:
+    from backend.services.places import get_places
+    from backend.services.weather import get_weather
+    from backend.services.hotels import search_hotels
+    from backend.services.restaurants import search_restaurants
+except ImportError:
+    from services.places import get_places
+    from services.weather import get_weather
+    from services.hotels import search_hotels
+    from services.restaurants import search_restaurants
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# One overall deadline for the whole provider fan-out (seconds)
+ENRICHMENT_DEADLINE_S = float(os.getenv("ENRICHMENT_DEADLINE_S", "20"))
+
+# Used when the weather provider misses the deadline
+FALLBACK_WEATHER = {
+    "weather": [{"description": "clear sky"}],
+    "main": {"temp": 25.0}
+}
+
+# Shared pool: provider calls are I/O bound, and a module-level pool means a
+# provider stuck past the deadline never blocks the request that abandoned it.
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="enrichment")
+
+def _timed(fn, args):
+    start = time.perf_counter()
+    try:
+        return fn(*args), None, time.perf_counter() - start
+    except Exception as e:
+        return None, e, time.perf_counter() - start
+
+def gather_enrichment(destination, interests, check_in, check_out, deadline=None):
+    """
+    Runs every provider lookup for an itinerary (places per interest, hotels,
+    restaurants, weather) concurrently under a single deadline.
+
+    Returns whatever finished in time; missing providers fall back to empty
+    results. `timings` holds status and seconds per provider and
+    `criticalPath` names the slowest one.
+    """
+    deadline = ENRICHMENT_DEADLINE_S if deadline is None else deadline
+
+    calls = {}
+    for interest in interests:
+        calls[f"places:{interest}"] = (get_places, (destination, interest))
+    calls["hotels"] = (search_hotels, (destination, check_in, check_out))
+    calls["restaurants"] = (search_restaurants, (destination,))
+    calls["weather"] = (get_weather, (destination,))
+
+    futures = {name: _executor.submit(_timed, fn, args) for name, (fn, args) in calls.items()}
+    wait(futures.values(), timeout=deadline)
+
+    results = {}
+    timings = {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            timings[name] = {"status": "timeout", "seconds": round(deadline, 3)}
+            continue
+        value, error, elapsed = future.result()
+        if error is not None:
+            print(f"DEBUG: Enrichment provider {name} failed: {error}", flush=True)
+            timings[name] = {"status": "error", "seconds": round(elapsed, 3)}
+            continue
+        results[name] = value
+        timings[name] = {"status": "ok", "seconds": round(elapsed, 3)}
+
+    critical_path = max(timings, key=lambda n: timings[n]["seconds"]) if timings else None
+    summary = ", ".join(f"{n}={t['seconds']}s/{t['status']}" for n, t in timings.items())
+    print(f"DEBUG: Enrichment finished (critical path: {critical_path}) {summary}", flush=True)
+
+    return {
+        "places": {interest: results.get(f"places:{interest}") or [] for interest in interests},
+        "hotels": results.get("hotels") or [],
+        "restaurants": results.get("restaurants") or [],
+        "weather": results.get("weather") or FALLBACK_WEATHER,
+        "timings": timings,
+        "criticalPath": critical_path
+    }
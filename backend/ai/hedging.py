@@ -0,0 +1,155 @@
+import asyncio
+import contextlib
+import os
+from collections import deque
+
+# Hedged LLM requests: start the primary model, and if it has not produced a
+# first byte within the time-to-first-byte threshold, start a backup on another
+# provider. The first valid result wins and every other attempt is cancelled.
+# Opt-in mode: off, call_llm_async keeps its sequential cascade
+HEDGE_ENABLED = os.getenv("LLM_HEDGING", "false") == "true"
+# Initial p95 time-to-first-byte; replaced by the observed p95 once enough samples exist
+HEDGE_AFTER_S = float(os.getenv("LLM_HEDGE_AFTER_S", "8"))
+# Upper bound on provider calls running at the same time for one hedged call
+MAX_INFLIGHT = int(os.getenv("LLM_MAX_INFLIGHT", "2"))
+# Upper bound on provider calls running at the same time for one request,
+# across all of its LLM calls (the long-trip chunk fan-out shares it)
+REQUEST_MAX_INFLIGHT = int(os.getenv("LLM_REQUEST_MAX_INFLIGHT", "4"))
+# How often a due hedge re-checks for a free request slot
+SLOT_POLL_S = 0.25
+
+MIN_SAMPLES = 10
+_ttfb_samples = deque(maxlen=200)
+
+def record_first_byte(seconds):
+    _ttfb_samples.append(seconds)
+
+def hedge_threshold():
+    """
+    Observed p95 time-to-first-byte, or the configured value until there is
+    enough history.
+    """
+    if len(_ttfb_samples) < MIN_SAMPLES:
+        return HEDGE_AFTER_S
+    ordered = sorted(_ttfb_samples)
+    return ordered[int(0.95 * (len(ordered) - 1))]
+
+def hedge_order(models, provider_of):
+    """
+    Keeps the primary first and moves the first model of a different provider
+    right behind it, so the hedge does not hit the same (possibly slow) provider.
+    """
+    if not models:
+        return []
+    primary = models[0]
+    rest = list(models[1:])
+    for i, model in enumerate(rest):
+        if provider_of(model) != provider_of(primary):
+            rest.insert(0, rest.pop(i))
+            break
+    return [primary] + rest
+
+def hedge_stats():
+    return {
+        "thresholdSeconds": round(hedge_threshold(), 3),
+        "samples": len(_ttfb_samples),
+        "maxInflight": MAX_INFLIGHT,
+        "requestMaxInflight": REQUEST_MAX_INFLIGHT
+    }
+
+def request_slots():
+    """
+    Semaphore bounding one request's concurrent provider calls; pass the same
+    one to every LLM call the request makes.
+    """
+    return asyncio.Semaphore(REQUEST_MAX_INFLIGHT)
+
+def provider_slot(slots):
+    """
+    `async with provider_slot(slots):` around one provider call; no-op
+    without a request semaphore.
+    """
+    return slots if slots is not None else contextlib.nullcontext()
+
+async def hedged_call(models, run_attempt, max_inflight=MAX_INFLIGHT, log=print, slots=None):
+    """
+    Races `run_attempt(model, first_byte)` across `models` (already ordered).
+
+    `first_byte()` must be called by the attempt when the provider's first
+    chunk arrives. A new attempt is launched when the running ones have all
+    been silent for the hedge threshold, or when one fails, as long as fewer
+    than `max_inflight` are running. Returns (model, result) for the first
+    attempt that returns without raising; the others are cancelled.
+
+    `slots` is the request's semaphore (request_slots()): every attempt holds
+    one while it runs, and a hedge waits until one is free.
+    """
+    loop = asyncio.get_running_loop()
+    queue = list(models)
+    running = {}
+    errors = []
+
+    def launch():
+        model = queue.pop(0)
+        state = {"model": model, "started": loop.time(), "first_byte": False}
+
+        def first_byte():
+            if not state["first_byte"]:
+                state["first_byte"] = True
+                record_first_byte(loop.time() - state["started"])
+
+        async def attempt():
+            async with provider_slot(slots):
+                # Time to first byte counts from the provider call, not the slot wait
+                state["started"] = loop.time()
+                return await run_attempt(model, first_byte)
+
+        log(f"Hedged call: starting {model} ({len(running) + 1} in flight)")
+        running[asyncio.create_task(attempt())] = state
+
+    def silent():
+        return not any(state["first_byte"] for state in running.values())
+
+    def slot_free():
+        return slots is None or not slots.locked()
+
+    try:
+        launch()
+        while running:
+            timeout = None
+            can_hedge = queue and len(running) < max_inflight
+            if can_hedge and silent():
+                last_start = max(state["started"] for state in running.values())
+                timeout = max(0.0, last_start + hedge_threshold() - loop.time())
+                if not timeout and not slot_free():
+                    timeout = SLOT_POLL_S
+
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                state = running.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    errors.append(f"{state['model']}: {e}")
+                    log(f"Hedged call: {state['model']} failed: {e}")
+                    continue
+                log(f"Hedged call: {state['model']} won after {loop.time() - state['started']:.1f}s")
+                return state["model"], result
+
+            if not done:
+                if not slot_free():
+                    # Request is at its provider-call cap; hedge once a slot frees up
+                    continue
+                log(f"Hedged call: no first byte after {hedge_threshold():.1f}s, hedging")
+                launch()
+            elif queue and (not running or silent()):
+                # Replace the failed attempt with the next model in the cascade
+                launch()
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    raise Exception("All hedged attempts failed: " + "; ".join(errors))
@@ -1,23 +1,59 @@
 try:
-    from backend.services.places import get_places, get_coordinates
-    from backend.services.weather import get_weather
-    from backend.services.hotels import search_hotels
-    from backend.services.restaurants import search_restaurants
-    from backend.database.db import itineraries_collection, trips_collection
+    from backend.services.places import get_coordinates
+    from backend.database.db import async_itineraries_collection
     from backend.trips.schema import Itinerary, CostSummary, DayPlan, Place
-    from backend.ai.openrouter_client import call_openrouter
+    from backend.ai.openrouter_client import call_openrouter_async, stream_openrouter_async
+    from backend.ai.hedging import HEDGE_ENABLED, hedged_call, hedge_order, request_slots, provider_slot
+    from backend.ai.provider_health import provider_health
+    from backend.ai.semantic_cache import get_cached_itinerary, store_itinerary
+    from backend.ai.cost_engine import calculate_costs
+    from backend.ai.long_trip import (
+        is_long_trip, day_chunks, build_skeleton_prompt, build_day_chunk_prompt,
+        merge_day_chunks, MAX_PARALLEL_CHUNKS
+    )
+    from backend.ai.prompt_budget import (
+        encode_places_table, compact_weather, budget_for, fit_places, savings_report
+    )
+    from backend.ai.enrichment import gather_enrichment
+    from backend.services.hotels import search_hotels
+    from backend.utils.json_stream import parse_json_stream
+    from backend.utils.place_index import PlaceIndex, filter_unique_by_name
+    from backend.database.access import invalidate_itinerary
+    from backend.database.audit import record_prompt
+    from backend.services.http_client import run_sync
+    from backend.services.fx import (
+        normalize_price, format_price, convert, trip_currency, currency_symbol, DEFAULT_CURRENCY
+    )
 except ImportError:
-    from services.places import get_places, get_coordinates
-    from services.weather import get_weather
-    from services.hotels import search_hotels
-    from services.restaurants import search_restaurants
-    from database.db import itineraries_collection, trips_collection
+    from services.places import get_coordinates
+    from database.db import async_itineraries_collection
     from trips.schema import Itinerary, CostSummary, DayPlan, Place
-    from openrouter_client import call_openrouter
+    from openrouter_client import call_openrouter_async, stream_openrouter_async
+    from ai.hedging import HEDGE_ENABLED, hedged_call, hedge_order, request_slots, provider_slot
+    from ai.provider_health import provider_health
+    from ai.semantic_cache import get_cached_itinerary, store_itinerary
+    from ai.cost_engine import calculate_costs
+    from ai.long_trip import (
+        is_long_trip, day_chunks, build_skeleton_prompt, build_day_chunk_prompt,
+        merge_day_chunks, MAX_PARALLEL_CHUNKS
+    )
+    from ai.prompt_budget import (
+        encode_places_table, compact_weather, budget_for, fit_places, savings_report
+    )
+    from ai.enrichment import gather_enrichment
+    from services.hotels import search_hotels
+    from utils.json_stream import parse_json_stream
+    from utils.place_index import PlaceIndex, filter_unique_by_name
+    from database.access import invalidate_itinerary
+    from database.audit import record_prompt
+    from services.http_client import run_sync
+    from services.fx import (
+        normalize_price, format_price, convert, trip_currency, currency_symbol, DEFAULT_CURRENCY
+    )
 
 import os
 import json
-import requests
+import asyncio
 from google import genai
 from google.genai import types
 from datetime import datetime, timedelta, timezone
@@ -33,63 +69,59 @@ load_dotenv(dotenv_path=backend_root / '.env')
 # Configure Gemini Client
 client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 
-# Default Currency
-DEFAULT_CURRENCY_SYMBOL = "₹"
-DEFAULT_CURRENCY_CODE = "INR"
-
-def repair_json(json_str):
-    """
-    Attempts to repair a truncated JSON string by closing open quotes and brackets.
-    """
-    if not json_str: return json_str
-    
-    stack = []
-    is_in_string = False
-    is_escaped = False
-    
-    clean_text = json_str.strip()
-    
-    for char in clean_text:
-        if is_escaped:
-            is_escaped = False
-            continue
-        if char == '\\':
-            is_escaped = True
-        elif char == '"':
-            is_in_string = not is_in_string
-        elif not is_in_string:
-            if char == '{':
-                stack.append('}')
-            elif char == '[':
-                stack.append(']')
-            elif char == '}' or char == ']':
-                if stack and stack[-1] == char:
-                    stack.pop()
-    
-    repaired = clean_text
-    # If we stopped mid-string, close it
-    if is_in_string:
-        repaired += '"'
-    
-    # Handle dangling structure
-    repaired = repaired.strip()
-    if repaired.endswith(':'):
-        repaired += ' null'
-    elif repaired.endswith(','):
-        repaired = repaired[:-1].strip()
-        
-    # Close all open containers
-    while stack:
-        closing = stack.pop()
-        # If we are about to close a dict but it ends like {"key" (no colon/value)
-        # we need to be careful. However, most truncations are after : or ,
-        repaired += closing
-        
-    return repaired
+# Default Currency (trips may ask for any currency in the FX table)
+DEFAULT_CURRENCY_CODE = DEFAULT_CURRENCY
+DEFAULT_CURRENCY_SYMBOL = currency_symbol(DEFAULT_CURRENCY)
+# Fallback nightly rate when a hotel has no readable price, in INR
+DEFAULT_HOTEL_RATE_INR = 3500
 
-def build_itinerary_prompt(trip, places, weather, currency_symbol="₹"):
-    places_str = json.dumps(places, indent=2)
-    weather_str = json.dumps(weather, indent=2)
+def hotel_price(hotel, currency_code=DEFAULT_CURRENCY_CODE):
+    """
+    Nightly rate of a search result in the itinerary currency, whatever
+    currency the provider quoted it in.
+    """
+    amount = normalize_price(hotel.get("rate_per_night"), currency_code)
+    if amount is None:
+        amount = convert(DEFAULT_HOTEL_RATE_INR, "INR", currency_code) or DEFAULT_HOTEL_RATE_INR
+    return amount
+
+def _pricing_guidance(currency_code, currency_symbol):
+    if currency_code == "INR":
+        return """  Since the currency is INR (₹), please provide realistic local costs. 
+  Example "Balanced" costs for India:
+    * Hotel: ₹3,000 - ₹8,000 per night
+    * Meal: ₹400 - ₹1,200 per person
+    * Activity: ₹200 - ₹2,000
+  DO NOT use USD-scaled numbers (like 10 or 50). Use realistic INR thousands/hundreds."""
+    # Same ranges, converted with the current FX table
+    ranges = (("Hotel", 3000, 8000, " per night"), ("Meal", 400, 1200, " per person"), ("Activity", 200, 2000, ""))
+    lines = "\n".join(
+        f"    * {label}: {format_price(convert(low, 'INR', currency_code), currency_code)} - "
+        f"{format_price(convert(high, 'INR', currency_code), currency_code)}{unit}"
+        for label, low, high, unit in ranges
+    )
+    return f"""  All prices are in {currency_code} ({currency_symbol}). Convert local prices to {currency_code}.
+  Example "Balanced" costs:
+{lines}"""
+
+def parse_llm_json(res_text):
+    """
+    Parses the model output in one pass, skipping markdown fences and
+    recovering truncated JSON. Raises if the result is not a JSON object.
+    """
+    parsed = parse_json_stream(res_text)
+    if not isinstance(parsed, dict):
+        raise Exception("AI returned invalid data format (not a dictionary).")
+    return parsed
+
+def build_itinerary_prompt(trip, places, weather, currency_symbol=DEFAULT_CURRENCY_SYMBOL, compact=True, currency_code=DEFAULT_CURRENCY_CODE):
+    if compact:
+        # One table row per place and only the weather fields the model uses
+        places_str = encode_places_table(places)
+        weather_str = compact_weather(weather)
+    else:
+        places_str = json.dumps(places, indent=2)
+        weather_str = json.dumps(weather, indent=2)
     duration = trip.get('days', 3)
     budget = trip.get('budget', 1000)
     budget_level = trip.get('budget_level', 'Balanced')
@@ -113,12 +145,7 @@ TRIP CONTEXT:
 - Pace: {pace}
 - Local Currency: {currency_symbol} (You MUST use this symbol for ALL prices)
 - PRICING GUIDANCE (VERY IMPORTANT): 
-  Since the currency is INR (₹), please provide realistic local costs. 
-  Example "Balanced" costs for India:
-    * Hotel: ₹3,000 - ₹8,000 per night
-    * Meal: ₹400 - ₹1,200 per person
-    * Activity: ₹200 - ₹2,000
-  DO NOT use USD-scaled numbers (like 10 or 50). Use realistic INR thousands/hundreds.
+{_pricing_guidance(currency_code, currency_symbol)}
 - Current Weather: {weather_str}
 
 LOCAL KNOWLEDGE (Use these as primary suggestions where relevant, especially for Hotels and Dining):
@@ -169,7 +196,7 @@ GUIDELINES:
 3. THREE MEALS: Every single day MUST include 'breakfast', 'lunch', and 'dinner' slots.
 4. CONCISENESS: Descriptions MUST be under 100 characters. No fluff.
 5. REAL PLACES: Prioritize the provided LOCAL KNOWLEDGE. If you run out of unique suggestions from the list, you MAY use your internal general knowledge for well-known attractions in {trip['destination']}.
-6. BUDGET SPREADING: Distribute the ₹{trip['budget']} budget logically across the {duration} days.
+6. BUDGET SPREADING: Distribute the {currency_symbol}{trip['budget']} budget logically across the {duration} days.
 7. SAFETY FIRST: Provide a comprehensive 'safetyAdvisory'.
 8. HOTELS: Use a name from the 'topHotels' array for the final 'evening' slot in 'places' for EVERY day (category 'hotel'). DO NOT make up hotel names.
 9. PRICING PRECISION: Use realistic, precise numbers.
@@ -179,63 +206,11 @@ GUIDELINES:
 13. NO MARKDOWN: Return ONLY raw JSON.
 """
 
-def calculate_costs(days, currency_symbol="₹"):
-    summary = {
-        "food": 0.0,
-        "stay": 0.0,
-        "activities": 0.0,
-        "transport": 0.0,
-        "total": 0.0
-    }
-    
-    for day in days:
-        day_item_sum = 0.0
-        for place in day.get('places', []):
-            cost_raw = place.get('estimatedCost')
-            if cost_raw is None: cost_raw = 0.0
-            
-            # Robust currency parsing
-            cost = 0.0
-            if isinstance(cost_raw, (int, float)):
-                cost = float(cost_raw)
-            elif isinstance(cost_raw, str):
-                try:
-                    clean_str = cost_raw.replace(currency_symbol, "").replace("$", "").replace(",", "").strip()
-                    cost = float(clean_str) if clean_str else 0.0
-                except (ValueError, TypeError):
-                    cost = 0.0
-            
-            category = place.get('category', '').lower()
-            
-            if category == "food":
-                summary["food"] += cost
-            elif category == "hotel":
-                summary["stay"] += cost
-            else:
-                summary["activities"] += cost
-            
-            day_item_sum += cost
-            
-        # Standardize: 15% transport budget per day
-        day_transport = round(day_item_sum * 0.15, 2)
-        summary["transport"] += day_transport
-        
-        # Exact Day Total
-        day["totalDayCost"] = round(day_item_sum + day_transport, 2)
-    
-    # Final Summary Sanity Check (Force items to sum up to total)
-    summary["food"] = round(summary["food"], 2)
-    summary["stay"] = round(summary["stay"], 2)
-    summary["activities"] = round(summary["activities"], 2)
-    summary["transport"] = round(summary["transport"], 2)
-    summary["total"] = round(summary["food"] + summary["stay"] + summary["activities"] + summary["transport"], 2)
-    
-    return summary
-    
-    return summary
-
 def get_mock_itinerary(trip, note="Mock response", real_hotels=None, real_restaurants=None, real_attractions=None):
     duration = trip.get('days', 3)
+    currency_code, symbol = trip_currency(trip)
+    # Mock costs are INR reference prices, shown in the trip's currency
+    local_cost = lambda inr: round(convert(inr, "INR", currency_code) or inr, 2)
     dest = trip.get('destination', 'your destination')
     # Use neutral 0,0 if geocoding fails, but we'll try to find the real ones
     lat, lng = 0.0, 0.0
@@ -255,9 +230,7 @@ def get_mock_itinerary(trip, note="Mock response", real_hotels=None, real_restau
     top_hotels = []
     if real_hotels:
         for h in real_hotels[:5]:
-            # Ensure no double symbols (strip existing $ if any and prefix with ₹)
-            price = str(h.get('rate_per_night', '3500')).replace('$', '').replace('₹', '').strip()
-            clean_price = f"{DEFAULT_CURRENCY_SYMBOL}{price}"
+            clean_price = format_price(hotel_price(h, currency_code), currency_code)
             top_hotels.append({
                 "name": h["name"],
                 "price": clean_price,
@@ -270,8 +243,8 @@ def get_mock_itinerary(trip, note="Mock response", real_hotels=None, real_restau
     
     if not top_hotels:
         top_hotels = [
-            {"name": "Grand Riverside Hotel", "price": f"{DEFAULT_CURRENCY_SYMBOL}150", "description": "Luxury stay with a great view", "lat": lat + 0.002, "lng": lng - 0.002, "rating": 4.8, "vibe": "Luxury"},
-            {"name": "City Center Lodge", "price": f"{DEFAULT_CURRENCY_SYMBOL}80", "description": "Authentic and cozy atmosphere", "lat": lat - 0.003, "lng": lng + 0.001, "rating": 4.2, "vibe": "Cozy"}
+            {"name": "Grand Riverside Hotel", "price": f"{symbol}150", "description": "Luxury stay with a great view", "lat": lat + 0.002, "lng": lng - 0.002, "rating": 4.8, "vibe": "Luxury"},
+            {"name": "City Center Lodge", "price": f"{symbol}80", "description": "Authentic and cozy atmosphere", "lat": lat - 0.003, "lng": lng + 0.001, "rating": 4.2, "vibe": "Cozy"}
         ]
 
     hotel_name = top_hotels[0]["name"] if top_hotels else f"{dest} Stay"
@@ -333,12 +306,12 @@ def get_mock_itinerary(trip, note="Mock response", real_hotels=None, real_restau
             "weatherNote": f"A wonderful day for exploration in {dest}.",
             "totalDayCost": 0.0,
             "places": [
-                {"name": b_name, "category": "food", "estimatedCost": 500, "timeSlot": "breakfast", "duration": "1h", "lat": lat + 0.001, "lng": lng - 0.001, "description": f"Enjoy a local breakfast at {b_name} on Day {d_num}.", "safetyRating": "High"},
-                {"name": attr_1["name"], "category": "attraction", "estimatedCost": 200, "timeSlot": "morning", "duration": "2h", "lat": attr_1.get("lat", lat), "lng": attr_1.get("lng", lng), "description": attr_1.get("description", "Famous local art and history."), "safetyRating": "High"},
-                {"name": l_name, "category": "food", "estimatedCost": 800, "timeSlot": "lunch", "duration": "1h", "lat": lat - 0.005, "lng": lng + 0.008, "description": f"Authentic lunch experience at {l_name}.", "safetyRating": "High"},
-                {"name": attr_2["name"], "category": "attraction", "estimatedCost": 200, "timeSlot": "afternoon", "duration": "2h", "lat": attr_2.get("lat", lat), "lng": attr_2.get("lng", lng), "description": attr_2.get("description", "A great place to explore."), "safetyRating": "High"},
-                {"name": d_name, "category": "food", "estimatedCost": 1200, "timeSlot": "dinner", "duration": "2h", "lat": lat + 0.003, "lng": lng - 0.008, "description": f"Fine dining evening at {d_name}.", "safetyRating": "High"},
-                {"name": f"{hotel_name}", "category": "hotel", "estimatedCost": 3500, "timeSlot": "evening", "duration": "overnight", "lat": lat, "lng": lng, "description": f"Comfortable stay at {hotel_name}.", "safetyRating": "High"}
+                {"name": b_name, "category": "food", "estimatedCost": local_cost(500), "timeSlot": "breakfast", "duration": "1h", "lat": lat + 0.001, "lng": lng - 0.001, "description": f"Enjoy a local breakfast at {b_name} on Day {d_num}.", "safetyRating": "High"},
+                {"name": attr_1["name"], "category": "attraction", "estimatedCost": local_cost(200), "timeSlot": "morning", "duration": "2h", "lat": attr_1.get("lat", lat), "lng": attr_1.get("lng", lng), "description": attr_1.get("description", "Famous local art and history."), "safetyRating": "High"},
+                {"name": l_name, "category": "food", "estimatedCost": local_cost(800), "timeSlot": "lunch", "duration": "1h", "lat": lat - 0.005, "lng": lng + 0.008, "description": f"Authentic lunch experience at {l_name}.", "safetyRating": "High"},
+                {"name": attr_2["name"], "category": "attraction", "estimatedCost": local_cost(200), "timeSlot": "afternoon", "duration": "2h", "lat": attr_2.get("lat", lat), "lng": attr_2.get("lng", lng), "description": attr_2.get("description", "A great place to explore."), "safetyRating": "High"},
+                {"name": d_name, "category": "food", "estimatedCost": local_cost(1200), "timeSlot": "dinner", "duration": "2h", "lat": lat + 0.003, "lng": lng - 0.008, "description": f"Fine dining evening at {d_name}.", "safetyRating": "High"},
+                {"name": f"{hotel_name}", "category": "hotel", "estimatedCost": local_cost(3500), "timeSlot": "evening", "duration": "overnight", "lat": lat, "lng": lng, "description": f"Comfortable stay at {hotel_name}.", "safetyRating": "High"}
             ]
         })
     
@@ -350,9 +323,91 @@ def get_mock_itinerary(trip, note="Mock response", real_hotels=None, real_restau
         "is_mock": True
     }
 
-import time
+# Multi-layered fallback strategy
+DEFAULT_MODELS = [
+    "meta-llama/llama-3.3-70b-instruct:free", # (FREE) High reliability & unlimited credits
+    "openai/gpt-4o-mini",          # (Pay-as-you-go) Fast & Accurate
+    "google/gemini-2.0-flash-001", # (Pay-as-you-go) Great reasoning
+    "google/gemini-2.0-flash"      # (FREE/Rate-limited) Final backup
+]
+
+# Models routed to the Google Gen AI SDK directly, and the ID Google expects
+GOOGLE_MODEL_ID = "gemini-2.0-flash-exp"
+
+def is_google_model(model_name):
+    return "gemini-2.0-flash" in model_name
+
+def provider_of(model_name):
+    return "google" if is_google_model(model_name) else "openrouter"
+
+def candidate_models(trip):
+    """
+    Model cascade for a trip, in the order they should be tried: fastest
+    healthy model first, per the provider health registry.
+    """
+    models = provider_health.rank(DEFAULT_MODELS)
+    duration = trip.get('days', 3)
+    if duration > 5 and provider_health.available("google/gemini-2.0-flash"):
+        # For long trips (> 5 days), prioritize Gemini 2.0 Flash for its large output context
+        return ["google/gemini-2.0-flash"] + [m for m in models if m != "google/gemini-2.0-flash"]
+    return models
+
+def call_llm(prompt, trip, required_key="days"):
+    """
+    Blocking wrapper around call_llm_async for scripts and worker threads.
+    Must not be called from inside a running event loop.
+    """
+    return run_sync(call_llm_async(prompt, trip, required_key))
+
+async def stream_llm_text(prompt, model_name):
+    """
+    Yields raw text chunks from the model in streaming mode.
+    """
+    if is_google_model(model_name):
+        stream = await client.aio.models.generate_content_stream(
+            model=GOOGLE_MODEL_ID,
+            contents=prompt,
+            config=types.GenerateContentConfig(temperature=0.7)
+        )
+        async for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+    else:
+        async for delta in stream_openrouter_async(prompt, model=model_name):
+            yield delta
 
-def call_llm(prompt, trip):
+async def _hedged_attempt(prompt, model_name, first_byte, required_key="days"):
+    """
+    One hedged attempt: streams so the first byte is observable, then parses.
+    Only a response with a non-empty `required_key` counts as a valid result.
+    """
+    if not provider_health.begin_call(model_name):
+        raise Exception("circuit open or probe in flight")
+    started = time.time()
+    parts = []
+    try:
+        async for chunk in stream_llm_text(prompt, model_name):
+            first_byte()
+            parts.append(chunk)
+        parsed = parse_llm_json("".join(parts))
+        if not parsed.get(required_key):
+            raise Exception(f"Response has no {required_key}")
+    except asyncio.CancelledError:
+        # Lost the race: says nothing about the model's health
+        provider_health.cancel_call(model_name)
+        raise
+    except Exception as e:
+        provider_health.record_failure(model_name, e, time.time() - started)
+        raise
+    provider_health.record_success(model_name, time.time() - started)
+    return parsed
+
+async def call_llm_async(prompt, trip, required_key="days", slots=None):
+    """
+    Runs the model cascade (hedged when LLM_HEDGING is on) up to three rounds
+    with backoff. `slots` is the request's provider-call semaphore, shared by
+    all LLM calls of one request.
+    """
     start_time = time.time()
     def log(msg):
         print(f"[{time.strftime('%H:%M:%S')}] DEBUG: {msg}", flush=True)
@@ -360,97 +415,237 @@ def call_llm(prompt, trip):
     if os.getenv("MOCK_AI") == "true" or os.getenv("OFFLINE_MODE") == "true":
         return get_mock_itinerary(trip, real_hotels=trip.get("_real_hotels"), real_restaurants=trip.get("_real_restaurants"), real_attractions=trip.get("_real_attractions"))
 
-    # Multi-layered fallback strategy
-    # For long trips (> 5 days), prioritize Gemini 2.0 Flash for its large output context
-    default_models = [
-        "meta-llama/llama-3.3-70b-instruct:free", # (FREE) High reliability & unlimited credits
-        "openai/gpt-4o-mini",          # (Pay-as-you-go) Fast & Accurate
-        "google/gemini-2.0-flash-001", # (Pay-as-you-go) Great reasoning
-        "google/gemini-2.0-flash"      # (FREE/Rate-limited) Final backup
-    ]
+    models = candidate_models(trip)
 
-    duration = trip.get('days', 3)
-    if duration > 5:
-        # Prioritize Gemini for long context generation
-        models = ["google/gemini-2.0-flash"] + [m for m in default_models if m != "google/gemini-2.0-flash"]
-    else:
-        models = default_models
-    
     max_retries = 3
     retry_delay = 5
 
     for attempt in range(max_retries):
-        for model_name in models:
+        if HEDGE_ENABLED:
             try:
-                log(f"Sending request to {model_name} - Attempt {attempt + 1}...")
+                model_name, parsed = await hedged_call(
+                    hedge_order(models, provider_of),
+                    lambda model, first_byte: _hedged_attempt(prompt, model, first_byte, required_key),
+                    log=log,
+                    slots=slots
+                )
+                log(f"JSON parsed successfully from {model_name} in {time.time() - start_time:.1f}s.")
+                parsed["_used_model"] = model_name
+                return parsed
+            except Exception as e:
+                log(f"Hedged call failed on attempt {attempt + 1}: {e}")
+        else:
+            for model_name in models:
+                if not provider_health.begin_call(model_name):
+                    log(f"Skipping {model_name}: circuit open or probe in flight")
+                    continue
+                call_started = time.time()
+                try:
+                    log(f"Sending request to {model_name} - Attempt {attempt + 1}...")
                 
-                if "gemini-2.0-flash" in model_name:
-                    # Use Google Gen AI SDK directly
-                    # Map to the specific model ID expected by Google
-                    google_model_id = "gemini-2.0-flash-exp" 
-                    
-                    response = client.models.generate_content(
-                        model=google_model_id,
-                        contents=prompt,
-                        config=types.GenerateContentConfig(temperature=0.7)
-                    )
-                    res_text = response.text if response.text else None
-                else:
-                    res_text = call_openrouter(prompt, model=model_name)
+                    async with provider_slot(slots):
+                        if is_google_model(model_name):
+                            # Use Google Gen AI SDK directly
+                            response = await client.aio.models.generate_content(
+                                model=GOOGLE_MODEL_ID,
+                                contents=prompt,
+                                config=types.GenerateContentConfig(temperature=0.7)
+                            )
+                            res_text = response.text if response.text else None
+                        else:
+                            res_text = await call_openrouter_async(prompt, model=model_name)
                 
-                if not res_text:
-                    log(f"Model {model_name} returned empty. Trying next model...")
-                    continue
+                    if not res_text:
+                        log(f"Model {model_name} returned empty. Trying next model...")
+                        provider_health.record_failure(model_name, "empty response", time.time() - call_started)
+                        continue
 
-                text = res_text.strip()
-                # Clean up potential markdown
-                if "```" in text:
-                    if "```json" in text:
-                        text = text.split("```json")[1].split("```")[0]
-                    else:
-                        text = text.split("```")[1].split("```")[0]
-                
-                text = text.strip()
-                # Use robust repair
-                try:
-                    parsed = json.loads(text)
-                except json.JSONDecodeError:
-                    log("WARNING: JSON parsing failed. Attempting robust repair...")
-                    text = repair_json(text)
-                    parsed = json.loads(text)
-                if not isinstance(parsed, dict):
-                    raise Exception("AI returned invalid data format (not a dictionary).")
+                    parsed = parse_llm_json(res_text)
                     
-                log(f"JSON parsed successfully from {model_name}.")
-                parsed["_used_model"] = model_name
-                return parsed
-
-            except Exception as e:
-                err_str = str(e)
-                log(f"Model {model_name} failed: {err_str}")
+                    log(f"JSON parsed successfully from {model_name}.")
+                    provider_health.record_success(model_name, time.time() - call_started)
+                    parsed["_used_model"] = model_name
+                    return parsed
+
+                except Exception as e:
+                    err_str = str(e)
+                    log(f"Model {model_name} failed: {err_str}")
+                    provider_health.record_failure(model_name, e, time.time() - call_started)
                 
-                if "data policy" in err_str:
-                    log("CRITICAL: OpenRouter requires 'Free model publication' to be enabled.")
+                    if "data policy" in err_str:
+                        log("CRITICAL: OpenRouter requires 'Free model publication' to be enabled.")
                 
-                if "429" in err_str or "quota" in err_str.lower():
-                    log(f"Quota issue with {model_name}. Jumping to next...")
-                    continue # Try the next model immediately
+                    if "429" in err_str or "quota" in err_str.lower():
+                        log(f"Quota issue with {model_name}. Jumping to next...")
+                        continue # Try the next model immediately
                 
-                # For other errors, we might want to try the next model too
-                continue
+                    # For other errors, we might want to try the next model too
+                    continue
 
         # If we get here, all models in the list failed for this attempt
         if attempt < max_retries - 1:
             log(f"All models failed on attempt {attempt + 1}. Waiting {retry_delay}s...")
-            time.sleep(retry_delay)
+            await asyncio.sleep(retry_delay)
             retry_delay *= 2
         else:
             log("Final attempt failed for all models.")
             raise Exception("AI orchestration failed: All providers returned errors.")
 
-def generate_itinerary(trip):
-    # Sanitizer: Fix common misspellings early
+async def generate_long_trip_async(trip, ctx):
+    """
+    Map-reduce generation for long trips: a short skeleton call assigns areas
+    and places to days, day chunks are generated in parallel, and the merge
+    re-applies trip-wide uniqueness and costs. Falls back to the single-call
+    prompt if the skeleton fails. All calls share one request_slots()
+    semaphore, so the chunk fan-out (hedged or not) never runs more than
+    LLM_REQUEST_MAX_INFLIGHT provider calls at once.
+    """
+    duration = ctx["duration"]
+    started = time.time()
+    slots = request_slots()
+    try:
+        skeleton = await call_llm_async(build_skeleton_prompt(trip, ctx["kept_places"], duration), trip, slots=slots)
+    except Exception as e:
+        print(f"DEBUG: Skeleton call failed ({e}), using single-call generation", flush=True)
+        return await call_llm_async(ctx["prompt"], trip, slots=slots)
+
+    hotel_names = [h.get("name") for h in ctx["real_hotels"][:5] if h.get("name")]
+    if not hotel_names:
+        hotel_names = [h.get("name") for h in skeleton.get("topHotels", []) if isinstance(h, dict) and h.get("name")]
+    weather_str = compact_weather(ctx["weather"])
+    chunks = day_chunks(duration)
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_CHUNKS)
+
+    async def run_chunk(chunk):
+        async with semaphore:
+            prompt = build_day_chunk_prompt(
+                trip, skeleton, chunk, duration, ctx["kept_places"], hotel_names,
+                weather_str, currency_symbol=ctx["currency_symbol"]
+            )
+            return await call_llm_async(prompt, trip, slots=slots)
+
+    results = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks), return_exceptions=True)
+    raw_itinerary = merge_day_chunks(skeleton, chunks, results, ctx["kept_places"], duration)
+
+    seen_places = PlaceIndex()
+    raw_itinerary["days"] = [dedupe_day_places(day, seen_places) for day in raw_itinerary["days"]]
+    raw_itinerary["costSummary"] = calculate_costs(raw_itinerary["days"], ctx["currency_symbol"])
+    models = {skeleton.get("_used_model")} | {r.get("_used_model") for r in results if isinstance(r, dict)}
+    raw_itinerary["_used_model"] = ",".join(sorted(m for m in models if m))
+    print(f"DEBUG: Long trip generated in {len(chunks)} chunks in {time.time() - started:.1f}s ({raw_itinerary['_failed_chunks']} failed)", flush=True)
+    return raw_itinerary
+
+async def call_llm_cached_async(prompt, trip, ctx=None):
+    """
+    Calls the model and refreshes the semantic cache with the result. The
+    lookup happens in the callers, before enrichment, so a hit skips it (see
+    cache_hit_context). With the generation `ctx`, long trips use map-reduce
+    generation.
+    """
+    mock = os.getenv("MOCK_AI") == "true" or os.getenv("OFFLINE_MODE") == "true"
+    if ctx is not None and is_long_trip(trip) and not mock:
+        raw_itinerary = await generate_long_trip_async(trip, ctx)
+    else:
+        raw_itinerary = await call_llm_async(prompt, trip)
+    store_itinerary(trip, raw_itinerary)
+    return raw_itinerary
+
+def dedupe_day_places(day, seen_places):
+    """
+    Drops places already seen earlier in the trip (hotels excepted).
+    `seen_places` is a PlaceIndex shared across the days of one itinerary and
+    updated in place; it also catches near-duplicate names and nearby matches.
+    """
+    new_places = []
+    # Reset per day for Meals? No, user wants absolute unique trip.
+    # But we must allow Hotels to stay the same.
+    for place in day.get("places", []):
+        name = place.get("name", "")
+        is_hotel = (place.get("category") == "hotel")
+        
+        is_duplicate = False
+        if not is_hotel and name:
+            is_duplicate = not seen_places.add_if_new(name, place.get("lat"), place.get("lng"))
+        
+        if not is_duplicate:
+            new_places.append(place)
+        else:
+             print(f"DEBUG: Filtering out duplicate: {place.get('name')}")
+    
+    # ENSURE AT LEAST 3 ITEMS SURVIVE (Safety fallback)
+    if len(new_places) < 3 and day.get("places"):
+         new_places = day.get("places") # Fallback to original if filter was too aggressive
+         
+    day["places"] = new_places
+    return day
+
+def sanitize_destination(trip):
+    # Sanitizer: Fix common misspellings early (before the semantic cache key is taken)
     trip["destination"] = trip["destination"].replace("Kolkatta", "Kolkata").replace("Banglore", "Bengaluru").replace("kerela", "Kerala").replace("Kerela", "Kerala")
+
+def _stay_dates(trip):
+    """
+    Check-in / check-out as YYYY-MM-DD for the hotel search, defaulting to a
+    stay starting a week from now.
+    """
+    duration = trip.get("days", 3)
+    check_in = trip.get("start_date")
+    check_out = trip.get("end_date")
+    
+    now_utc = datetime.now(timezone.utc)
+    
+    # ... date normalization logic ...
+    if hasattr(check_in, 'strftime'):
+        check_in = check_in.strftime("%Y-%m-%d")
+    elif isinstance(check_in, str) and ' ' in check_in:
+        check_in = check_in.split(' ')[0]
+    elif isinstance(check_in, str) and 'T' in check_in:
+        check_in = check_in.split('T')[0]
+        
+    if hasattr(check_out, 'strftime'):
+        check_out = check_out.strftime("%Y-%m-%d")
+    elif isinstance(check_out, str) and ' ' in check_out:
+        check_out = check_out.split(' ')[0]
+    elif isinstance(check_out, str) and 'T' in check_out:
+        check_out = check_out.split('T')[0]
+    
+    if not check_in: check_in = (now_utc + timedelta(days=7)).strftime("%Y-%m-%d")
+    if not check_out: check_out = (now_utc + timedelta(days=7+duration)).strftime("%Y-%m-%d")
+    return check_in, check_out
+
+def cache_hit_context(trip):
+    """
+    _finalize_itinerary context for a semantic cache hit: no enrichment ran
+    and no prompt was sent, so there is nothing to audit. Only the hotel
+    search runs (usually a search-cache hit) so the real SerpApi hotels for
+    this trip's stay replace the plan's invented ones, as on a miss.
+    Blocking; call it off the event loop.
+    """
+    currency_code, currency_symbol = trip_currency(trip)
+    try:
+        real_hotels = filter_unique_by_name(search_hotels(trip["destination"], *_stay_dates(trip)) or [])
+    except Exception as e:
+        print(f"DEBUG: Hotel search failed on semantic cache hit: {e}", flush=True)
+        real_hotels = []
+    return {
+        "prompt": "",
+        "prompt_places": [],
+        "real_hotels": real_hotels,
+        "duration": trip.get("days", 3),
+        "currency_symbol": currency_symbol,
+        "currency_code": currency_code,
+        "enrichment": {"timings": {}},
+        "weather": None,
+        "kept_places": [],
+        "prompt_report": None
+    }
+
+def _prepare_generation(trip):
+    """
+    Runs provider enrichment and builds the LLM prompt.
+    Returns the context needed by _finalize_itinerary.
+    """
+    sanitize_destination(trip)
     
     print(f"\n>>> ITINERARY GENERATION ENGINE V2.2 <<<", flush=True)
     print(f"STARTING ITINERARY GENERATION for {trip['destination']} ({trip.get('days', '?')} days)", flush=True)
@@ -471,69 +666,34 @@ def generate_itinerary(trip):
     if not any(x in search_interests for x in ["Attractions", "Sightseeing"]):
         search_interests.append("Top Attractions") # Fallback safety
     
+    # Stay dates for the hotel search
+    duration = trip.get("days", 3)
+    check_in, check_out = _stay_dates(trip)
+    
+    # All provider lookups run concurrently under one deadline
+    enrichment = gather_enrichment(trip["destination"], search_interests, check_in, check_out)
+    
     for interest in search_interests:
-        found = get_places(trip["destination"], interest)
+        found = enrichment["places"][interest]
         real_attractions.extend(found)
         all_places.extend(found)
     
     # Increased for 7+ day trips (needs ~35 items total)
     prompt_places = all_places[:50]
     
-    # Fetch real hotels
-    duration = trip.get("days", 3)
-    check_in = trip.get("start_date")
-    check_out = trip.get("end_date")
-    
-    from datetime import timezone
-    now_utc = datetime.now(timezone.utc)
-    
-    # ... date normalization logic ...
-    if hasattr(check_in, 'strftime'):
-        check_in = check_in.strftime("%Y-%m-%d")
-    elif isinstance(check_in, str) and ' ' in check_in:
-        check_in = check_in.split(' ')[0]
-    elif isinstance(check_in, str) and 'T' in check_in:
-        check_in = check_in.split('T')[0]
-        
-    if hasattr(check_out, 'strftime'):
-        check_out = check_out.strftime("%Y-%m-%d")
-    elif isinstance(check_out, str) and ' ' in check_out:
-        check_out = check_out.split(' ')[0]
-    elif isinstance(check_out, str) and 'T' in check_out:
-        check_out = check_out.split('T')[0]
-    
-    if not check_in: check_in = (now_utc + timedelta(days=7)).strftime("%Y-%m-%d")
-    if not check_out: check_out = (now_utc + timedelta(days=7+duration)).strftime("%Y-%m-%d")
-    
-    real_hotels = search_hotels(trip["destination"], check_in, check_out)
-    real_restaurants = search_restaurants(trip["destination"])
+    real_hotels = enrichment["hotels"]
+    real_restaurants = enrichment["restaurants"]
     
-    # NEW: Filter real data for uniqueness by name before injecting
-    def filter_unique_by_name(data_list):
-        seen = set()
-        unique = []
-        for item in data_list:
-            name = item.get("name", "").strip().lower()
-            if name and name not in seen:
-                seen.add(name)
-                unique.append(item)
-        return unique
+    # Currency the user asked for, or the default when the FX table lacks it
+    currency_code, currency_symbol = trip_currency(trip)
 
+    # Filter real data for uniqueness (same PlaceIndex identity as the itinerary) before injecting
     if real_hotels:
         real_hotels = filter_unique_by_name(real_hotels)
         # Limit to top 10 hotels
         for hotel in real_hotels[:10]:
-            # Convert USD to INR for prompt context if necessary
-            price_raw = str(hotel.get("rate_per_night", "3500")).strip()
-            if price_raw.startswith('$'):
-                try:
-                    usd_val = float(price_raw.replace('$', '').replace(',', '').strip())
-                    inr_val = int(usd_val * 83)
-                    est_cost = str(inr_val)
-                except:
-                    est_cost = "3500"
-            else:
-                est_cost = price_raw.replace('$', '').replace(DEFAULT_CURRENCY_SYMBOL, '').replace(',', '').strip()
+            # Provider prices converted to the itinerary currency for the prompt
+            est_cost = round(hotel_price(hotel, currency_code))
 
             prompt_places.append({
                 "name": hotel["name"],
@@ -557,58 +717,64 @@ def generate_itinerary(trip):
                 "lng": res.get("lng")
             })
     
-    # Currency (Hardcoded to INR)
-    currency_symbol = DEFAULT_CURRENCY_SYMBOL
-    currency_code = DEFAULT_CURRENCY_CODE
-
-    weather = get_weather(trip["destination"])
-    prompt = build_itinerary_prompt(trip, prompt_places, weather, currency_symbol=currency_symbol)
+    weather = enrichment["weather"]
+    # Most relevant places that fit the smallest input budget in the cascade
+    token_budget = budget_for(candidate_models(trip))
+    prompt, kept_places = fit_places(
+        lambda places: build_itinerary_prompt(trip, places, weather, currency_symbol=currency_symbol, currency_code=currency_code),
+        prompt_places, interests, token_budget
+    )
+    prompt_report = savings_report(
+        "Itinerary",
+        build_itinerary_prompt(trip, prompt_places, weather, currency_symbol=currency_symbol, compact=False, currency_code=currency_code),
+        prompt,
+        budget=token_budget,
+        placesKept=len(kept_places),
+        placesDropped=len(prompt_places) - len(kept_places)
+    )
     
     # Attach real data to trip object temporarily for mock fallback access
     trip["_real_hotels"] = real_hotels
     trip["_real_restaurants"] = real_restaurants
     trip["_real_attractions"] = real_attractions
     
-    raw_itinerary = call_llm(prompt, trip)
+    return {
+        "prompt": prompt,
+        "prompt_places": prompt_places,
+        "real_hotels": real_hotels,
+        "duration": duration,
+        "currency_symbol": currency_symbol,
+        "currency_code": currency_code,
+        "enrichment": enrichment,
+        "weather": weather,
+        "kept_places": kept_places,
+        "prompt_report": prompt_report
+    }
+
+def _finalize_itinerary(trip, ctx, raw_itinerary):
+    """
+    Post-processes the raw LLM output (uniqueness filter, missing days, costs,
+    real hotels) into the itinerary document that gets stored.
+    """
+    prompt = ctx["prompt"]
+    prompt_places = ctx["prompt_places"]
+    real_hotels = ctx["real_hotels"]
+    duration = ctx["duration"]
+    currency_symbol = ctx["currency_symbol"]
+    currency_code = ctx["currency_code"]
+    enrichment = ctx["enrichment"]
+    itinerary_id = str(uuid.uuid4())
+    # Audited before the filters below rewrite the response in place
+    prompt_audit_id = record_prompt("generate", prompt, raw_itinerary, trip["trip_id"], itinerary_id)
     
     # ---------------------------------------------------------
     # MASTER UNIQUENESS FILTER: Remove duplicate places by name
     # ---------------------------------------------------------
-    seen_names = set()
+    seen_places = PlaceIndex()
     filtered_days = []
     
     for day in raw_itinerary.get("days", []):
-        new_places = []
-        # Reset seen_names per day for Meals? No, user wants absolute unique trip.
-        # But we must allow Hotels to stay the same.
-        for place in day.get("places", []):
-            name = place.get("name", "").strip().lower()
-            is_hotel = (place.get("category") == "hotel")
-            
-            is_duplicate = False
-            if not is_hotel:
-                if name in seen_names:
-                    is_duplicate = True
-                else:
-                    # Fuzzy collision check
-                    for seen in seen_names:
-                        if (len(name) > 12 and name in seen) or (len(seen) > 12 and seen in name):
-                            is_duplicate = True
-                            break
-            
-            if not is_duplicate:
-                new_places.append(place)
-                if not is_hotel and name:
-                    seen_names.add(name)
-            else:
-                 print(f"DEBUG: Filtering out duplicate: {place.get('name')}")
-        
-        # ENSURE AT LEAST 3 ITEMS SURVIVE (Safety fallback)
-        if len(new_places) < 3 and day.get("places"):
-             new_places = day.get("places") # Fallback to original if filter was too aggressive
-             
-        day["places"] = new_places
-        filtered_days.append(day)
+        filtered_days.append(dedupe_day_places(day, seen_places))
     
     raw_itinerary["days"] = filtered_days
     
@@ -649,20 +815,7 @@ def generate_itinerary(trip):
         print(f"DEBUG: Injecting {len(real_hotels)} real hotels from SerpApi.", flush=True)
         final_hotels = []
         for h in real_hotels[:5]:
-            # Ensure no double symbols (strip both and prefix)
-            price_raw = str(h.get('rate_per_night', '3500')).strip()
-            
-            # Convert USD to INR if necessary
-            if price_raw.startswith('$'):
-                try:
-                    usd_val = float(price_raw.replace('$', '').replace(',', '').strip())
-                    inr_val = int(usd_val * 83) # Standard conversion rate
-                    clean_price = f"{DEFAULT_CURRENCY_SYMBOL}{inr_val}"
-                except:
-                    clean_price = f"{DEFAULT_CURRENCY_SYMBOL}3500"
-            else:
-                p_clean = price_raw.replace('$', '').replace(DEFAULT_CURRENCY_SYMBOL, '').replace(',', '').strip()
-                clean_price = f"{DEFAULT_CURRENCY_SYMBOL}{p_clean}"
+            clean_price = format_price(hotel_price(h, currency_code), currency_code)
             final_hotels.append({
                 "name": h["name"],
                 "rating": h.get("rating", 4.5),
@@ -678,11 +831,11 @@ def generate_itinerary(trip):
         final_hotels = raw_itinerary.get("topHotels", [])
         if not final_hotels:
             final_hotels = [
-                {"name": "Local Recommended Stay", "price": f"{DEFAULT_CURRENCY_SYMBOL}3500", "description": "Highly rated local accommodation.", "lat": 0, "lng": 0, "rating": 4.5, "vibe": "Comfort"}
+                {"name": "Local Recommended Stay", "price": format_price(hotel_price({}, currency_code), currency_code), "description": "Highly rated local accommodation.", "lat": 0, "lng": 0, "rating": 4.5, "vibe": "Comfort"}
             ]
 
     itinerary_data = {
-        "itineraryId": str(uuid.uuid4()),
+        "itineraryId": itinerary_id,
         "tripId": trip["trip_id"],
         "userId": trip["user_id"],
         "destination": trip["destination"],
@@ -695,16 +848,17 @@ def generate_itinerary(trip):
         "currencyCode": currency_code,
         "aiVersion": raw_itinerary.get("_used_model", "openai/gpt-oss-120b:free"),
         "generatedFrom": "initial",
-        "lastPromptUsed": prompt,
+        "promptAuditId": prompt_audit_id,
+        "enrichmentTimings": enrichment["timings"],
+        "promptTokens": ctx.get("prompt_report"),
         "createdAt": datetime.now(timezone.utc),
         "updatedAt": datetime.now(timezone.utc)
     }
-    
-    # Save to dedicated collection
-    if itineraries_collection is not None:
-        itineraries_collection.insert_one(itinerary_data.copy())
-        # Clean for response
-        if "_id" in itinerary_data: del itinerary_data["_id"]
+    return itinerary_data
+
+def _serialize_itinerary(itinerary_data):
+    # Clean for response
+    if "_id" in itinerary_data: del itinerary_data["_id"]
     
     # Convert datetimes to strings for JSON serialization
     itinerary_data["createdAt"] = itinerary_data["createdAt"].isoformat()
@@ -713,6 +867,45 @@ def generate_itinerary(trip):
     print(f"COMPLETED ITINERARY GENERATION\n", flush=True)
     return itinerary_data
 
+def generate_itinerary(trip, use_cache=True):
+    """
+    Blocking wrapper around generate_itinerary_async for scripts. The API
+    and the job queue await the async version directly.
+    """
+    return run_sync(generate_itinerary_async(trip, use_cache=use_cache))
+
+async def generate_itinerary_async(trip, progress=None, use_cache=True):
+    """
+    Async variant used by the API: enrichment runs off the event loop (its
+    providers are thread-based), the LLM and Mongo calls are awaited.
+    `progress`, if given, is awaited with the name of each stage as it starts.
+    `use_cache=False` bypasses the semantic cache.
+    """
+    async def report(stage):
+        if progress is not None:
+            await progress(stage)
+
+    # Checked before enrichment: a hit needs none of the provider lookups
+    sanitize_destination(trip)
+    raw_itinerary = get_cached_itinerary(trip, use_cache)
+    if raw_itinerary is not None:
+        ctx = await asyncio.to_thread(cache_hit_context, trip)
+    else:
+        await report("enriching")
+        ctx = await asyncio.to_thread(_prepare_generation, trip)
+        await report("calling_llm")
+        raw_itinerary = await call_llm_cached_async(ctx["prompt"], trip, ctx)
+    await report("post_processing")
+    itinerary_data = _finalize_itinerary(trip, ctx, raw_itinerary)
+    
+    # Save to dedicated collection
+    await report("saving")
+    if async_itineraries_collection is not None:
+        await async_itineraries_collection.insert_one(itinerary_data.copy())
+    invalidate_itinerary(trip["trip_id"])
+    
+    return _serialize_itinerary(itinerary_data)
+
 if __name__ == "__main__":
     test_trip = {
         "trip_id": "test-diag-" + str(uuid.uuid4())[:8],
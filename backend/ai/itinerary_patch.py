@@ -0,0 +1,150 @@
+import copy
+import json
+try:
+    from backend.trips.schema import Place
+    from backend.ai.cost_engine import parse_cost
+except ImportError:
+    from trips.schema import Place
+    from ai.cost_engine import parse_cost
+
+# Patch-based regeneration: the model returns a short list of operations against
+# specific days and slots instead of re-emitting the whole itinerary.
+SLOTS = ("breakfast", "morning", "lunch", "afternoon", "dinner", "evening")
+OPS = ("replace", "add", "remove", "hotel", "note")
+
+def _itinerary_table(days):
+    rows = ["day|slot|name|category|cost"]
+    for day in days:
+        for place in day.get("places", []):
+            rows.append("|".join(str(v) for v in (
+                day.get("dayNumber"), place.get("timeSlot", ""), place.get("name", ""),
+                place.get("category", ""), place.get("estimatedCost", 0)
+            )))
+    return "\n".join(rows)
+
+def build_patch_prompt(trip, itinerary, instruction, constraints):
+    hotels = ", ".join(h.get("name", "") for h in itinerary.get("topHotels", []) if h.get("name"))
+    return f"""
+You are 'Journey360 AI', an expert travel consultant editing an existing itinerary for {trip['destination']}.
+
+CURRENT ITINERARY (one row per slot):
+{_itinerary_table(itinerary.get("days", []))}
+
+Available Recommended Hotels: {hotels or "none"}
+
+User Instruction: {instruction}
+Additional Constraints: {json.dumps(constraints, ensure_ascii=False)}
+
+Return ONLY the minimal edits as raw JSON, never the whole itinerary:
+{{"ops": [
+  {{"op": "replace", "day": 2, "slot": "dinner", "place": {{"name": "Real Place", "category": "food", "estimatedCost": 900, "duration": "1.5 hours", "lat": number, "lng": number, "description": "Under 100 characters.", "safetyRating": "High"}}}},
+  {{"op": "add", "day": 3, "slot": "evening", "place": {{...same fields...}}}},
+  {{"op": "remove", "day": 1, "slot": "afternoon"}},
+  {{"op": "hotel", "name": "Name from Available Recommended Hotels"}},
+  {{"op": "note", "day": 2, "weatherNote": "..."}}
+]}}
+Rules: slots are {", ".join(SLOTS)}. Use real places that are not already in the itinerary.
+"hotel" switches the evening hotel on every day. Leave everything the instruction does not touch unchanged.
+"""
+
+def _find_day(days, number):
+    for day in days:
+        if day.get("dayNumber") == number:
+            return day
+    return None
+
+def _validated_place(raw, slot):
+    if not isinstance(raw, dict):
+        raise ValueError("place must be an object")
+    place = {**raw, "timeSlot": slot}
+    Place.model_validate(place)
+    return place
+
+def apply_itinerary_patch(itinerary, ops):
+    """
+    Applies patch operations to a copy of the itinerary's days and hotels.
+    Invalid operations are skipped and reported.
+    Returns (days, top_hotels, affected day numbers, applied count, errors).
+    """
+    days = copy.deepcopy(itinerary.get("days", []))
+    top_hotels = itinerary.get("topHotels", [])
+    affected = set()
+    applied = 0
+    errors = []
+
+    taken = {
+        p.get("name", "").strip().lower()
+        for d in days for p in d.get("places", []) if p.get("category") != "hotel"
+    }
+
+    for index, op in enumerate(ops if isinstance(ops, list) else []):
+        try:
+            kind = op.get("op") if isinstance(op, dict) else None
+            if kind not in OPS:
+                raise ValueError(f"unknown op {kind!r}")
+
+            if kind == "hotel":
+                hotel = next((h for h in top_hotels if h.get("name", "").strip().lower() == str(op.get("name", "")).strip().lower()), None)
+                if hotel is None:
+                    raise ValueError(f"hotel {op.get('name')!r} is not in topHotels")
+                # Nightly rate from the candidate's price (already in the
+                # itinerary currency); 0 rather than the old hotel's rate
+                # when it has none, so the re-cost does not keep stale money
+                rate = round(parse_cost(hotel.get("price")))
+                for day in days:
+                    for place in day.get("places", []):
+                        if place.get("category") == "hotel":
+                            place.update({
+                                "name": hotel["name"], "lat": hotel.get("lat"), "lng": hotel.get("lng"),
+                                "estimatedCost": rate,
+                                "description": hotel.get("description", place.get("description")),
+                                "bookingUrl": hotel.get("bookingUrl", place.get("bookingUrl"))
+                            })
+                            affected.add(day.get("dayNumber"))
+                applied += 1
+                continue
+
+            day = _find_day(days, op.get("day"))
+            if day is None:
+                raise ValueError(f"day {op.get('day')!r} does not exist")
+
+            if kind == "note":
+                day["weatherNote"] = str(op.get("weatherNote", day.get("weatherNote", "")))
+                applied += 1
+                continue
+
+            slot = op.get("slot")
+            if slot not in SLOTS:
+                raise ValueError(f"unknown slot {slot!r}")
+            places = day.setdefault("places", [])
+            position = next((i for i, p in enumerate(places) if p.get("timeSlot") == slot), None)
+
+            if kind == "remove":
+                if position is None:
+                    raise ValueError(f"day {op['day']} has no {slot} slot")
+                removed = places.pop(position)
+                taken.discard(removed.get("name", "").strip().lower())
+            else:
+                place = _validated_place(op.get("place"), slot)
+                name = place["name"].strip().lower()
+                old_name = places[position].get("name", "").strip().lower() if kind == "replace" and position is not None else None
+                if place.get("category") != "hotel" and name in taken and name != old_name:
+                    raise ValueError(f"{place['name']!r} is already in the itinerary")
+                if kind == "replace":
+                    if position is None:
+                        raise ValueError(f"day {op['day']} has no {slot} slot")
+                    taken.discard(old_name)
+                    places[position] = place
+                else:
+                    # Keep slots in day order
+                    order = [SLOTS.index(p.get("timeSlot")) if p.get("timeSlot") in SLOTS else len(SLOTS) for p in places]
+                    insert_at = next((i for i, o in enumerate(order) if o > SLOTS.index(slot)), len(places))
+                    places.insert(insert_at, place)
+                if place.get("category") != "hotel":
+                    taken.add(name)
+            affected.add(day.get("dayNumber"))
+            applied += 1
+        except Exception as e:
+            errors.append(f"op {index}: {e}")
+
+    return days, top_hotels, affected, applied, errors
@@ -0,0 +1,178 @@
+import os
+try:
+    from backend.ai.prompt_budget import encode_places_table
+except ImportError:
+    from ai.prompt_budget import encode_places_table
+
+# Map-reduce generation for long trips: a short skeleton call assigns areas and
+# places to days, the days are then generated in parallel chunks small enough
+# to fit the providers' output limits, and the chunks are merged.
+LONG_TRIP_MIN_DAYS = int(os.getenv("LONG_TRIP_MIN_DAYS", "6"))
+CHUNK_DAYS = int(os.getenv("LONG_TRIP_CHUNK_DAYS", "2"))
+MAX_PARALLEL_CHUNKS = int(os.getenv("LONG_TRIP_MAX_PARALLEL", "5"))
+
+def is_long_trip(trip):
+    return int(trip.get("days", 3) or 3) >= LONG_TRIP_MIN_DAYS
+
+def day_chunks(duration, size=CHUNK_DAYS):
+    """
+    [1..duration] split into consecutive chunks: 7 days, size 2 -> [1,2] [3,4] [5,6] [7]
+    """
+    days = list(range(1, duration + 1))
+    return [days[i:i + size] for i in range(0, len(days), size)]
+
+def build_skeleton_prompt(trip, places, duration):
+    interests = ", ".join(str(i) for i in trip.get("interests", []))
+    return f"""
+You are 'Journey360 AI', a premium travel consultant.
+Outline a {duration}-day trip to {trip['destination']}. Do not write full day plans yet.
+
+TRIP CONTEXT:
+- Interests: {interests}
+- Pace: {trip.get('travel_pace', 'Balanced')}
+- Budget Level: {trip.get('budget_level', 'Balanced')}
+
+LOCAL KNOWLEDGE:
+{encode_places_table(places)}
+
+For EVERY day 1..{duration}, pick one neighbourhood/area and 4-5 attractions or restaurants in or near it,
+preferring LOCAL KNOWLEDGE names. Group nearby places on the same day. NEVER use a place on more than one day.
+
+STRICT JSON (Return ONLY raw JSON):
+{{
+  "safetyAdvisory": "...", "travelTips": [],
+  "topHotels": [{{"name": "Hotel Name", "rating": 4.5, "vibe": "...", "description": "...", "price": "...", "lat": number, "lng": number}}],
+  "days": [{{"dayNumber": 1, "area": "Neighbourhood", "theme": "Short theme", "places": ["Place name"]}}]
+}}
+"""
+
+def build_day_chunk_prompt(trip, skeleton, chunk, duration, places, hotel_names, weather_str, currency_symbol="₹"):
+    outlines = {d.get("dayNumber"): d for d in skeleton.get("days", []) if isinstance(d, dict)}
+    outline_lines = []
+    reserved = []
+    for day in skeleton.get("days", []):
+        if not isinstance(day, dict):
+            continue
+        if day.get("dayNumber") in chunk:
+            continue
+        reserved.extend(str(p) for p in day.get("places", []))
+    for number in chunk:
+        outline = outlines.get(number, {})
+        assigned = ", ".join(str(p) for p in outline.get("places", [])) or "your choice"
+        outline_lines.append(f"- Day {number}: area {outline.get('area', 'any')}; theme {outline.get('theme', 'any')}; places {assigned}")
+
+    chunk_budget = round(float(trip.get("budget", 1000) or 0) / max(duration, 1) * len(chunk))
+    day_numbers = ", ".join(str(n) for n in chunk)
+    return f"""
+You are 'Journey360 AI', a premium travel consultant.
+Write days {day_numbers} of a {duration}-day trip to {trip['destination']}.
+
+DAY OUTLINES (follow them):
+{chr(10).join(outline_lines)}
+
+DO NOT USE these places, they belong to other days: {", ".join(reserved) or "none"}
+HOTELS (use one of these for the 'evening' slot, category 'hotel'): {", ".join(hotel_names) or "a real, well-known hotel"}
+Budget for these days: {currency_symbol}{chunk_budget}. Use realistic local prices in {currency_symbol}.
+Current Weather: {weather_str}
+
+LOCAL KNOWLEDGE:
+{encode_places_table(places)}
+
+STRICT JSON (Return ONLY raw JSON) with exactly the dayNumbers {day_numbers}:
+{{
+  "days": [
+    {{
+      "dayNumber": {chunk[0]},
+      "weatherNote": "How weather affects today's plans.",
+      "totalDayCost": number,
+      "places": [
+        {{
+          "name": "Name",
+          "category": "attraction" | "food" | "hotel",
+          "estimatedCost": number,
+          "timeSlot": "breakfast" | "morning" | "lunch" | "afternoon" | "dinner" | "evening",
+          "duration": "e.g., 2 hours",
+          "lat": number,
+          "lng": number,
+          "description": "Under 100 characters.",
+          "safetyRating": "High" | "Medium" | "Standard",
+          "bookingUrl": "optional link"
+        }}
+      ]
+    }}
+  ]
+}}
+Every day MUST have breakfast, morning, lunch, afternoon, dinner and evening slots. Real place names only.
+"""
+
+def _day_from_outline(number, outline, places_by_name):
+    """
+    Fallback day for a failed chunk, built from the skeleton's assigned places
+    (coordinates and costs from local knowledge when the names match).
+    """
+    day_places = []
+    free_slots = {"food": ["breakfast", "lunch", "dinner"], "attraction": ["morning", "afternoon", "evening"]}
+    for name in (str(p) for p in (outline or {}).get("places", [])):
+        known = places_by_name.get(name.strip().lower(), {})
+        category = "food" if known.get("category") == "food" else "attraction"
+        if not free_slots[category]:
+            continue
+        slot = free_slots[category].pop(0)
+        day_places.append({
+            "name": name,
+            "category": category,
+            "estimatedCost": known.get("estimatedCost") or 0,
+            "timeSlot": slot,
+            "duration": "2 hours",
+            "lat": known.get("lat"),
+            "lng": known.get("lng"),
+            "description": (known.get("description") or f"Part of the {(outline or {}).get('area', 'local')} day.")[:100],
+            "safetyRating": "Standard"
+        })
+    return {
+        "dayNumber": number,
+        "weatherNote": f"Exploring {(outline or {}).get('area', 'the area')}.",
+        "totalDayCost": 0,
+        "places": day_places
+    }
+
+def merge_day_chunks(skeleton, chunks, results, places, duration):
+    """
+    Reduces the chunk responses into one raw itinerary: each chunk contributes
+    only the day numbers it was asked for; days from failed chunks (or left out
+    of a chunk's response) are rebuilt from the skeleton. Uniqueness and costs
+    are applied by the caller.
+    """
+    outlines = {d.get("dayNumber"): d for d in skeleton.get("days", []) if isinstance(d, dict)}
+    places_by_name = {str(p.get("name", "")).strip().lower(): p for p in places}
+    by_number = {}
+    failed_chunks = 0
+
+    for chunk, result in zip(chunks, results):
+        if isinstance(result, BaseException) or not isinstance(result, dict):
+            failed_chunks += 1
+            print(f"DEBUG: Long-trip chunk {chunk} failed: {result}", flush=True)
+            continue
+        for day in result.get("days", []):
+            if not isinstance(day, dict):
+                continue
+            number = day.get("dayNumber")
+            if number in chunk and number not in by_number:
+                by_number[number] = day
+        # A chunk that left out some of its days is a partial failure
+        if any(number not in by_number for number in chunk):
+            failed_chunks += 1
+
+    days = []
+    for number in range(1, duration + 1):
+        day = by_number.get(number) or _day_from_outline(number, outlines.get(number), places_by_name)
+        day["dayNumber"] = number
+        days.append(day)
+
+    return {
+        "safetyAdvisory": skeleton.get("safetyAdvisory", "Standard safety precautions apply."),
+        "travelTips": skeleton.get("travelTips", []),
+        "topHotels": skeleton.get("topHotels", []),
+        "days": days,
+        "_failed_chunks": failed_chunks
+    }
@@ -1,15 +1,24 @@
 import os
-import requests
 import json
 import time
+try:
+    from backend.services.http_client import http_post, get_async_client
+except ImportError:
+    from services.http_client import http_post, get_async_client
 
-def call_openrouter(prompt, system_prompt=None, model="openai/gpt-oss-120b:free"):
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        print("DEBUG: OPENROUTER_API_KEY not found.")
-        return None
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 
-    url = "https://openrouter.ai/api/v1/chat/completions"
+class OpenRouterError(Exception):
+    """
+    Non-200 reply from OpenRouter. Carries the HTTP status so a 429 reaches
+    the provider health registry as a quota error.
+    """
+
+    def __init__(self, status_code, text):
+        super().__init__(f"OpenRouter error {status_code}: {text[:300]}")
+        self.status_code = status_code
+
+def _build_request(prompt, system_prompt, model, api_key):
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
@@ -29,28 +38,91 @@ def call_openrouter(prompt, system_prompt=None, model="openai/gpt-oss-120b:free"
         "top_p": 0.95,
         "max_tokens": 1700  # Adjusted for remaining user credits
     }
+    return headers, data
+
+def _extract_content(status_code, result, text):
+    if status_code == 200:
+        choices = result.get('choices', [])
+        if not choices:
+            print(f"DEBUG: OpenRouter success but NO CHOICES returned. Full response: {result}")
+            return None
+
+        content = choices[0].get('message', {}).get('content')
+        if not content:
+            print(f"DEBUG: OpenRouter success but EMPTY CONTENT. Full response: {result}")
+            return ""
+
+        print(f"DEBUG: OpenRouter call successful ({len(content)} chars).")
+        return content
+    else:
+        print(f"DEBUG: OpenRouter error {status_code}: {text}")
+        raise OpenRouterError(status_code, text)
+
+def call_openrouter(prompt, system_prompt=None, model="openai/gpt-oss-120b:free"):
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        print("DEBUG: OPENROUTER_API_KEY not found.")
+        return None
+
+    headers, data = _build_request(prompt, system_prompt, model, api_key)
 
     try:
         print(f"DEBUG: Calling OpenRouter ({model})...")
-        response = requests.post(url, headers=headers, json=data, timeout=60)
-        
-        if response.status_code == 200:
-            result = response.json()
-            choices = result.get('choices', [])
-            if not choices:
-                print(f"DEBUG: OpenRouter success but NO CHOICES returned. Full response: {result}")
-                return None
-                
-            content = choices[0].get('message', {}).get('content')
-            if not content:
-                print(f"DEBUG: OpenRouter success but EMPTY CONTENT. Full response: {result}")
-                return ""
-                
-            print(f"DEBUG: OpenRouter call successful ({len(content)} chars).")
-            return content
-        else:
-            print(f"DEBUG: OpenRouter error {response.status_code}: {response.text}")
-            return None
+        response = http_post("openrouter", OPENROUTER_URL, headers=headers, json=data, timeout=60)
+        result = response.json() if response.status_code == 200 else None
+        return _extract_content(response.status_code, result, response.text)
     except Exception as e:
         print(f"DEBUG: OpenRouter exception: {e}")
         return None
+
+async def call_openrouter_async(prompt, system_prompt=None, model="openai/gpt-oss-120b:free"):
+    """
+    Non-blocking variant of call_openrouter sharing a pooled httpx client.
+    Raises OpenRouterError on a non-200 reply instead of returning None.
+    """
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        print("DEBUG: OPENROUTER_API_KEY not found.")
+        return None
+
+    headers, data = _build_request(prompt, system_prompt, model, api_key)
+
+    try:
+        print(f"DEBUG: Calling OpenRouter async ({model})...")
+        response = await get_async_client("openrouter").post(OPENROUTER_URL, headers=headers, json=data)
+        result = response.json() if response.status_code == 200 else None
+        return _extract_content(response.status_code, result, response.text)
+    except OpenRouterError:
+        raise
+    except Exception as e:
+        print(f"DEBUG: OpenRouter exception: {e}")
+        return None
+
+async def stream_openrouter_async(prompt, system_prompt=None, model="openai/gpt-oss-120b:free"):
+    """
+    Streams the completion as text deltas (OpenRouter SSE with stream=true).
+    Raises on HTTP errors so callers can fall through to another model.
+    """
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        raise Exception("OPENROUTER_API_KEY not found.")
+
+    headers, data = _build_request(prompt, system_prompt, model, api_key)
+    data["stream"] = True
+
+    print(f"DEBUG: Streaming from OpenRouter ({model})...")
+    async with get_async_client("openrouter").stream("POST", OPENROUTER_URL, headers=headers, json=data) as response:
+        if response.status_code != 200:
+            body = await response.aread()
+            raise OpenRouterError(response.status_code, body.decode(errors="replace"))
+        async for line in response.aiter_lines():
+            # Lines starting with ':' are keep-alive comments
+            if not line.startswith("data: "):
+                continue
+            payload = line[len("data: "):].strip()
+            if payload == "[DONE]":
+                break
+            choices = json.loads(payload).get("choices", [])
+            delta = choices[0].get("delta", {}).get("content") if choices else None
+            if delta:
+                yield delta
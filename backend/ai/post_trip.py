@@ -6,7 +6,7 @@ from dotenv import load_dotenv
 load_dotenv()
 client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 
-def generate_trip_summary(trip_data):
+async def generate_trip_summary(trip_data):
     gemini_key = os.getenv("GEMINI_API_KEY")
     if not gemini_key:
         return {"summary": "Gemini key missing."}
@@ -22,7 +22,7 @@ def generate_trip_summary(trip_data):
     """
 
     try:
-        response = client.models.generate_content(
+        response = await client.aio.models.generate_content(
             model='gemini-2.0-flash',
             contents=prompt
         )
@@ -0,0 +1,179 @@
+import os
+import re
+
+# tiktoken is in requirements.txt; if it is missing or its encoding cannot be
+# loaded (the BPE file is fetched on first use), tokens are estimated as
+# characters / 4 and every budget is scaled down by FALLBACK_BUDGET_FACTOR,
+# since that estimate runs low on non-English text, URLs and numbers
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Input-token budget for the itinerary prompt, per model. The prompt is shared
+# by every model in the cascade, so the smallest budget among them applies.
+MODEL_INPUT_BUDGETS = {
+    "meta-llama/llama-3.3-70b-instruct:free": 6000,
+    "openai/gpt-4o-mini": 12000,
+    "google/gemini-2.0-flash-001": 16000,
+    "google/gemini-2.0-flash": 16000
+}
+DEFAULT_INPUT_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "8000"))
+FALLBACK_BUDGET_FACTOR = float(os.getenv("PROMPT_FALLBACK_BUDGET_FACTOR", "0.75"))
+
+# Minimum rows kept per category whatever the budget, so every day can get
+# real meals and a real hotel
+MIN_ROWS = {"hotel": 3, "food": 6}
+
+_encoder = None
+_encoder_failed = False
+_WORD = re.compile(r"[a-z0-9]+")
+
+def _get_encoder():
+    """
+    The cl100k_base encoder, or None when tiktoken is unavailable. A failed
+    load is not retried.
+    """
+    global _encoder, _encoder_failed
+    if _encoder is None and tiktoken is not None and not _encoder_failed:
+        try:
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            _encoder_failed = True
+            print(f"WARNING: tiktoken encoding unavailable, estimating tokens as chars/4: {e}", flush=True)
+    return _encoder
+
+def tokenizer_name():
+    return "tiktoken/cl100k_base" if _get_encoder() is not None else "chars/4 estimate"
+
+def estimate_tokens(text):
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def budget_for(models):
+    budgets = [MODEL_INPUT_BUDGETS.get(m, DEFAULT_INPUT_BUDGET) for m in models]
+    budget = min(budgets) if budgets else DEFAULT_INPUT_BUDGET
+    if _get_encoder() is None:
+        budget = int(budget * FALLBACK_BUDGET_FACTOR)
+    return budget
+
+def _cell(value, limit=None):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        value = round(value, 4)
+    text = " ".join(str(value).replace("|", "/").split())
+    return text[:limit] if limit else text
+
+def encode_places_table(places):
+    """
+    One pipe-separated row per place instead of indented JSON objects:
+    name|category|cost|lat|lng|bookingUrl|note
+    """
+    rows = ["name|category|cost|lat|lng|bookingUrl|note"]
+    for place in places:
+        rows.append("|".join([
+            _cell(place.get("name")),
+            _cell(place.get("category", "attraction")),
+            _cell(place.get("estimatedCost")),
+            _cell(place.get("lat")),
+            _cell(place.get("lng")),
+            _cell(place.get("bookingUrl")),
+            _cell(place.get("description") or place.get("address"), 80)
+        ]))
+    return "\n".join(rows)
+
+def compact_weather(weather):
+    """
+    Reduces a raw OpenWeather response to the fields the model uses.
+    """
+    if not isinstance(weather, dict):
+        return _cell(weather)
+    main = weather.get("main", {}) or {}
+    conditions = ", ".join(w.get("description", "") for w in weather.get("weather", []) if w.get("description"))
+    parts = [conditions or "unknown"]
+    if main.get("temp") is not None:
+        parts.append(f"{main['temp']}°C")
+    if main.get("feels_like") is not None:
+        parts.append(f"feels like {main['feels_like']}°C")
+    if main.get("humidity") is not None:
+        parts.append(f"humidity {main['humidity']}%")
+    wind = (weather.get("wind") or {}).get("speed")
+    if wind is not None:
+        parts.append(f"wind {wind} m/s")
+    return ", ".join(parts)
+
+def rank_places(places, interests):
+    """
+    Orders places by relevance: interest keyword overlap, usable coordinates,
+    then the provider's own order. Stable for equal scores.
+    """
+    keywords = set()
+    for interest in interests:
+        keywords.update(_WORD.findall(str(interest).lower()))
+
+    def score(item):
+        index, place = item
+        text = " ".join(str(place.get(k, "")) for k in ("name", "description", "address")).lower()
+        overlap = len(keywords.intersection(_WORD.findall(text)))
+        has_coords = bool(place.get("lat")) and bool(place.get("lng"))
+        return (-(overlap * 2 + has_coords), index)
+
+    return [place for _, place in sorted(enumerate(places), key=score)]
+
+def _select(ranked, count):
+    """
+    First `count` ranked places, topped up to the per-category minimums.
+    """
+    chosen = ranked[:count]
+    for category, minimum in MIN_ROWS.items():
+        have = sum(1 for p in chosen if p.get("category") == category)
+        for place in ranked[count:]:
+            if have >= minimum:
+                break
+            if place.get("category") == category:
+                chosen.append(place)
+                have += 1
+    return chosen
+
+def fit_places(build, places, interests, budget):
+    """
+    Ranks places and keeps the largest prefix whose prompt fits the token
+    budget. `build(places)` renders the prompt. Returns (prompt, kept places).
+    """
+    ranked = rank_places(places, interests)
+    prompt = build(ranked)
+    if estimate_tokens(prompt) <= budget:
+        return prompt, ranked
+
+    low, high = 0, len(ranked)
+    best = build(_select(ranked, 0)), _select(ranked, 0)
+    while low <= high:
+        mid = (low + high) // 2
+        kept = _select(ranked, mid)
+        candidate = build(kept)
+        if estimate_tokens(candidate) <= budget:
+            best = candidate, kept
+            low = mid + 1
+        else:
+            high = mid - 1
+    return best
+
+def savings_report(label, before, after, **extra):
+    """
+    Token counts for the legacy and compacted prompt; logged and returned so
+    it can be stored with the request.
+    """
+    tokens_before = estimate_tokens(before)
+    tokens_after = estimate_tokens(after)
+    report = {
+        "tokenizer": tokenizer_name(),
+        "tokensBefore": tokens_before,
+        "tokensAfter": tokens_after,
+        "tokensSaved": tokens_before - tokens_after,
+        **extra
+    }
+    print(f"DEBUG: {label} prompt {tokens_before} -> {tokens_after} tokens ({report['tokensSaved']} saved, {report['tokenizer']})", flush=True)
+    return report
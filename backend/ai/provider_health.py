@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from collections import deque
+
+# Rolling window of recent calls kept per model
+WINDOW = int(os.getenv("PROVIDER_HEALTH_WINDOW", "100"))
+# Breaker opens when the windowed error rate reaches this (with at least MIN_CALLS
+# calls in the window) or after CONSECUTIVE_FAILURES failures in a row
+ERROR_RATE_OPEN = float(os.getenv("PROVIDER_ERROR_RATE_OPEN", "0.5"))
+MIN_CALLS = 5
+CONSECUTIVE_FAILURES = 3
+# How long an open breaker rejects calls before letting a probe through
+BREAKER_COOLDOWN_S = float(os.getenv("PROVIDER_BREAKER_COOLDOWN_S", "60"))
+# How long a model is skipped after a 429 / quota error
+QUOTA_COOLDOWN_S = float(os.getenv("PROVIDER_QUOTA_COOLDOWN_S", "120"))
+# A half-open probe that never reports back (e.g. a cancelled hedge attempt)
+# stops blocking the next probe after this long
+PROBE_TIMEOUT_S = float(os.getenv("PROVIDER_PROBE_TIMEOUT_S", "90"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+def is_quota_error(error):
+    if getattr(error, "status_code", None) == 429:
+        return True
+    text = str(error).lower()
+    return "429" in text or "quota" in text or "rate limit" in text
+
+def _percentile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[int(q * (len(ordered) - 1))]
+
+class ModelHealth:
+    """
+    Rolling call history and circuit-breaker state for one model.
+    """
+
+    def __init__(self):
+        self.calls = deque(maxlen=WINDOW)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.quota_until = 0.0
+        self.last_error = None
+        self.probe_started = None
+
+    def error_rate(self):
+        if not self.calls:
+            return 0.0
+        return sum(1 for ok, _ in self.calls if not ok) / len(self.calls)
+
+    def latencies(self):
+        return sorted(latency for ok, latency in self.calls if ok)
+
+    def probing(self, now):
+        return self.probe_started is not None and now - self.probe_started < PROBE_TIMEOUT_S
+
+    def available(self, now):
+        """
+        Whether a call would be let through now. Read-only: ranking and
+        capacity checks never move the breaker.
+        """
+        if now < self.quota_until:
+            return False
+        if self.state == OPEN:
+            return now - self.opened_at >= BREAKER_COOLDOWN_S
+        if self.state == HALF_OPEN:
+            return not self.probing(now)
+        return True
+
+    def begin_call(self, now):
+        """
+        Admits a call that is about to be sent. Past the cooldown an open
+        breaker goes half-open and this call becomes its single probe.
+        """
+        if not self.available(now):
+            return False
+        if self.state != CLOSED:
+            self.state = HALF_OPEN
+            self.probe_started = now
+        return True
+
+class ProviderHealthRegistry:
+    """
+    Per-model rolling error rate, latency percentiles, quota cooldown and
+    circuit breaker. Shared by every request in the process.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _get(self, model):
+        health = self._models.get(model)
+        if health is None:
+            health = self._models[model] = ModelHealth()
+        return health
+
+    def record_success(self, model, latency):
+        with self._lock:
+            health = self._get(model)
+            health.calls.append((True, latency))
+            health.consecutive_failures = 0
+            health.probe_started = None
+            if health.state != CLOSED:
+                print(f"DEBUG: Circuit for {model} closed", flush=True)
+            health.state = CLOSED
+
+    def record_failure(self, model, error, latency):
+        now = time.time()
+        with self._lock:
+            health = self._get(model)
+            health.calls.append((False, latency))
+            health.consecutive_failures += 1
+            health.last_error = str(error)[:200]
+            health.probe_started = None
+            if is_quota_error(error):
+                health.quota_until = now + QUOTA_COOLDOWN_S
+            tripped = (
+                health.state == HALF_OPEN
+                or health.consecutive_failures >= CONSECUTIVE_FAILURES
+                or (len(health.calls) >= MIN_CALLS and health.error_rate() >= ERROR_RATE_OPEN)
+            )
+            if tripped and health.state != OPEN:
+                print(f"DEBUG: Circuit for {model} opened ({health.last_error})", flush=True)
+                health.state = OPEN
+                health.opened_at = now
+
+    def available(self, model):
+        with self._lock:
+            return self._get(model).available(time.time())
+
+    def begin_call(self, model):
+        """
+        Call right before sending a request to `model`; False means skip it
+        (breaker open, quota cooldown, or another request is the probe).
+        """
+        with self._lock:
+            return self._get(model).begin_call(time.time())
+
+    def cancel_call(self, model):
+        """
+        For a request abandoned before it could succeed or fail (a cancelled
+        hedge attempt): frees the probe slot without judging the model.
+        """
+        with self._lock:
+            self._get(model).probe_started = None
+
+    def rank(self, models):
+        """
+        Orders models healthy-first, then by median latency (fastest first).
+        Models without latency history keep their cascade order after the
+        measured ones; unavailable models go last. Ranking never moves a
+        breaker; begin_call() decides at send time.
+        """
+        now = time.time()
+        with self._lock:
+            def key(model):
+                health = self._get(model)
+                latencies = health.latencies()
+                median = _percentile(latencies, 0.5)
+                return (
+                    not health.available(now),
+                    health.error_rate() >= ERROR_RATE_OPEN / 2,
+                    median if median is not None else float("inf")
+                )
+            return sorted(models, key=key)
+
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            report = {}
+            for model, health in self._models.items():
+                latencies = health.latencies()
+                report[model] = {
+                    "state": health.state,
+                    "available": health.available(now),
+                    "calls": len(health.calls),
+                    "errorRate": round(health.error_rate(), 3),
+                    "latency": {
+                        "p50": _percentile(latencies, 0.5),
+                        "p95": _percentile(latencies, 0.95),
+                        "p99": _percentile(latencies, 0.99)
+                    },
+                    "quotaCooldownS": max(0, round(health.quota_until - now, 1)),
+                    "consecutiveFailures": health.consecutive_failures,
+                    "lastError": health.last_error
+                }
+            return report
+
+provider_health = ProviderHealthRegistry()
@@ -1,23 +1,37 @@
+import copy
 import json
 import os
 import requests
 import uuid
 from datetime import datetime
 try:
-    from backend.database.db import itineraries_collection
-    from backend.ai.itinerary import calculate_costs, get_mock_itinerary, call_llm
+    from backend.database.db import async_itineraries_collection
+    from backend.ai.itinerary import (
+        calculate_costs, get_mock_itinerary, call_llm_async,
+        DEFAULT_CURRENCY_SYMBOL, DEFAULT_CURRENCY_CODE
+    )
+    from backend.ai.prompt_budget import savings_report
+    from backend.ai.itinerary_patch import build_patch_prompt, apply_itinerary_patch
     from backend.trips.schema import Itinerary
+    from backend.database.access import invalidate_itinerary, ITINERARY_PROJECTION
+    from backend.database.audit import record_prompt
 except ImportError:
-    from database.db import itineraries_collection
+    from database.db import async_itineraries_collection
     from ai.itinerary import (
-        calculate_costs, get_mock_itinerary, call_llm, 
+        calculate_costs, get_mock_itinerary, call_llm_async,
         DEFAULT_CURRENCY_SYMBOL, DEFAULT_CURRENCY_CODE
     )
+    from ai.prompt_budget import savings_report
+    from ai.itinerary_patch import build_patch_prompt, apply_itinerary_patch
     from trips.schema import Itinerary
+    from database.access import invalidate_itinerary, ITINERARY_PROJECTION
+    from database.audit import record_prompt
 
-def build_regeneration_prompt(trip, current_itinerary, instruction, constraints):
-    itinerary_days_json = json.dumps(current_itinerary.get("days", []), indent=2)
-    top_hotels_json = json.dumps(current_itinerary.get("topHotels", []), indent=2)
+def build_regeneration_prompt(trip, current_itinerary, instruction, constraints, compact=True):
+    # Compact separators: indentation alone was a large share of the input tokens
+    dump_args = {"separators": (",", ":"), "ensure_ascii": False} if compact else {"indent": 2}
+    itinerary_days_json = json.dumps(current_itinerary.get("days", []), **dump_args)
+    top_hotels_json = json.dumps(current_itinerary.get("topHotels", []), **dump_args)
     
     return f"""
 You are 'Journey360 AI', an expert travel consultant.
@@ -73,13 +87,20 @@ JSON Structure:
 }}
 """
 
-def regenerate_itinerary(trip, existing_itinerary, instruction, constraints):
-    print(f"\nSTARTING ITINERARY REGENERATION for {trip['destination']}", flush=True)
-    
+def _compact_regeneration_prompt(trip, existing_itinerary, instruction, constraints):
     prompt = build_regeneration_prompt(trip, existing_itinerary, instruction, constraints)
-    
-    raw_itinerary = call_llm(prompt, trip)
-    
+    report = savings_report(
+        "Regeneration",
+        build_regeneration_prompt(trip, existing_itinerary, instruction, constraints, compact=False),
+        prompt
+    )
+    return prompt, report
+
+def _audit(kind, existing_itinerary, prompt, response):
+    return record_prompt(kind, prompt, response, existing_itinerary.get("tripId"), existing_itinerary.get("itineraryId"))
+
+def _build_update(existing_itinerary, raw_itinerary, prompt, prompt_report=None):
+    prompt_audit_id = _audit("regenerate", existing_itinerary, prompt, raw_itinerary)
     if not raw_itinerary:
         print("ERROR: LLM returned None. Falling back to existing itinerary structure.")
         raw_itinerary = existing_itinerary
@@ -91,28 +112,83 @@ def regenerate_itinerary(trip, existing_itinerary, instruction, constraints):
     if not raw_days:
         raw_days = existing_itinerary.get("days", [])
         
-    updated_itinerary = {
+    return {
         "days": raw_days,
         "topHotels": raw_itinerary.get("topHotels", existing_itinerary.get("topHotels", [])),
         "safetyAdvisory": raw_itinerary.get("safetyAdvisory", existing_itinerary.get("safetyAdvisory", "Standard precautions.")),
         "travelTips": raw_itinerary.get("travelTips", existing_itinerary.get("travelTips", [])),
         "costSummary": cost_summary,
-        "currencySymbol": DEFAULT_CURRENCY_SYMBOL,
-        "currencyCode": DEFAULT_CURRENCY_CODE,
+        "currencySymbol": existing_itinerary.get("currencySymbol", DEFAULT_CURRENCY_SYMBOL),
+        "currencyCode": existing_itinerary.get("currencyCode", DEFAULT_CURRENCY_CODE),
         "generatedFrom": "regenerate",
-        "lastPromptUsed": prompt,
+        "promptAuditId": prompt_audit_id,
+        "promptTokens": prompt_report,
         "updatedAt": datetime.utcnow()
     }
-    
-    # Update in DB
-    if itineraries_collection is not None:
-        itineraries_collection.update_one(
-            {"itineraryId": existing_itinerary["itineraryId"]},
-            {"$set": updated_itinerary}
-        )
-    
-    # Fetch full updated document
-    itinerary = itineraries_collection.find_one({"itineraryId": existing_itinerary["itineraryId"]})
+
+def _patch_prompt(trip, existing_itinerary, instruction, constraints):
+    prompt = build_patch_prompt(trip, existing_itinerary, instruction, constraints)
+    report = savings_report(
+        "Patch regeneration",
+        build_regeneration_prompt(trip, existing_itinerary, instruction, constraints, compact=False),
+        prompt
+    )
+    return prompt, report
+
+def _recost_affected_days(existing_itinerary, days, affected):
+    """
+    Re-costs only the patched days and moves the stored cost summary by the
+    difference. Falls back to a full re-cost when there is no stored summary.
+    """
+    stored = existing_itinerary.get("costSummary")
+    if not stored:
+        return calculate_costs(days, currency_symbol=DEFAULT_CURRENCY_SYMBOL)
+
+    keys = ("food", "stay", "activities", "transport")
+    summary = {k: float(stored.get(k, 0) or 0) for k in keys}
+    old_days = {d.get("dayNumber"): d for d in existing_itinerary.get("days", [])}
+    for day in days:
+        number = day.get("dayNumber")
+        if number not in affected:
+            continue
+        old = calculate_costs([copy.deepcopy(old_days[number])], currency_symbol=DEFAULT_CURRENCY_SYMBOL) if number in old_days else None
+        new = calculate_costs([day], currency_symbol=DEFAULT_CURRENCY_SYMBOL)
+        for k in keys:
+            summary[k] += new[k] - (old[k] if old else 0)
+
+    summary = {k: round(v, 2) for k, v in summary.items()}
+    summary["total"] = round(sum(summary.values()), 2)
+    return summary
+
+def _build_patch_update(existing_itinerary, raw_patch, prompt, prompt_report=None):
+    """
+    Returns the $set document for a patch response, or None when no operation
+    could be applied (the caller then falls back to full regeneration).
+    """
+    ops = (raw_patch or {}).get("ops", [])
+    days, top_hotels, affected, applied, errors = apply_itinerary_patch(existing_itinerary, ops)
+    if errors:
+        print(f"DEBUG: Rejected patch operations: {errors}", flush=True)
+    if not applied:
+        return None
+
+    return {
+        "days": days,
+        "topHotels": top_hotels,
+        "costSummary": _recost_affected_days(existing_itinerary, days, affected),
+        "currencySymbol": existing_itinerary.get("currencySymbol", DEFAULT_CURRENCY_SYMBOL),
+        "currencyCode": existing_itinerary.get("currencyCode", DEFAULT_CURRENCY_CODE),
+        "generatedFrom": "regenerate_patch",
+        "promptAuditId": _audit("regenerate_patch", existing_itinerary, prompt, raw_patch),
+        "promptTokens": prompt_report,
+        "patch": {"ops": ops, "applied": applied, "rejected": errors, "affectedDays": sorted(affected)},
+        "updatedAt": datetime.utcnow()
+    }
+
+def _patch_mode(mode):
+    return mode == "patch" and os.getenv("MOCK_AI") != "true" and os.getenv("OFFLINE_MODE") != "true"
+
+def _serialize_itinerary(itinerary):
     if itinerary and "_id" in itinerary: del itinerary["_id"]
     
     # Convert datetimes to strings for JSON serialization
@@ -124,3 +200,38 @@ def regenerate_itinerary(trip, existing_itinerary, instruction, constraints):
     
     print(f"COMPLETED ITINERARY REGENERATION\n", flush=True)
     return itinerary
+
+async def regenerate_itinerary_async(trip, existing_itinerary, instruction, constraints, mode="full"):
+    """
+    mode="patch" asks the model for edit operations and re-costs only the
+    touched days; mode="full" (or a patch with no usable operations) has the
+    model return the whole itinerary.
+    """
+    print(f"\nSTARTING ITINERARY REGENERATION for {trip['destination']}", flush=True)
+    
+    updated_itinerary = None
+    if _patch_mode(mode):
+        prompt, prompt_report = _patch_prompt(trip, existing_itinerary, instruction, constraints)
+        try:
+            raw_patch = await call_llm_async(prompt, trip, required_key="ops")
+            updated_itinerary = _build_patch_update(existing_itinerary, raw_patch, prompt, prompt_report)
+        except Exception as e:
+            print(f"DEBUG: Patch regeneration failed ({e}), regenerating in full", flush=True)
+
+    if updated_itinerary is None:
+        prompt, prompt_report = _compact_regeneration_prompt(trip, existing_itinerary, instruction, constraints)
+        raw_itinerary = await call_llm_async(prompt, trip)
+        updated_itinerary = _build_update(existing_itinerary, raw_itinerary, prompt, prompt_report)
+    
+    # Update in DB
+    if async_itineraries_collection is not None:
+        # Older documents still carry the prompt inline; drop it on rewrite
+        await async_itineraries_collection.update_one(
+            {"itineraryId": existing_itinerary["itineraryId"]},
+            {"$set": updated_itinerary, "$unset": {"lastPromptUsed": ""}}
+        )
+    invalidate_itinerary(existing_itinerary.get("tripId"))
+    
+    # Fetch full updated document
+    itinerary = await async_itineraries_collection.find_one({"itineraryId": existing_itinerary["itineraryId"]}, ITINERARY_PROJECTION)
+    return _serialize_itinerary(itinerary)
@@ -1,63 +1,61 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 try:
-    from backend.database.db import trips_collection, itineraries_collection
-    from backend.ai.itinerary import generate_itinerary
-    from backend.ai.regeneration import regenerate_itinerary
+    from backend.database.access import get_owned_trip, get_latest_itinerary, get_trip_and_itinerary
+    from backend.ai.itinerary import generate_itinerary_async
+    from backend.ai.regeneration import regenerate_itinerary_async
+    from backend.ai.singleflight import coalesce_generation
+    from backend.ai.streaming import coalesced_itinerary_events
     from backend.ai.assistant import chat_with_assistant
     from backend.ai.post_trip import generate_trip_summary
     from backend.ai.safety import assess_safety
     from backend.auth.dependencies import get_current_user
-    from backend.utils.geo import haversine
+    from backend.database.audit import get_prompt_audit
+    from backend.utils.spatial import cached_spatial_index
 except ImportError:
-    from database.db import trips_collection, itineraries_collection
-    from ai.itinerary import generate_itinerary
-    from ai.regeneration import regenerate_itinerary
+    from database.access import get_owned_trip, get_latest_itinerary, get_trip_and_itinerary
+    from ai.itinerary import generate_itinerary_async
+    from ai.regeneration import regenerate_itinerary_async
+    from ai.singleflight import coalesce_generation
+    from ai.streaming import coalesced_itinerary_events
     from ai.assistant import chat_with_assistant
     from ai.post_trip import generate_trip_summary
     from ai.safety import assess_safety
     from auth.dependencies import get_current_user
-    from utils.geo import haversine
+    from database.audit import get_prompt_audit
+    from utils.spatial import cached_spatial_index
 
 router = APIRouter()
 
 @router.get("/ai/itinerary/ar-nearby")
-def get_ar_nearby(trip_id: str, lat: float, lng: float, radius: float = 1000, user=Depends(get_current_user)):
-    # Verify trip ownership
-    trip = trips_collection.find_one({"trip_id": trip_id, "user_id": user["uid"]})
+async def get_ar_nearby(trip_id: str, lat: float, lng: float, radius: float = 1000, user=Depends(get_current_user)):
+    # Verify trip ownership (cached per user)
+    trip = await get_owned_trip(trip_id, user["uid"])
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
 
-    itinerary = itineraries_collection.find_one({"tripId": trip_id})
-    if not itinerary:
+    # AR clients poll this while walking: the itinerary's places are indexed
+    # once per trip and kept in memory until the itinerary changes
+    index = await cached_spatial_index(
+        trip_id,
+        lambda: get_latest_itinerary(trip_id)
+    )
+    if index is None:
         return []
 
-    nearby_places = []
-    for day in itinerary.get("days", []):
-        for place in day.get("places", []):
-            # We assume place data from the LLM has lat/lng if we enrich it or 
-            # we use the search service to get coordinates if missing.
-            # For this MVP, we'll try to find lat/lng in the place object
-            p_lat = place.get("lat")
-            p_lng = place.get("lng")
-            
-            if p_lat and p_lng:
-                dist = haversine(lat, lng, p_lat, p_lng)
-                if dist <= radius:
-                    nearby_places.append({
-                        **place,
-                        "distance": round(dist, 1)
-                    })
-    
-    return nearby_places
+    # Nearest first, with distance (m) and bearing (degrees) for each place
+    return index.within(lat, lng, radius)
 
 @router.post("/ai/itinerary/generate")
-def generate(trip_id: str, user=Depends(get_current_user)):
-    trip = trips_collection.find_one({"trip_id": trip_id, "user_id": user["uid"]})
+async def generate(trip_id: str, use_cache: bool = True, user=Depends(get_current_user)):
+    trip = await get_owned_trip(trip_id, user["uid"])
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
     
     try:
-        itinerary = generate_itinerary(trip)
+        # Double-clicks and client retries attach to the running generation
+        itinerary = await coalesce_generation(trip_id, lambda: generate_itinerary_async(trip, use_cache=use_cache))
         return itinerary
     except Exception as e:
         err_msg = str(e)
@@ -65,39 +63,75 @@ def generate(trip_id: str, user=Depends(get_current_user)):
             raise HTTPException(status_code=503, detail="AI is currently at capacity. Please try again in 30 seconds.")
         raise HTTPException(status_code=500, detail=f"Itinerary generation failed: {err_msg}")
 
+@router.post("/ai/itinerary/generate/stream")
+async def generate_stream(trip_id: str, use_cache: bool = True, user=Depends(get_current_user)):
+    trip = await get_owned_trip(trip_id, user["uid"])
+    if not trip:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    
+    # Days are sent as `day` events as soon as the model finishes each one;
+    # a reconnect or double-click joins the running generation
+    return StreamingResponse(coalesced_itinerary_events(trip, use_cache=use_cache), media_type="text/event-stream")
+
 @router.get("/trip/{trip_id}/itinerary")
-def get_itinerary(trip_id: str, user=Depends(get_current_user)):
-    # Check trip ownership
-    trip = trips_collection.find_one({"trip_id": trip_id, "user_id": user["uid"]})
+async def get_itinerary(trip_id: str, user=Depends(get_current_user)):
+    # Ownership check and itinerary load in one round-trip
+    trip, itinerary = await get_trip_and_itinerary(trip_id, user["uid"])
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found or not authorized")
     
-    itinerary = itineraries_collection.find_one({"tripId": trip_id})
     if not itinerary:
         raise HTTPException(status_code=404, detail="Itinerary not generated yet")
     
     if "_id" in itinerary: del itinerary["_id"]
     return itinerary
 
+@router.get("/trip/{trip_id}/itinerary/prompt")
+async def get_itinerary_prompt(trip_id: str, user=Depends(get_current_user)):
+    """
+    Prompt and raw model response behind the trip's current itinerary, from
+    the audit collection (or inline on documents written before it).
+    """
+    trip, itinerary = await get_trip_and_itinerary(trip_id, user["uid"], projection={"promptAuditId": 1, "lastPromptUsed": 1})
+    if not trip:
+        raise HTTPException(status_code=404, detail="Trip not found or not authorized")
+    if not itinerary:
+        raise HTTPException(status_code=404, detail="Itinerary not generated yet")
+
+    audit_id = itinerary.get("promptAuditId")
+    if not audit_id:
+        if itinerary.get("lastPromptUsed"):
+            return {"promptAuditId": None, "prompt": itinerary["lastPromptUsed"], "response": None}
+        raise HTTPException(status_code=404, detail="No prompt recorded for this itinerary")
+
+    record = await asyncio.to_thread(get_prompt_audit, audit_id, trip_id)
+    if not record:
+        # Expired past PROMPT_AUDIT_RETENTION_DAYS, or auditing was off
+        raise HTTPException(status_code=404, detail="Prompt audit not found")
+    record["promptAuditId"] = record.pop("_id")
+    record.pop("expiresAt", None)
+    return record
+
 @router.post("/ai/itinerary/regenerate")
-def regenerate(data: dict, user=Depends(get_current_user)):
+async def regenerate(data: dict, user=Depends(get_current_user)):
     trip_id = data.get("tripId")
     instruction = data.get("instruction")
     constraints = data.get("constraints", {})
+    # Patch mode is opt-in; clients that do not ask get a full regeneration
+    mode = data.get("mode", "full")
     
     if not trip_id or not instruction:
         raise HTTPException(status_code=400, detail="tripId and instruction are required")
         
-    trip = trips_collection.find_one({"trip_id": trip_id, "user_id": user["uid"]})
+    trip, existing_itinerary = await get_trip_and_itinerary(trip_id, user["uid"])
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
         
-    existing_itinerary = itineraries_collection.find_one({"tripId": trip_id})
     if not existing_itinerary:
         raise HTTPException(status_code=404, detail="No existing itinerary to regenerate")
         
     try:
-        updated_itinerary = regenerate_itinerary(trip, existing_itinerary, instruction, constraints)
+        updated_itinerary = await regenerate_itinerary_async(trip, existing_itinerary, instruction, constraints, mode=mode)
         return {"message": "Itinerary updated successfully", "updatedItinerary": updated_itinerary}
     except Exception as e:
         err_msg = str(e)
@@ -106,21 +140,21 @@ def regenerate(data: dict, user=Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"Regeneration failed: {err_msg}")
 
 @router.post("/ai/chat")
-def chat(message: str, trip_id: str = None, user=Depends(get_current_user)):
+async def chat(message: str, trip_id: str = None, user=Depends(get_current_user)):
     trip_context = None
     if trip_id:
-        trip_context = trips_collection.find_one({"trip_id": trip_id, "user_id": user["uid"]})
+        trip_context = await get_owned_trip(trip_id, user["uid"])
     
-    return chat_with_assistant(message, trip_context)
+    return await chat_with_assistant(message, trip_context)
 
 @router.post("/ai/post-trip/summary")
-def summary(trip_id: str, user=Depends(get_current_user)):
-    trip = trips_collection.find_one({"trip_id": trip_id, "user_id": user["uid"]})
+async def summary(trip_id: str, user=Depends(get_current_user)):
+    trip = await get_owned_trip(trip_id, user["uid"])
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
     
-    return generate_trip_summary(trip)
+    return await generate_trip_summary(trip)
 
 @router.post("/ai/safety/assess")
-def safety(location: str, user=Depends(get_current_user)):
-    return assess_safety(location)
+async def safety(location: str, user=Depends(get_current_user)):
+    return await assess_safety(location)
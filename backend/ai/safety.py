@@ -1,13 +1,16 @@
 import os
-import json
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
+try:
+    from backend.utils.json_stream import parse_json_stream
+except ImportError:
+    from utils.json_stream import parse_json_stream
 
 load_dotenv()
 client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 
-def assess_safety(location, weather_data=None):
+async def assess_safety(location, weather_data=None):
     gemini_key = os.getenv("GEMINI_API_KEY")
     if not gemini_key:
         return {"level": "Unknown", "advice": "Gemini API key not configured."}
@@ -19,7 +22,7 @@ def assess_safety(location, weather_data=None):
     prompt += " Provide a safety level (Low/Medium/High Risk) and brief advice. Return as RAW JSON: {\"level\": \"...\", \"advice\": \"...\"}"
 
     try:
-        response = client.models.generate_content(
+        response = await client.aio.models.generate_content(
             model='gemini-2.0-flash',
             contents=prompt,
             config=types.GenerateContentConfig(
@@ -28,7 +31,7 @@ def assess_safety(location, weather_data=None):
         )
         
         if response.text:
-            return json.loads(response.text.strip())
+            return parse_json_stream(response.text)
     except Exception as e:
         print(f"Safety Gemini Error: {e}")
 
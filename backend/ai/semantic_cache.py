@@ -0,0 +1,100 @@
+import bisect
+import copy
+import os
+try:
+    from backend.utils.cache import TTLCache
+    from backend.services.geocode_cache import normalize_key
+    from backend.services.fx import convert, trip_currency, DEFAULT_CURRENCY
+except ImportError:
+    from utils.cache import TTLCache
+    from services.geocode_cache import normalize_key
+    from services.fx import convert, trip_currency, DEFAULT_CURRENCY
+
+# Parsed LLM itineraries keyed on a fingerprint of the trip parameters that
+# shape the plan. A hit skips the LLM call and keeps the plan's place costs;
+# only the cost summary is recomputed for the requesting trip.
+SEMANTIC_CACHE_TTL_S = int(os.getenv("SEMANTIC_CACHE_TTL_S", str(24 * 3600)))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
+
+# Per-day budget band edges in DEFAULT_CURRENCY; budgets in other currencies
+# are converted before bucketing. Trips in the same band share plans.
+BUDGET_BUCKET_EDGES = [1000, 2500, 5000, 10000, 20000, 50000]
+
+_cache = TTLCache(maxsize=SEMANTIC_CACHE_SIZE, ttl=SEMANTIC_CACHE_TTL_S)
+_bypasses = 0
+_stores = 0
+_rejected = 0
+
+def budget_bucket(budget, days):
+    per_day = float(budget or 0) / max(int(days or 1), 1)
+    return bisect.bisect_right(BUDGET_BUCKET_EDGES, per_day)
+
+def trip_fingerprint(trip):
+    """
+    Canonical key: destination, duration, budget bucket, budget level, pace,
+    sorted interests and currency.
+    "Kolkata", 3 days, 4500, Luxury, Balanced, [History, Food], INR ->
+    "kolkata|3|b1|luxury|balanced|food,history|INR"
+    """
+    days = int(trip.get("days", 3) or 3)
+    interests = sorted({normalize_key(i) for i in trip.get("interests", []) if str(i).strip()})
+    currency_code = trip_currency(trip)[0]
+    budget = convert(float(trip.get("budget", 0) or 0), currency_code, DEFAULT_CURRENCY) or 0
+    return "|".join([
+        normalize_key(trip.get("destination", "")),
+        str(days),
+        f"b{budget_bucket(budget, days)}",
+        normalize_key(trip.get("budget_level", "Balanced")),
+        normalize_key(trip.get("travel_pace", "Balanced")),
+        ",".join(interests),
+        currency_code
+    ])
+
+def get_cached_itinerary(trip, use_cache=True):
+    """
+    Returns a copy of a cached raw itinerary for an equivalent trip, or None.
+    Place costs are the ones the model gave (the budget bucket keeps them in
+    range); day totals and the cost summary are recomputed from them by the
+    normal post-processing.
+    """
+    global _bypasses
+    if not use_cache:
+        _bypasses += 1
+        return None
+    entry = _cache.get(trip_fingerprint(trip))
+    if entry is None:
+        return None
+    itinerary = copy.deepcopy(entry)
+    itinerary["_semantic_cache_hit"] = True
+    print(f"DEBUG: Semantic cache hit for {trip_fingerprint(trip)}", flush=True)
+    return itinerary
+
+def _complete(trip, itinerary):
+    """
+    False for degraded plans that must not be replayed to other trips: long
+    trips with days rebuilt from the skeleton, streams cut off mid-document,
+    or fewer days than the trip asked for.
+    """
+    if itinerary.get("_failed_chunks", 0) or itinerary.get("_truncated"):
+        return False
+    days = [d for d in itinerary.get("days", []) if isinstance(d, dict) and d.get("places")]
+    return len(days) >= int(trip.get("days", 3) or 3)
+
+def store_itinerary(trip, itinerary):
+    """
+    Caches a parsed LLM itinerary. Mock/fallback plans, plans without days
+    and incomplete plans are not cached. Returns True when stored.
+    """
+    global _stores, _rejected
+    if not itinerary or itinerary.get("is_mock") or not itinerary.get("days"):
+        return False
+    if not _complete(trip, itinerary):
+        _rejected += 1
+        print(f"DEBUG: Not caching incomplete itinerary for {trip_fingerprint(trip)}", flush=True)
+        return False
+    _stores += 1
+    _cache.set(trip_fingerprint(trip), copy.deepcopy(itinerary))
+    return True
+
+def semantic_cache_stats():
+    return {**_cache.stats(), "bypasses": _bypasses, "stores": _stores, "rejected": _rejected, "ttlSeconds": SEMANTIC_CACHE_TTL_S}
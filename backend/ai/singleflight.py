@@ -0,0 +1,116 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+try:
+    from backend.database.db import async_db, async_itineraries_collection
+except ImportError:
+    from database.db import async_db, async_itineraries_collection
+
+# A lease older than this is considered abandoned (crashed worker)
+LEASE_TTL_S = int(os.getenv("GENERATION_LEASE_TTL_S", "180"))
+POLL_INTERVAL_S = 1.0
+
+# Identifies this worker process as a lease owner
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_inflight = {}
+_leases = async_db["generation_leases"] if async_db is not None else None
+
+async def _acquire_lease(trip_id):
+    """
+    Returns (acquired, started_at). started_at is the current holder's start time.
+    """
+    now = datetime.now(timezone.utc)
+    lease = {"_id": trip_id, "owner": WORKER_ID, "startedAt": now, "expiresAt": now + timedelta(seconds=LEASE_TTL_S)}
+    try:
+        await _leases.insert_one(lease)
+        return True, now
+    except DuplicateKeyError:
+        pass
+
+    # Take over an expired lease
+    result = await _leases.update_one(
+        {"_id": trip_id, "expiresAt": {"$lt": now}},
+        {"$set": {"owner": WORKER_ID, "startedAt": now, "expiresAt": lease["expiresAt"]}}
+    )
+    if result.modified_count:
+        return True, now
+
+    current = await _leases.find_one({"_id": trip_id})
+    return False, current["startedAt"] if current else None
+
+async def _renew_lease(trip_id):
+    while True:
+        await asyncio.sleep(LEASE_TTL_S / 3)
+        await _leases.update_one(
+            {"_id": trip_id, "owner": WORKER_ID},
+            {"$set": {"expiresAt": datetime.now(timezone.utc) + timedelta(seconds=LEASE_TTL_S)}}
+        )
+
+async def _release_lease(trip_id):
+    try:
+        await _leases.delete_one({"_id": trip_id, "owner": WORKER_ID})
+    except Exception as e:
+        print(f"DEBUG: Failed to release generation lease for {trip_id}: {e}")
+
+async def _wait_for_remote(trip_id, started_at):
+    """
+    Polls until the worker holding the lease stores its itinerary.
+    Returns None if the lease goes away without a result.
+    """
+    while True:
+        itinerary = await async_itineraries_collection.find_one(
+            {"tripId": trip_id, "createdAt": {"$gte": started_at}},
+            sort=[("createdAt", -1)]
+        )
+        if itinerary:
+            if "_id" in itinerary: del itinerary["_id"]
+            for field in ("createdAt", "updatedAt"):
+                if isinstance(itinerary.get(field), datetime):
+                    itinerary[field] = itinerary[field].isoformat()
+            return itinerary
+        lease = await _leases.find_one({"_id": trip_id})
+        if not lease or lease["startedAt"] != started_at:
+            return None
+        await asyncio.sleep(POLL_INTERVAL_S)
+
+async def _lead(trip_id, run):
+    if _leases is None:
+        return await run()
+
+    while True:
+        acquired, started_at = await _acquire_lease(trip_id)
+        if acquired:
+            renewer = asyncio.create_task(_renew_lease(trip_id))
+            try:
+                return await run()
+            finally:
+                renewer.cancel()
+                await _release_lease(trip_id)
+
+        print(f"DEBUG: Generation for {trip_id} already running on another worker. Waiting...", flush=True)
+        if started_at is not None:
+            result = await _wait_for_remote(trip_id, started_at)
+            if result is not None:
+                return result
+
+def coalesce_generation(trip_id, run):
+    """
+    Single-flight wrapper for itinerary generation keyed by trip_id.
+
+    Concurrent callers in this process share one task; across workers a Mongo
+    lease elects a leader and the others wait for the itinerary it stores.
+    `run` is a coroutine function performing the generation.
+    """
+    task = _inflight.get(trip_id)
+    if task is None:
+        task = asyncio.ensure_future(_lead(trip_id, run))
+        _inflight[trip_id] = task
+        task.add_done_callback(lambda _: _inflight.pop(trip_id, None))
+    else:
+        print(f"DEBUG: Coalescing duplicate generation request for {trip_id}", flush=True)
+    # Shield so one client disconnecting does not cancel the shared generation
+    return asyncio.shield(task)
@@ -0,0 +1,229 @@
+import asyncio
+import copy
+import json
+import os
+import time
+try:
+    from backend.database.db import async_itineraries_collection
+    from backend.trips.schema import DayPlan
+    from backend.utils.json_stream import IncrementalJSONParser
+    from backend.utils.place_index import PlaceIndex
+    from backend.database.access import invalidate_itinerary
+    from backend.ai.provider_health import provider_health
+    from backend.ai.cost_engine import parse_cost
+    from backend.ai.long_trip import is_long_trip
+    from backend.ai.semantic_cache import get_cached_itinerary, store_itinerary
+    from backend.ai.singleflight import coalesce_generation
+    from backend.ai.itinerary import (
+        candidate_models, stream_llm_text,
+        call_llm_async, generate_long_trip_async, calculate_costs, dedupe_day_places,
+        sanitize_destination, cache_hit_context,
+        _prepare_generation, _finalize_itinerary, _serialize_itinerary
+    )
+except ImportError:
+    from database.db import async_itineraries_collection
+    from trips.schema import DayPlan
+    from utils.json_stream import IncrementalJSONParser
+    from utils.place_index import PlaceIndex
+    from database.access import invalidate_itinerary
+    from ai.provider_health import provider_health
+    from ai.cost_engine import parse_cost
+    from ai.long_trip import is_long_trip
+    from ai.semantic_cache import get_cached_itinerary, store_itinerary
+    from ai.singleflight import coalesce_generation
+    from ai.itinerary import (
+        candidate_models, stream_llm_text,
+        call_llm_async, generate_long_trip_async, calculate_costs, dedupe_day_places,
+        sanitize_destination, cache_hit_context,
+        _prepare_generation, _finalize_itinerary, _serialize_itinerary
+    )
+
+def _normalized_day(day):
+    """
+    Copy of a raw day with place costs parsed the way the cost engine reads
+    them ("₹500" -> 500.0), so schema validation judges the same day
+    _finalize_itinerary would store and cost.
+    """
+    day = copy.deepcopy(day)
+    places = day.get("places")
+    for place in places if isinstance(places, list) else []:
+        if isinstance(place, dict):
+            place["estimatedCost"] = parse_cost(place.get("estimatedCost"))
+    return day
+
+def _validated_day(day, seen_places):
+    """
+    The `day` event for a raw day: normalized, checked against the DayPlan
+    schema, then filtered for trip-wide uniqueness and costed. Returns None
+    when the day does not validate. The raw day is never modified, so a day
+    that is not streamed still reaches the stored itinerary.
+    """
+    day = _normalized_day(day)
+    try:
+        DayPlan.model_validate(day)
+    except Exception as e:
+        print(f"DEBUG: Streamed day failed validation: {e}", flush=True)
+        return None
+    # Only days that are sent take part in the uniqueness filter
+    day = dedupe_day_places(day, seen_places)
+    calculate_costs([day])
+    return day
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def stream_itinerary_events(trip, use_cache=True):
+    """
+    Generates an itinerary while yielding Server-Sent Events:
+    `status` for stage changes, `day` for each completed and validated day,
+    then `done` with the stored itinerary (or `error`).
+    A semantic cache hit skips the model and replays the cached days.
+    """
+    async for event, data in _itinerary_events(trip, use_cache):
+        yield _sse(event, data)
+
+async def coalesced_itinerary_events(trip, use_cache=True):
+    """
+    stream_itinerary_events behind the per-trip single-flight used by
+    /generate. The first caller drives the stream; a caller arriving while
+    a generation for the trip is running (streamed or not, on any worker)
+    waits for it and gets its days replayed as `day` events, then `done`.
+    The generation keeps running if the leading client disconnects.
+    """
+    events = asyncio.Queue()
+
+    async def run():
+        async for event, data in _itinerary_events(trip, use_cache):
+            events.put_nowait((event, data))
+            if event == "done":
+                return data
+            if event == "error":
+                raise Exception(data["detail"])
+
+    result = coalesce_generation(trip["trip_id"], run)
+    while True:
+        # Events of a generation this caller leads, until it ends
+        getter = asyncio.ensure_future(events.get())
+        try:
+            await asyncio.wait({getter, result}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            ended = not getter.done()
+            if ended:
+                getter.cancel()
+        if ended:
+            break
+        event, data = getter.result()
+        yield _sse(event, data)
+        if event in ("done", "error"):
+            return
+    # Events queued as the generation ended
+    while not events.empty():
+        event, data = events.get_nowait()
+        yield _sse(event, data)
+        if event in ("done", "error"):
+            return
+
+    # Joined a generation led elsewhere (or the stream failed outright)
+    try:
+        itinerary = result.result()
+    except Exception as e:
+        yield _sse("error", {"detail": f"Itinerary generation failed: {e}"})
+        return
+    for day in itinerary.get("days", []):
+        yield _sse("day", day)
+    yield _sse("done", itinerary)
+
+async def _itinerary_events(trip, use_cache=True):
+    """
+    The (event, data) pairs behind stream_itinerary_events.
+    """
+    # Checked before enrichment: a hit needs none of the provider lookups
+    sanitize_destination(trip)
+    raw_itinerary = get_cached_itinerary(trip, use_cache)
+    cache_hit = raw_itinerary is not None
+    if cache_hit:
+        ctx = await asyncio.to_thread(cache_hit_context, trip)
+    else:
+        yield ("status", {"stage": "enriching"})
+        ctx = await asyncio.to_thread(_prepare_generation, trip)
+        yield ("status", {"stage": "calling_llm"})
+    replay = cache_hit
+    streamed_days = []
+    seen_places = PlaceIndex()
+
+    mock = os.getenv("MOCK_AI") == "true" or os.getenv("OFFLINE_MODE") == "true"
+    long_trip = is_long_trip(trip) and not mock
+
+    if not cache_hit and not long_trip and not mock:
+        for model_name in candidate_models(trip):
+            if not provider_health.begin_call(model_name):
+                continue
+            parser = IncrementalJSONParser(paths=("days[*]",))
+            raw_days = []
+            started = time.time()
+            stream_failed = False
+            try:
+                async for chunk in stream_llm_text(ctx["prompt"], model_name):
+                    for _, day in parser.feed(chunk):
+                        raw_days.append(day)
+                        day = _validated_day(day, seen_places)
+                        if day is not None:
+                            streamed_days.append(day)
+                            yield ("day", day)
+            except (asyncio.CancelledError, GeneratorExit):
+                # Abandoned mid-stream: free a half-open probe slot without
+                # judging the model, then let the cancellation through
+                provider_health.cancel_call(model_name)
+                raise
+            except Exception as e:
+                print(f"DEBUG: Streaming from {model_name} failed: {e}", flush=True)
+                provider_health.record_failure(model_name, e, time.time() - started)
+                if not streamed_days:
+                    continue
+                stream_failed = True
+
+            try:
+                raw_itinerary = parser.finish()
+            except Exception:
+                raw_itinerary = {}
+            if not isinstance(raw_itinerary, dict):
+                raw_itinerary = {}
+            if not streamed_days and not raw_itinerary.get("days"):
+                provider_health.record_failure(model_name, "no days in response", time.time() - started)
+                continue
+            provider_health.record_success(model_name, time.time() - started)
+            if not raw_itinerary.get("days"):
+                # Unparseable remainder: keep the days that arrived complete
+                raw_itinerary["days"] = raw_days
+            raw_itinerary["_used_model"] = model_name
+            # Cut off mid-document: usable for this trip, never cached
+            raw_itinerary["_truncated"] = stream_failed or not parser.complete
+            break
+
+    if raw_itinerary is None:
+        # Long trip, mock mode or every streaming attempt failed: no token streaming
+        replay = True
+        try:
+            if long_trip:
+                # Day chunks are generated in parallel, then replayed as `day` events
+                raw_itinerary = await generate_long_trip_async(trip, ctx)
+            else:
+                raw_itinerary = await call_llm_async(ctx["prompt"], trip)
+        except Exception as e:
+            yield ("error", {"detail": f"Itinerary generation failed: {e}"})
+            return
+
+    if replay:
+        for day in raw_itinerary.get("days", []):
+            day = _validated_day(day, seen_places)
+            if day is not None:
+                yield ("day", day)
+
+    if not cache_hit:
+        store_itinerary(trip, raw_itinerary)
+    yield ("status", {"stage": "post_processing"})
+    itinerary_data = _finalize_itinerary(trip, ctx, raw_itinerary)
+    if async_itineraries_collection is not None:
+        await async_itineraries_collection.insert_one(itinerary_data.copy())
+    invalidate_itinerary(trip["trip_id"])
+    yield ("done", _serialize_itinerary(itinerary_data))
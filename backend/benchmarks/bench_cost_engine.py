@@ -0,0 +1,108 @@
+"""
+Micro-benchmark: cost engine vs. the original per-item calculate_costs, for
+single itineraries (the scalar calculate_costs) and for batch re-pricing of
+stored itineraries (the columnar reprice_batch).
+
+Run from the backend directory:
+    python -m benchmarks.bench_cost_engine
+"""
+import copy
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ai.cost_engine import calculate_costs, reprice_batch
+
+def legacy_calculate_costs(days, currency_symbol="₹"):
+    # Copy of the per-item calculate_costs replaced in ai/itinerary.py, kept as the baseline
+    summary = {"food": 0.0, "stay": 0.0, "activities": 0.0, "transport": 0.0, "total": 0.0}
+    for day in days:
+        day_item_sum = 0.0
+        for place in day.get('places', []):
+            cost_raw = place.get('estimatedCost')
+            if cost_raw is None: cost_raw = 0.0
+            cost = 0.0
+            if isinstance(cost_raw, (int, float)):
+                cost = float(cost_raw)
+            elif isinstance(cost_raw, str):
+                try:
+                    clean_str = cost_raw.replace(currency_symbol, "").replace("$", "").replace(",", "").strip()
+                    cost = float(clean_str) if clean_str else 0.0
+                except (ValueError, TypeError):
+                    cost = 0.0
+            category = place.get('category', '').lower()
+            if category == "food":
+                summary["food"] += cost
+            elif category == "hotel":
+                summary["stay"] += cost
+            else:
+                summary["activities"] += cost
+            day_item_sum += cost
+        day_transport = round(day_item_sum * 0.15, 2)
+        summary["transport"] += day_transport
+        day["totalDayCost"] = round(day_item_sum + day_transport, 2)
+    summary["food"] = round(summary["food"], 2)
+    summary["stay"] = round(summary["stay"], 2)
+    summary["activities"] = round(summary["activities"], 2)
+    summary["transport"] = round(summary["transport"], 2)
+    summary["total"] = round(summary["food"] + summary["stay"] + summary["activities"] + summary["transport"], 2)
+    return summary
+
+def make_days(n_days, rng):
+    slots = [("breakfast", "food"), ("morning", "attraction"), ("lunch", "food"),
+             ("afternoon", "attraction"), ("dinner", "food"), ("evening", "hotel")]
+    days = []
+    for d in range(1, n_days + 1):
+        places = []
+        for slot, category in slots:
+            value = rng.randint(100, 6000)
+            # Mix of numeric and string costs, as the models return both
+            cost = value if rng.random() < 0.6 else f"₹{value:,}"
+            places.append({"name": f"Place {d}-{slot}", "category": category, "timeSlot": slot, "estimatedCost": cost})
+        days.append({"dayNumber": d, "places": places})
+    return days
+
+def compare(legacy, engine, number, rounds=15):
+    """
+    Runs the two paths alternately, `number` calls per round, on process
+    CPU time so other load on the machine (and CPU steal on shared VMs)
+    skews both paths the same way. Returns (legacy ms, engine ms, median
+    engine/legacy ratio): best time per call plus the median of the
+    per-round ratios.
+    """
+    legacy_times, engine_times = [], []
+    for _ in range(rounds):
+        for fn, times in ((legacy, legacy_times), (engine, engine_times)):
+            start = time.process_time()
+            for _ in range(number):
+                fn()
+            times.append((time.process_time() - start) / number * 1000)
+    ratios = sorted(e / l for l, e in zip(legacy_times, engine_times))
+    return min(legacy_times), min(engine_times), ratios[len(ratios) // 2]
+
+def main():
+    rng = random.Random(7)
+    itineraries = [make_days(rng.randint(3, 12), rng) for _ in range(5000)]
+
+    # Same results on every itinerary, from both paths
+    for days in itineraries[:500]:
+        a, b, c = copy.deepcopy(days), copy.deepcopy(days), copy.deepcopy(days)
+        assert legacy_calculate_costs(a) == calculate_costs(b) == reprice_batch([c])[0]
+        assert [d["totalDayCost"] for d in a] == [d["totalDayCost"] for d in b] == [d["totalDayCost"] for d in c]
+
+    single = itineraries[0]
+    places = sum(len(d["places"]) for days in itineraries for d in days)
+    legacy_single, engine_single, single_ratio = compare(
+        lambda: legacy_calculate_costs(single), lambda: calculate_costs(single), 2000
+    )
+    legacy_batch, engine_batch, batch_ratio = compare(
+        lambda: [legacy_calculate_costs(days) for days in itineraries], lambda: reprice_batch(itineraries), 1
+    )
+
+    print(f"single itinerary ({len(single)} days): legacy {legacy_single:.4f} ms, engine {engine_single:.4f} ms, median ratio {single_ratio:.2f}")
+    print(f"batch of {len(itineraries)} itineraries ({places} places): legacy {legacy_batch:.1f} ms, engine {engine_batch:.1f} ms, median ratio {batch_ratio:.2f}")
+
+if __name__ == "__main__":
+    main()
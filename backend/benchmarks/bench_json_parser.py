@@ -0,0 +1,131 @@
+"""
+Micro-benchmark: incremental JSON parser vs. the legacy repair path on
+truncated 20-50 KB LLM itinerary outputs.
+
+Run from the backend directory:
+    python -m benchmarks.bench_json_parser
+"""
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.json_stream import parse_json_stream, IncrementalJSONParser
+
+def legacy_repair_json(json_str):
+    # Copy of the repair_json removed from ai/itinerary.py, kept as the baseline
+    if not json_str: return json_str
+    stack = []
+    is_in_string = False
+    is_escaped = False
+    clean_text = json_str.strip()
+    for char in clean_text:
+        if is_escaped:
+            is_escaped = False
+            continue
+        if char == '\\':
+            is_escaped = True
+        elif char == '"':
+            is_in_string = not is_in_string
+        elif not is_in_string:
+            if char == '{':
+                stack.append('}')
+            elif char == '[':
+                stack.append(']')
+            elif char == '}' or char == ']':
+                if stack and stack[-1] == char:
+                    stack.pop()
+    repaired = clean_text
+    if is_in_string:
+        repaired += '"'
+    repaired = repaired.strip()
+    if repaired.endswith(':'):
+        repaired += ' null'
+    elif repaired.endswith(','):
+        repaired = repaired[:-1].strip()
+    while stack:
+        repaired += stack.pop()
+    return repaired
+
+def legacy_parse(res_text):
+    text = res_text.strip()
+    if "```" in text:
+        if "```json" in text:
+            text = text.split("```json")[1].split("```")[0]
+        else:
+            text = text.split("```")[1].split("```")[0]
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(legacy_repair_json(text))
+
+def make_itinerary(days, rng):
+    slots = ["breakfast", "morning", "lunch", "afternoon", "dinner", "evening"]
+    return {
+        "safetyAdvisory": "Keep valuables close in crowded markets. " * 4,
+        "travelTips": ["Carry a water bottle", "Use prepaid taxis", "Carry cash for street food"],
+        "topHotels": [
+            {"name": f"Hotel {i}", "rating": 4.5, "vibe": "Heritage", "description": "Colonial charm \"near\" the river",
+             "price": f"₹{rng.randint(2000, 9000)}", "lat": 22.5 + i / 100, "lng": 88.3 + i / 100}
+            for i in range(5)
+        ],
+        "days": [
+            {
+                "dayNumber": d,
+                "weatherNote": "Warm and humid, plan indoor visits around noon.",
+                "totalDayCost": 0,
+                "places": [
+                    {"name": f"Place {d}-{s}", "category": "food" if s in ("breakfast", "lunch", "dinner") else "attraction",
+                     "estimatedCost": rng.randint(100, 2000), "timeSlot": s, "duration": "2 hours",
+                     "lat": 22.5 + rng.random() / 10, "lng": 88.3 + rng.random() / 10,
+                     "description": "A well loved local spot with a long history and great views.",
+                     "safetyRating": "High", "bookingUrl": "https://example.com/book"}
+                    for s in slots
+                ]
+            }
+            for d in range(1, days + 1)
+        ]
+    }
+
+def bench(fn, samples, repeat):
+    start = time.perf_counter()
+    failures = 0
+    for _ in range(repeat):
+        for text in samples:
+            try:
+                fn(text)
+            except Exception:
+                failures += 1
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(samples)) * 1000, failures // repeat
+
+def streaming_parse(text, chunk=16):
+    parser = IncrementalJSONParser(paths=("days[*]",))
+    for i in range(0, len(text), chunk):
+        parser.feed(text[i:i + chunk])
+    return parser.finish()
+
+def main():
+    rng = random.Random(42)
+    samples = []
+    while len(samples) < 40:
+        full = "```json\n" + json.dumps(make_itinerary(rng.randint(8, 25), rng), indent=2) + "\n```"
+        # Truncate somewhere in the last 40% of the document
+        truncated = full[:rng.randint(int(len(full) * 0.6), len(full) - 10)]
+        if 20_000 <= len(truncated) <= 50_000:
+            samples.append(truncated)
+
+    sizes = [len(s) for s in samples]
+    print(f"{len(samples)} truncated samples, {min(sizes)}-{max(sizes)} chars")
+    legacy_ms, legacy_fail = bench(legacy_parse, samples, 5)
+    new_ms, new_fail = bench(parse_json_stream, samples, 5)
+    stream_ms, stream_fail = bench(streaming_parse, samples, 5)
+    print(f"legacy repair path:          {legacy_ms:7.3f} ms/doc  ({legacy_fail} unparseable)")
+    print(f"incremental parser (1 feed): {new_ms:7.3f} ms/doc  ({new_fail} unparseable)")
+    print(f"incremental parser (16 B):   {stream_ms:7.3f} ms/doc  ({stream_fail} unparseable)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark: PlaceIndex vs. the pairwise substring check it replaced in
+dedupe_day_places, on candidate sets from 50 to 10k places with planted
+near-duplicates. "expected" is the number of distinct places generated; keeping
+fewer means distinct places were merged.
+
+Run from the backend directory:
+    python -m benchmarks.bench_place_index
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.place_index import PlaceIndex
+
+WORDS = [
+    "victoria", "memorial", "marble", "palace", "garden", "temple", "museum", "market",
+    "lake", "fort", "park", "street", "bazaar", "gallery", "house", "cafe", "kitchen",
+    "spice", "royal", "heritage", "river", "hill", "view", "central", "old", "new",
+    "tower", "bridge", "ghat", "mandir", "masjid", "church", "college", "square", "bay"
+]
+KINDS = ["Restaurant", "Cafe", "Museum", "Temple", "Garden", "Hall", "Point", "Bistro"]
+
+def legacy_unique(names):
+    # Copy of the seen-name loop from dedupe_day_places, kept as the baseline
+    seen_names = set()
+    kept = 0
+    for raw in names:
+        name = raw.strip().lower()
+        is_duplicate = False
+        if name in seen_names:
+            is_duplicate = True
+        else:
+            for seen in seen_names:
+                if (len(name) > 12 and name in seen) or (len(seen) > 12 and seen in name):
+                    is_duplicate = True
+                    break
+        if not is_duplicate:
+            kept += 1
+            seen_names.add(name)
+    return kept
+
+def make_places(n, rng):
+    """
+    n places, about 10% of them variants of an earlier place: "The X",
+    "X Hall", re-cased, accented, or at the same spot with a longer name.
+    """
+    places, originals = [], []
+    while len(places) < n:
+        if originals and rng.random() < 0.1:
+            name, lat, lng = rng.choice(originals)
+            variant = rng.choice([
+                f"The {name}", f"{name} Hall", name.upper(), name.replace("e", "é", 1),
+                f"{name} {rng.choice(KINDS)}"
+            ])
+            places.append({"name": variant, "lat": lat + rng.uniform(-3e-4, 3e-4), "lng": lng + rng.uniform(-3e-4, 3e-4), "planted": True})
+            continue
+        words = rng.sample(WORDS, rng.randint(2, 3))
+        name = " ".join(w.title() for w in words) + f" {rng.choice(KINDS)} {rng.randint(1, 999)}"
+        lat, lng = 22.5 + rng.uniform(-0.2, 0.2), 88.3 + rng.uniform(-0.2, 0.2)
+        originals.append((name, lat, lng))
+        places.append({"name": name, "lat": lat, "lng": lng, "planted": False})
+    return places
+
+def index_unique(places):
+    index = PlaceIndex()
+    kept = 0
+    planted_caught = 0
+    for p in places:
+        if index.add_if_new(p["name"], p["lat"], p["lng"]):
+            kept += 1
+        elif p["planted"]:
+            planted_caught += 1
+    return kept, planted_caught
+
+def best_ms(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = fn(arg)
+        best = min(best, (time.perf_counter() - start) / repeat * 1000)
+    return best, result
+
+def main():
+    rng = random.Random(11)
+    for n in (50, 200, 1000, 10000):
+        places = make_places(n, rng)
+        names = [p["name"] for p in places]
+        planted = sum(p["planted"] for p in places)
+        repeat = max(1, 2000 // n)
+
+        legacy_ms, legacy_kept = best_ms(legacy_unique, names, repeat)
+        index_ms, (kept, caught) = best_ms(index_unique, places, repeat)
+
+        print(f"{n} places ({planted} planted duplicates, expected {n - planted}):")
+        print(f"  legacy substring loop: {legacy_ms:.1f} ms, kept {legacy_kept}")
+        print(f"  PlaceIndex:            {index_ms:.1f} ms, kept {kept}, planted caught {caught}/{planted}")
+
+if __name__ == "__main__":
+    main()
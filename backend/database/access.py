@@ -0,0 +1,210 @@
+import asyncio
+import copy
+import os
+import bson
+from pymongo.errors import PyMongoError
+try:
+    from backend.database.db import async_trips_collection, async_itineraries_collection
+    from backend.utils.cache import TTLCache, ByteLRUCache
+    from backend.utils.spatial import invalidate_spatial_index, clear_spatial_indexes
+except ImportError:
+    from database.db import async_trips_collection, async_itineraries_collection
+    from utils.cache import TTLCache, ByteLRUCache
+    from utils.spatial import invalidate_spatial_index, clear_spatial_indexes
+
+# Trips a user was recently verified to own, keyed by (user_id, trip_id). Trip
+# documents are never updated after creation, so a short TTL only bounds how
+# long a deleted trip could still be served.
+OWNERSHIP_TTL_S = int(os.getenv("OWNERSHIP_CACHE_TTL_S", "60"))
+_owned_trips = TTLCache(maxsize=int(os.getenv("OWNERSHIP_CACHE_SIZE", "4096")), ttl=OWNERSHIP_TTL_S)
+
+# Newest generation first: a trip keeps one itinerary document per generation
+LATEST = [("createdAt", -1)]
+# Default itinerary reads: prompts live in the audit collection
+# (database/audit.py); documents written before that still carry one inline
+ITINERARY_PROJECTION = {"lastPromptUsed": 0}
+
+# Newest itinerary per trip, BSON-encoded so the budget is the real document
+# size and every hit decodes to a fresh copy callers are free to modify.
+# Writes in this process invalidate explicitly; with several workers the
+# change stream watcher (ITINERARY_CHANGE_STREAM) or the TTL catches the rest.
+ITINERARY_CACHE_MAX_BYTES = int(os.getenv("ITINERARY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+ITINERARY_CACHE_TTL_S = int(os.getenv("ITINERARY_CACHE_TTL_S", "600"))
+ITINERARY_CHANGE_STREAM = os.getenv("ITINERARY_CHANGE_STREAM", "false").lower() == "true"
+_itineraries = ByteLRUCache(max_bytes=ITINERARY_CACHE_MAX_BYTES, sizeof=len, ttl=ITINERARY_CACHE_TTL_S)
+# Bumped on every invalidation; a read that raced a write is not cached
+_itinerary_epoch = 0
+_watcher = {"running": False, "events": 0, "lastError": None}
+
+def _cached_trip(trip_id, user_id):
+    trip = _owned_trips.get((user_id, trip_id))
+    # Callers annotate the trip dict during generation; never hand out the cached one
+    return copy.deepcopy(trip) if trip is not None else None
+
+def _remember(trip):
+    _owned_trips.set((trip["user_id"], trip["trip_id"]), copy.deepcopy(trip))
+
+async def get_owned_trip(trip_id, user_id):
+    """
+    The trip if `user_id` owns it, else None.
+    """
+    trip = _cached_trip(trip_id, user_id)
+    if trip is not None:
+        return trip
+    trip = await async_trips_collection.find_one({"trip_id": trip_id, "user_id": user_id})
+    if trip is not None:
+        _remember(trip)
+    return trip
+
+def _cached_itinerary(trip_id):
+    encoded = _itineraries.get(trip_id)
+    return bson.decode(encoded) if encoded is not None else None
+
+def _remember_itinerary(trip_id, itinerary, epoch):
+    if itinerary is None or epoch != _itinerary_epoch:
+        return
+    try:
+        _itineraries.set(trip_id, bson.encode(itinerary))
+    except (bson.InvalidDocument, TypeError) as e:
+        print(f"WARNING: Itinerary for {trip_id} not cached: {e}")
+
+def invalidate_itinerary(trip_id):
+    """
+    Drops everything cached for the trip's itinerary. Called after every
+    write to the trip's itinerary documents.
+    """
+    global _itinerary_epoch
+    _itinerary_epoch += 1
+    if trip_id is not None:
+        _itineraries.delete(trip_id)
+        invalidate_spatial_index(trip_id)
+
+def _invalidate_all_itineraries():
+    """
+    For changes that cannot be tied to a trip: drops every cached itinerary
+    and every spatial index built from one.
+    """
+    global _itinerary_epoch
+    _itinerary_epoch += 1
+    _itineraries.clear()
+    clear_spatial_indexes()
+
+async def get_latest_itinerary(trip_id, projection=None):
+    """
+    Newest itinerary of the trip. Default reads (ITINERARY_PROJECTION) go
+    through the in-process cache; other projections always go to Mongo.
+    """
+    if projection:
+        return await async_itineraries_collection.find_one({"tripId": trip_id}, projection, sort=LATEST)
+    itinerary = _cached_itinerary(trip_id)
+    if itinerary is not None:
+        return itinerary
+    epoch = _itinerary_epoch
+    itinerary = await async_itineraries_collection.find_one({"tripId": trip_id}, ITINERARY_PROJECTION, sort=LATEST)
+    _remember_itinerary(trip_id, itinerary, epoch)
+    return itinerary
+
+async def get_trip_and_itinerary(trip_id, user_id, projection=None):
+    """
+    (trip, itinerary) in one round-trip: the ownership check and the newest
+    itinerary come from a single $lookup aggregation, or only the missing
+    half is read when ownership or the itinerary is cached. trip is None when the user does not
+    own the trip; itinerary is None when none was generated yet.
+    """
+    trip = _cached_trip(trip_id, user_id)
+    if trip is not None:
+        return trip, await get_latest_itinerary(trip_id, projection)
+    if not projection:
+        # Ownership expired but the itinerary is still cached
+        itinerary = _cached_itinerary(trip_id)
+        if itinerary is not None:
+            trip = await get_owned_trip(trip_id, user_id)
+            return (trip, itinerary) if trip is not None else (None, None)
+
+    epoch = _itinerary_epoch
+    lookup_pipeline = [{"$sort": {"createdAt": -1}}, {"$limit": 1}, {"$project": projection or ITINERARY_PROJECTION}]
+    pipeline = [
+        {"$match": {"trip_id": trip_id, "user_id": user_id}},
+        {"$limit": 1},
+        # Served by the itineraries (tripId, createdAt) index
+        {"$lookup": {
+            "from": async_itineraries_collection.name,
+            "localField": "trip_id",
+            "foreignField": "tripId",
+            "pipeline": lookup_pipeline,
+            "as": "_itinerary"
+        }}
+    ]
+    docs = await async_trips_collection.aggregate(pipeline).to_list(length=1)
+    if not docs:
+        return None, None
+    trip = docs[0]
+    itineraries = trip.pop("_itinerary", [])
+    _remember(trip)
+    itinerary = itineraries[0] if itineraries else None
+    if not projection:
+        _remember_itinerary(trip_id, itinerary, epoch)
+    return trip, itinerary
+
+def ownership_cache_stats():
+    return _owned_trips.stats()
+
+async def watch_itinerary_changes():
+    """
+    Invalidates cached itineraries, and the AR spatial indexes built from
+    them, for writes by other processes (API workers, the reprice job). Needs a replica set; runs until cancelled, resuming
+    after transient errors.
+    """
+    pipeline = [
+        {"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}},
+        {"$project": {"operationType": 1, "fullDocument.tripId": 1}}
+    ]
+    resume_token = None
+    delay = 1
+    while True:
+        try:
+            async with async_itineraries_collection.watch(
+                pipeline, full_document="updateLookup", resume_after=resume_token
+            ) as stream:
+                _watcher["running"] = True
+                delay = 1
+                print("DEBUG: Watching itinerary changes")
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    _watcher["events"] += 1
+                    trip_id = (change.get("fullDocument") or {}).get("tripId")
+                    if trip_id is not None:
+                        invalidate_itinerary(trip_id)
+                    else:
+                        # Deletes (and updates of since-deleted documents)
+                        # do not say which trip they belonged to
+                        _invalidate_all_itineraries()
+        except asyncio.CancelledError:
+            raise
+        except PyMongoError as e:
+            _watcher["lastError"] = str(e)
+            # Standalone servers have no change streams; retrying will not help
+            if getattr(e, "code", None) == 40573:
+                print(f"WARNING: Itinerary change stream unavailable: {e}")
+                _watcher["running"] = False
+                return
+            print(f"WARNING: Itinerary change stream failed, retrying in {delay}s: {e}")
+            if getattr(e, "code", None) == 286:
+                # The resume point aged out of the oplog; changes in the gap
+                # are unknown, so start over from an empty cache
+                resume_token = None
+                _invalidate_all_itineraries()
+        _watcher["running"] = False
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 60)
+
+def start_itinerary_watcher():
+    """
+    Startup hook: the change stream task, when enabled. Returns the task.
+    """
+    if not ITINERARY_CHANGE_STREAM or async_itineraries_collection is None:
+        return None
+    return asyncio.create_task(watch_itinerary_changes())
+
+def itinerary_cache_stats():
+    return {**_itineraries.stats(), "changeStream": {"enabled": ITINERARY_CHANGE_STREAM, **_watcher}}
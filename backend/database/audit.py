@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+try:
+    from backend.database.db import db
+except ImportError:
+    from database.db import db
+
+# LLM prompts and raw responses, kept out of the itinerary documents. Each
+# record is zlib-compressed and referenced from the itinerary by
+# promptAuditId; writes go through a background thread so the request never
+# waits on them.
+PROMPT_AUDIT_ENABLED = os.getenv("PROMPT_AUDIT_ENABLED", "true").lower() == "true"
+PROMPT_AUDIT_RETENTION_DAYS = int(os.getenv("PROMPT_AUDIT_RETENTION_DAYS", "90"))
+COMPRESSION_LEVEL = 6
+
+prompt_audits_collection = db["prompt_audits"] if db is not None else None
+
+# One writer keeps inserts in submission order and off the event loop
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prompt-audit")
+_lock = threading.Lock()
+_stats = {"queued": 0, "written": 0, "failed": 0, "rawBytes": 0, "storedBytes": 0}
+
+def _compress(text):
+    return zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+
+def _decompress(blob):
+    return zlib.decompress(blob).decode("utf-8") if blob is not None else None
+
+def _write(record, raw_bytes):
+    try:
+        prompt_audits_collection.insert_one(record)
+        stored = len(record["prompt"]) + len(record.get("response") or b"")
+        with _lock:
+            _stats["written"] += 1
+            _stats["rawBytes"] += raw_bytes
+            _stats["storedBytes"] += stored
+    except Exception as e:
+        with _lock:
+            _stats["failed"] += 1
+        print(f"WARNING: Prompt audit {record['_id']} not stored: {e}")
+
+def record_prompt(kind, prompt, response=None, trip_id=None, itinerary_id=None):
+    """
+    Queues a compressed audit record of an LLM call and returns its id for
+    the itinerary's promptAuditId, or None when auditing is off. `response`
+    may be the raw text or the parsed JSON.
+    """
+    if not PROMPT_AUDIT_ENABLED or prompt_audits_collection is None or not prompt:
+        return None
+    if response is not None and not isinstance(response, str):
+        response = json.dumps(response, default=str, ensure_ascii=False)
+
+    now = datetime.now(timezone.utc)
+    record = {
+        "_id": str(uuid.uuid4()),
+        "kind": kind,
+        "tripId": trip_id,
+        "itineraryId": itinerary_id,
+        "prompt": _compress(prompt),
+        "response": _compress(response) if response else None,
+        "createdAt": now,
+        "expiresAt": now + timedelta(days=PROMPT_AUDIT_RETENTION_DAYS)
+    }
+    raw_bytes = len(prompt.encode("utf-8")) + len((response or "").encode("utf-8"))
+    with _lock:
+        _stats["queued"] += 1
+    _executor.submit(_write, record, raw_bytes)
+    return record["_id"]
+
+def get_prompt_audit(audit_id, trip_id=None):
+    """
+    The audit record with prompt and response decompressed, or None.
+    With `trip_id`, only a record written for that trip is returned.
+    Blocking; call it off the event loop.
+    """
+    if prompt_audits_collection is None or not audit_id:
+        return None
+    query = {"_id": audit_id}
+    if trip_id is not None:
+        query["tripId"] = trip_id
+    record = prompt_audits_collection.find_one(query)
+    if record is None:
+        return None
+    record["prompt"] = _decompress(record.get("prompt"))
+    record["response"] = _decompress(record.get("response"))
+    return record
+
+def audit_stats():
+    with _lock:
+        stats = dict(_stats)
+    stats["pending"] = stats["queued"] - stats["written"] - stats["failed"]
+    stats["compressionRatio"] = round(stats["rawBytes"] / stats["storedBytes"], 2) if stats["storedBytes"] else None
+    stats["enabled"] = PROMPT_AUDIT_ENABLED
+    return stats
@@ -1,4 +1,5 @@
 from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -15,6 +16,13 @@ if mongo_uri:
     users_collection = db["users"]
     trips_collection = db["trips"]
     itineraries_collection = db["itineraries"]
+
+    # Async driver for the request path (binds to the running event loop on first use)
+    async_client = AsyncIOMotorClient(mongo_uri, serverSelectionTimeoutMS=5000)
+    async_db = async_client["journey360"]
+    async_users_collection = async_db["users"]
+    async_trips_collection = async_db["trips"]
+    async_itineraries_collection = async_db["itineraries"]
 else:
     # Handle missing config gracefully or let it fail later
     client = None
@@ -22,4 +30,9 @@ else:
     users_collection = None
     trips_collection = None
     itineraries_collection = None
+    async_client = None
+    async_db = None
+    async_users_collection = None
+    async_trips_collection = None
+    async_itineraries_collection = None
     print("Warning: MONGO_URI not found in .env")
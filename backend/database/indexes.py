@@ -0,0 +1,179 @@
+import os
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from bson import ObjectId
+try:
+    from backend.database.db import db
+except ImportError:
+    from database.db import db
+
+ENSURE_INDEXES = os.getenv("ENSURE_INDEXES", "true").lower() == "true"
+
+# Declared indexes per collection. Names are fixed so a changed spec shows up
+# as a conflict instead of a silent second index.
+INDEXES = {
+    "trips": [
+        IndexModel([("trip_id", ASCENDING)], name="trip_id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("trip_id", ASCENDING)], name="user_trip"),
+        # Trailing card fields let /trip/recent be a covered query
+        IndexModel(
+            [("user_id", ASCENDING), ("_id", DESCENDING), ("trip_id", ASCENDING), ("destination", ASCENDING), ("status", ASCENDING)],
+            name="user_recent_cards"
+        ),
+    ],
+    "itineraries": [
+        # One document per generation, so tripId is not unique; the newest
+        # comes first for the lease waiter's createdAt sort
+        IndexModel([("tripId", ASCENDING), ("createdAt", DESCENDING)], name="trip_latest"),
+        IndexModel([("itineraryId", ASCENDING)], name="itinerary_id_unique", unique=True),
+    ],
+    "users": [
+        IndexModel([("uid", ASCENDING)], name="uid_unique", unique=True),
+    ],
+    "jobs": [
+        IndexModel([("jobId", ASCENDING)], name="job_id_unique", unique=True),
+        # Orphan sweep: unfinished jobs with a stale heartbeat
+        IndexModel([("status", ASCENDING), ("heartbeatAt", ASCENDING)], name="status_heartbeat"),
+    ],
+    "geocode_cache": [
+        IndexModel([("expiresAt", ASCENDING)], name="expiresAt_1", expireAfterSeconds=0),
+    ],
+    "prompt_audits": [
+        IndexModel([("tripId", ASCENDING), ("createdAt", DESCENDING)], name="trip_created"),
+        IndexModel([("expiresAt", ASCENDING)], name="expiresAt_1", expireAfterSeconds=0),
+    ],
+}
+
+# Indexes replaced by a declared one under a new name. A changed key spec
+# needs a new name (reusing one fails with IndexKeySpecsConflict); the old
+# index is dropped once its replacement exists.
+RETIRED_INDEXES = {
+    # (user_id, _id) -> user_recent_cards
+    "trips": ["user_recent"],
+}
+
+# Queries on the request path, with placeholder values, checked with explain()
+HOT_QUERIES = [
+    ("trips", {"trip_id": "", "user_id": ""}, None),
+    ("trips", {"user_id": ""}, [("_id", DESCENDING)]),
+    ("trips", {"user_id": "", "_id": {"$lt": ObjectId()}}, [("_id", DESCENDING)]),
+    ("itineraries", {"tripId": ""}, None),
+    ("itineraries", {"tripId": "", "createdAt": {"$gte": 0}}, [("createdAt", DESCENDING)]),
+    ("itineraries", {"itineraryId": ""}, None),
+    ("jobs", {"jobId": ""}, None),
+]
+
+_last_report = {}
+
+def _plan_stages(plan):
+    """
+    All stage names in an explain plan tree.
+    """
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(key), dict):
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return [s for s in stages if s]
+
+def create_indexes():
+    """
+    Creates the declared indexes (a no-op for the ones that already exist).
+    Failures are reported per index and never stop startup: a unique
+    index over existing duplicates, for instance, needs manual cleanup.
+    """
+    present = {}
+    for name, models in INDEXES.items():
+        collection = db[name]
+        for model in models:
+            index_name = model.document["name"]
+            try:
+                collection.create_indexes([model])
+                present.setdefault(name, []).append(index_name)
+            except OperationFailure as e:
+                print(f"WARNING: Could not create index {name}.{index_name}: {e}")
+    return present
+
+def _key_spec(key):
+    # Servers may report directions as floats (1.0); text/2dsphere stay strings
+    return [(field, int(d) if isinstance(d, (int, float)) else d) for field, d in key]
+
+def drop_retired_indexes(present):
+    """
+    Drops retired indexes whose collection now has every declared index.
+    """
+    dropped = {}
+    for name, retired in RETIRED_INDEXES.items():
+        if len(present.get(name, [])) < len(INDEXES.get(name, [])):
+            continue
+        existing = db[name].index_information()
+        for index_name in retired:
+            if index_name not in existing:
+                continue
+            try:
+                db[name].drop_index(index_name)
+                dropped.setdefault(name, []).append(index_name)
+                print(f"DEBUG: Dropped retired index {name}.{index_name}")
+            except OperationFailure as e:
+                print(f"WARNING: Could not drop retired index {name}.{index_name}: {e}")
+    return dropped
+
+def missing_indexes():
+    """
+    Declared indexes that are absent, or present under the declared name
+    with a different key spec (which would not serve the declared queries).
+    """
+    missing = {}
+    for name, models in INDEXES.items():
+        existing = db[name].index_information()
+        absent = []
+        for model in models:
+            index_name = model.document["name"]
+            info = existing.get(index_name)
+            if info is None or _key_spec(info["key"]) != _key_spec(model.document["key"].items()):
+                absent.append(index_name)
+        if absent:
+            missing[name] = absent
+    return missing
+
+def explain_hot_queries():
+    """
+    Winning-plan stages of each hot query; warns on collection scans.
+    """
+    plans = []
+    for name, query, sort in HOT_QUERIES:
+        cursor = db[name].find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        except OperationFailure as e:
+            print(f"WARNING: explain failed for {name} {query}: {e}")
+            continue
+        stages = _plan_stages(plan)
+        plans.append({"collection": name, "query": sorted(query), "sort": sort, "stages": stages})
+        if "COLLSCAN" in stages:
+            print(f"WARNING: Hot query on {name} by {sorted(query)} is a COLLSCAN ({' <- '.join(stages)})")
+    return plans
+
+def ensure_indexes():
+    """
+    Startup hook: create, verify, explain. Returns the report also served
+    at /debug/indexes.
+    """
+    global _last_report
+    if db is None or not ENSURE_INDEXES:
+        return {}
+    report = {"present": create_indexes()}
+    report["dropped"] = drop_retired_indexes(report["present"])
+    report["missing"] = missing_indexes()
+    if report["missing"]:
+        print(f"WARNING: Indexes still missing: {report['missing']}")
+    report["plans"] = explain_hot_queries()
+    _last_report = report
+    print(f"DEBUG: Index check done ({sum(len(v) for v in report['present'].values())} declared indexes present)")
+    return report
+
+def index_report():
+    return _last_report
@@ -0,0 +1,284 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+try:
+    from backend.database.db import async_db
+    from backend.ai.singleflight import WORKER_ID
+except ImportError:
+    from database.db import async_db
+    from ai.singleflight import WORKER_ID
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+EVENT_POLL_S = 1.0
+# Workers touch heartbeatAt on their unfinished jobs this often; a queued or
+# running job not touched for JOB_ORPHAN_AFTER_S belongs to a dead worker
+JOB_HEARTBEAT_S = int(os.getenv("JOB_HEARTBEAT_S", "30"))
+JOB_ORPHAN_AFTER_S = int(os.getenv("JOB_ORPHAN_AFTER_S", "90"))
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+UNFINISHED_STATUSES = ("queued", "running")
+
+class MemoryJobStore:
+    """
+    Keeps job documents in process memory. Used when Mongo is not configured
+    and for local testing.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+
+    async def insert(self, job):
+        self._jobs[job["jobId"]] = dict(job)
+
+    async def update(self, job_id, fields, stage=None):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job.update(fields)
+        if stage:
+            job["stages"] = job.get("stages", []) + [stage]
+
+    async def get(self, job_id):
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def heartbeat(self, worker_id, now):
+        for job in self._jobs.values():
+            if job.get("workerId") == worker_id and job["status"] in UNFINISHED_STATUSES:
+                job["heartbeatAt"] = now
+
+    async def orphans(self, worker_id, before):
+        return [
+            dict(job) for job in self._jobs.values()
+            if job["status"] in UNFINISHED_STATUSES
+            and job.get("workerId") != worker_id
+            and job["heartbeatAt"] < before
+        ]
+
+    async def claim(self, job, worker_id, now):
+        current = self._jobs.get(job["jobId"])
+        if current is None or current["status"] != job["status"] or current.get("workerId") != job.get("workerId"):
+            return False
+        current.update({"workerId": worker_id, "heartbeatAt": now})
+        return True
+
+class MongoJobStore:
+    """
+    Stores job documents (status, progress stages, result) in the jobs collection
+    so any worker can answer status polls.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    async def insert(self, job):
+        await self._collection.insert_one(dict(job))
+
+    async def update(self, job_id, fields, stage=None):
+        update = {"$set": fields}
+        if stage:
+            update["$push"] = {"stages": stage}
+        await self._collection.update_one({"jobId": job_id}, update)
+
+    async def get(self, job_id):
+        return await self._collection.find_one({"jobId": job_id}, {"_id": 0})
+
+    async def heartbeat(self, worker_id, now):
+        await self._collection.update_many(
+            {"workerId": worker_id, "status": {"$in": list(UNFINISHED_STATUSES)}},
+            {"$set": {"heartbeatAt": now}}
+        )
+
+    async def orphans(self, worker_id, before):
+        query = {
+            "status": {"$in": list(UNFINISHED_STATUSES)},
+            "workerId": {"$ne": worker_id},
+            "heartbeatAt": {"$lt": before}
+        }
+        return await self._collection.find(query, {"_id": 0}).to_list(length=None)
+
+    async def claim(self, job, worker_id, now):
+        # Conditional on the owner and status we read, so only one worker
+        # takes over an orphan
+        result = await self._collection.update_one(
+            {"jobId": job["jobId"], "status": job["status"], "workerId": job.get("workerId")},
+            {"$set": {"workerId": worker_id, "heartbeatAt": now}}
+        )
+        return result.modified_count == 1
+
+class LocalJobBackend:
+    """
+    In-process broker: an asyncio queue drained by a fixed pool of worker tasks.
+    Workers start lazily on the first enqueue, on the running event loop.
+    """
+
+    def __init__(self, workers=JOB_WORKERS):
+        self.workers = workers
+        self._queue = None
+        self._tasks = []
+
+    def _ensure_workers(self, run_job):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._tasks = [asyncio.create_task(self._worker(run_job)) for _ in range(self.workers)]
+
+    async def _worker(self, run_job):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await run_job(job_id)
+            except Exception as e:
+                print(f"DEBUG: Job worker error for {job_id}: {e}", flush=True)
+            finally:
+                self._queue.task_done()
+
+    async def submit(self, job_id, run_job):
+        self._ensure_workers(run_job)
+        await self._queue.put(job_id)
+
+    def pending(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+class JobQueue:
+    """
+    Enqueue/run/poll facade. Handlers are registered per job type and receive
+    (job, progress); `await progress(stage)` records a progress stage.
+    """
+
+    def __init__(self, store, backend):
+        self.store = store
+        self.backend = backend
+        self._handlers = {}
+        # job_id -> [Event, subscriber count]; an entry lives while someone subscribes
+        self._changed = {}
+
+    def register(self, job_type, handler):
+        self._handlers[job_type] = handler
+
+    async def enqueue(self, job_type, payload, user_id):
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        now = datetime.now(timezone.utc)
+        job = {
+            "jobId": str(uuid.uuid4()),
+            "type": job_type,
+            "userId": user_id,
+            "tripId": payload.get("trip_id"),
+            # Kept on the document so another worker can rerun an orphaned job
+            "payload": payload,
+            "workerId": WORKER_ID,
+            "heartbeatAt": now,
+            "status": "queued",
+            "stage": "queued",
+            "stages": [{"stage": "queued", "at": now}],
+            "result": None,
+            "error": None,
+            "createdAt": now,
+            "updatedAt": now
+        }
+        await self.store.insert(job)
+        await self.backend.submit(job["jobId"], self._run)
+        return job
+
+    async def _record(self, job_id, fields, stage=None):
+        now = datetime.now(timezone.utc)
+        fields = {**fields, "updatedAt": now}
+        if stage:
+            fields["stage"] = stage
+        await self.store.update(job_id, fields, {"stage": stage, "at": now} if stage else None)
+        entry = self._changed.get(job_id)
+        if entry is not None:
+            entry[0].set()
+
+    async def _run(self, job_id):
+        job = await self.store.get(job_id)
+        handler = self._handlers[job["type"]]
+
+        async def progress(stage):
+            await self._record(job_id, {}, stage)
+
+        await self._record(job_id, {"status": "running"}, "running")
+        try:
+            result = await handler({**job, "payload": job.get("payload") or {}}, progress)
+            await self._record(job_id, {"status": "succeeded", "result": result}, "succeeded")
+        except Exception as e:
+            print(f"DEBUG: Job {job_id} failed: {e}", flush=True)
+            await self._record(job_id, {"status": "failed", "error": str(e)}, "failed")
+
+    async def recover(self):
+        """
+        Takes over jobs left behind by a worker that stopped heartbeating:
+        queued jobs are queued again here, running jobs are marked failed since
+        their handler was cut off part way. Returns {"requeued": n, "failed": n}.
+        """
+        now = datetime.now(timezone.utc)
+        counts = {"requeued": 0, "failed": 0}
+        for job in await self.store.orphans(WORKER_ID, now - timedelta(seconds=JOB_ORPHAN_AFTER_S)):
+            if not await self.store.claim(job, WORKER_ID, now):
+                continue
+            if job["status"] == "queued" and job["type"] in self._handlers:
+                await self.backend.submit(job["jobId"], self._run)
+                counts["requeued"] += 1
+            else:
+                await self._record(job["jobId"], {"status": "failed", "error": "Interrupted by a worker restart"}, "failed")
+                counts["failed"] += 1
+        if counts["requeued"] or counts["failed"]:
+            print(f"DEBUG: Recovered orphaned jobs: {counts}", flush=True)
+        return counts
+
+    async def maintain(self):
+        """
+        Background loop for the startup hook: heartbeat this worker's jobs and
+        recover orphans, once at startup and then every JOB_HEARTBEAT_S.
+        """
+        while True:
+            try:
+                await self.store.heartbeat(WORKER_ID, datetime.now(timezone.utc))
+                await self.recover()
+            except Exception as e:
+                print(f"WARNING: Job recovery failed: {e}", flush=True)
+            await asyncio.sleep(JOB_HEARTBEAT_S)
+
+    async def get(self, job_id):
+        return await self.store.get(job_id)
+
+    async def subscribe(self, job_id):
+        """
+        Async generator yielding the job document every time it changes, until
+        it reaches a terminal status. Local updates wake subscribers at once;
+        the periodic re-read covers jobs running on other workers.
+        """
+        entry = self._changed.get(job_id)
+        if entry is None:
+            entry = self._changed[job_id] = [asyncio.Event(), 0]
+        entry[1] += 1
+        event = entry[0]
+        last_stage_count = -1
+        try:
+            while True:
+                job = await self.store.get(job_id)
+                if job is None:
+                    return
+                if len(job.get("stages", [])) != last_stage_count:
+                    last_stage_count = len(job.get("stages", []))
+                    yield job
+                if job["status"] in TERMINAL_STATUSES:
+                    return
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=EVENT_POLL_S)
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+        finally:
+            # Also runs when a subscriber disconnects before the job ends
+            entry[1] -= 1
+            if not entry[1] and self._changed.get(job_id) is entry:
+                del self._changed[job_id]
+
+def _default_store():
+    if async_db is not None and os.getenv("JOB_STORE", "mongo") == "mongo":
+        return MongoJobStore(async_db["jobs"])
+    return MemoryJobStore()
+
+job_queue = JobQueue(_default_store(), LocalJobBackend())
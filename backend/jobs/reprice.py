@@ -0,0 +1,154 @@
+"""
+Bulk re-pricing of stored itineraries: recomputes every day's totalDayCost and
+the costSummary with the current cost engine settings (e.g. after changing
+TRANSPORT_RATE), streaming the collection in _id order.
+
+Run from the backend directory:
+    python -m jobs.reprice [--batch-size 500] [--run-id NAME] [--restart]
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+try:
+    from backend.database.db import db, itineraries_collection
+    from backend.ai.cost_engine import reprice_batch, TRANSPORT_RATE
+except ImportError:
+    from database.db import db, itineraries_collection
+    from ai.cost_engine import reprice_batch, TRANSPORT_RATE
+
+DEFAULT_BATCH_SIZE = 500
+
+# Only the fields the cost engine reads, plus what is compared before writing
+PROJECTION = {
+    "days.places.estimatedCost": 1,
+    "days.places.category": 1,
+    "days.totalDayCost": 1,
+    "costSummary": 1
+}
+
+def _load_checkpoint(checkpoints, run_id, restart, transport_rate):
+    """
+    The run's checkpoint, created on first use. A run only resumes with the
+    transport rate it started with; anything else would leave the collection
+    priced at two rates.
+    """
+    if restart:
+        checkpoints.delete_one({"_id": run_id})
+    checkpoint = checkpoints.find_one({"_id": run_id})
+    if checkpoint is not None and checkpoint.get("transportRate") != transport_rate:
+        raise RuntimeError(
+            f"Reprice run '{run_id}' was started with transport rate {checkpoint.get('transportRate')}, "
+            f"not {transport_rate}; pass --restart to start over or use another --run-id"
+        )
+    if checkpoint is None:
+        checkpoint = {
+            "_id": run_id,
+            "lastId": None,
+            "processed": 0,
+            "updated": 0,
+            "errors": 0,
+            "transportRate": transport_rate,
+            "startedAt": datetime.now(timezone.utc),
+            "done": False
+        }
+        checkpoints.insert_one(checkpoint)
+    return checkpoint
+
+def _updates_for_batch(docs, transport_rate):
+    """
+    Re-costs a batch in one vectorized pass and returns UpdateOne operations
+    for the documents whose totals changed.
+    """
+    days_per_doc = [doc.get("days", []) for doc in docs]
+    old_day_totals = [[d.get("totalDayCost") for d in days] for days in days_per_doc]
+    summaries = reprice_batch(days_per_doc, transport_rate)
+
+    operations = []
+    for doc, days, old_totals, summary in zip(docs, days_per_doc, old_day_totals, summaries):
+        new_totals = [d["totalDayCost"] for d in days]
+        if new_totals == old_totals and summary == doc.get("costSummary"):
+            continue
+        # Positional $set so the (projected) place lists are never rewritten
+        fields = {f"days.{i}.totalDayCost": total for i, total in enumerate(new_totals)}
+        fields["costSummary"] = summary
+        fields["repricedAt"] = datetime.now(timezone.utc)
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": fields}))
+    return operations
+
+def reprice_itineraries(batch_size=DEFAULT_BATCH_SIZE, run_id="default", restart=False,
+                        transport_rate=TRANSPORT_RATE, log=print):
+    """
+    Streams the itineraries collection in batches, re-costs each batch and
+    writes changes back with unordered bulk writes. Progress is checkpointed
+    after every batch in `reprice_checkpoints`, so an interrupted run resumes
+    from the last written _id. Returns the final checkpoint with throughput.
+    """
+    if itineraries_collection is None:
+        raise RuntimeError("MONGO_URI is not configured")
+
+    checkpoints = db["reprice_checkpoints"]
+    checkpoint = _load_checkpoint(checkpoints, run_id, restart, transport_rate)
+    if checkpoint.get("done"):
+        log(f"Reprice run '{run_id}' already finished; pass --restart to run again")
+        return checkpoint
+
+    query = {"_id": {"$gt": checkpoint["lastId"]}} if checkpoint["lastId"] is not None else {}
+    cursor = itineraries_collection.find(query, PROJECTION).sort("_id", 1).batch_size(batch_size)
+
+    started = time.perf_counter()
+    processed = updated = errors = 0
+    batch = []
+
+    def flush(batch):
+        nonlocal processed, updated, errors
+        operations = _updates_for_batch(batch, transport_rate)
+        written = 0
+        failed = 0
+        if operations:
+            try:
+                result = itineraries_collection.bulk_write(operations, ordered=False)
+                written = result.modified_count
+            except BulkWriteError as e:
+                failed = len(e.details.get("writeErrors", []))
+                written = e.details.get("nModified", 0)
+                log(f"Reprice batch had {failed} write errors")
+        processed += len(batch)
+        updated += written
+        errors += failed
+        checkpoints.update_one({"_id": run_id}, {
+            "$set": {"lastId": batch[-1]["_id"], "updatedAt": datetime.now(timezone.utc)},
+            "$inc": {"processed": len(batch), "updated": written, "errors": failed}
+        })
+        elapsed = time.perf_counter() - started
+        log(f"Repriced {processed} itineraries ({updated} changed) - {processed / elapsed:.0f} docs/s")
+
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    elapsed = time.perf_counter() - started
+    report = {
+        "processed": processed,
+        "updated": updated,
+        "errors": errors,
+        "seconds": round(elapsed, 2),
+        "docsPerSecond": round(processed / elapsed, 1) if elapsed > 0 else None
+    }
+    checkpoints.update_one({"_id": run_id}, {"$set": {"done": True, "lastRun": report}})
+    log(f"Reprice finished: {report}")
+    return checkpoints.find_one({"_id": run_id})
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-price all stored itineraries")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--run-id", default="default")
+    parser.add_argument("--restart", action="store_true")
+    parser.add_argument("--transport-rate", type=float, default=TRANSPORT_RATE)
+    args = parser.parse_args()
+    reprice_itineraries(args.batch_size, args.run_id, args.restart, args.transport_rate)
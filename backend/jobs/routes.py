@@ -0,0 +1,57 @@
+import json
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+try:
+    from backend.database.access import get_owned_trip
+    from backend.ai.itinerary import generate_itinerary_async
+    from backend.ai.singleflight import coalesce_generation
+    from backend.auth.dependencies import get_current_user
+    from backend.jobs.queue import job_queue
+except ImportError:
+    from database.access import get_owned_trip
+    from ai.itinerary import generate_itinerary_async
+    from ai.singleflight import coalesce_generation
+    from auth.dependencies import get_current_user
+    from jobs.queue import job_queue
+
+router = APIRouter()
+
+async def run_itinerary_job(job, progress):
+    trip = await get_owned_trip(job["tripId"], job["userId"])
+    if not trip:
+        raise Exception("Trip not found")
+    itinerary = await coalesce_generation(job["tripId"], lambda: generate_itinerary_async(
+        trip, progress=progress, use_cache=job["payload"].get("use_cache", True)
+    ))
+    return {"itineraryId": itinerary["itineraryId"]}
+
+job_queue.register("itinerary.generate", run_itinerary_job)
+
+async def _get_owned_job(job_id, user):
+    job = await job_queue.get(job_id)
+    if not job or job.get("userId") != user["uid"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/ai/itinerary/jobs", status_code=202)
+async def enqueue_itinerary(trip_id: str, use_cache: bool = True, user=Depends(get_current_user)):
+    trip = await get_owned_trip(trip_id, user["uid"])
+    if not trip:
+        raise HTTPException(status_code=404, detail="Trip not found")
+
+    job = await job_queue.enqueue("itinerary.generate", {"trip_id": trip_id, "use_cache": use_cache}, user["uid"])
+    return {"jobId": job["jobId"], "status": job["status"]}
+
+@router.get("/ai/itinerary/jobs/{job_id}")
+async def get_job(job_id: str, user=Depends(get_current_user)):
+    return await _get_owned_job(job_id, user)
+
+@router.get("/ai/itinerary/jobs/{job_id}/events")
+async def job_events(job_id: str, user=Depends(get_current_user)):
+    await _get_owned_job(job_id, user)
+
+    async def stream():
+        async for job in job_queue.subscribe(job_id):
+            yield f"event: {job['status']}\ndata: {json.dumps(job, default=str)}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
@@ -14,13 +14,36 @@ if str(current_dir) not in sys.path:
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
+import asyncio
 
 try:
     from backend.auth.dependencies import get_current_user
     from backend.database.db import users_collection
+    from backend.services.http_client import get_pool_stats, close_async_clients
+    from backend.services.search_cache import search_cache_stats
+    from backend.services.geocode_cache import geocode_cache_stats
+    from backend.ai.provider_health import provider_health
+    from backend.ai.hedging import hedge_stats
+    from backend.ai.semantic_cache import semantic_cache_stats
+    from backend.services.fx import fx_stats
+    from backend.database.indexes import ensure_indexes, index_report
+    from backend.database.access import start_itinerary_watcher, itinerary_cache_stats, ownership_cache_stats
+    from backend.database.audit import audit_stats
+    from backend.jobs.queue import job_queue
 except ImportError:
     from auth.dependencies import get_current_user
     from database.db import users_collection
+    from services.http_client import get_pool_stats, close_async_clients
+    from services.search_cache import search_cache_stats
+    from services.geocode_cache import geocode_cache_stats
+    from ai.provider_health import provider_health
+    from ai.hedging import hedge_stats
+    from ai.semantic_cache import semantic_cache_stats
+    from services.fx import fx_stats
+    from database.indexes import ensure_indexes, index_report
+    from database.access import start_itinerary_watcher, itinerary_cache_stats, ownership_cache_stats
+    from database.audit import audit_stats
+    from jobs.queue import job_queue
 
 app = FastAPI(title="Journey360 Backend")
 
@@ -31,8 +54,44 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Trip listing pagination cursor
+    expose_headers=["X-Next-Cursor"],
 )
 
+@app.on_event("startup")
+async def provision_indexes():
+    # Sync driver calls; keep them off the event loop
+    try:
+        await asyncio.to_thread(ensure_indexes)
+    except Exception as e:
+        print(f"WARNING: Index provisioning failed: {e}")
+
+@app.on_event("startup")
+async def watch_itineraries():
+    # Cross-worker invalidation of the itinerary cache (ITINERARY_CHANGE_STREAM)
+    app.state.itinerary_watcher = start_itinerary_watcher()
+
+@app.on_event("startup")
+async def recover_jobs():
+    # Heartbeats this worker's jobs and takes over those of dead workers
+    app.state.job_maintenance = asyncio.create_task(job_queue.maintain())
+
+@app.on_event("shutdown")
+async def stop_itinerary_watcher():
+    task = getattr(app.state, "itinerary_watcher", None)
+    if task is not None:
+        task.cancel()
+
+@app.on_event("shutdown")
+async def stop_job_maintenance():
+    task = getattr(app.state, "job_maintenance", None)
+    if task is not None:
+        task.cancel()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await close_async_clients()
+
 @app.get("/")
 def root():
     return {"message": "Journey360 backend is running"}
@@ -47,6 +106,42 @@ def debug_config():
         "PYTHONPATH": sys.path
     }
 
+@app.get("/debug/http-pools")
+def debug_http_pools():
+    return get_pool_stats()
+
+@app.get("/debug/search-cache")
+def debug_search_cache():
+    return search_cache_stats()
+
+@app.get("/debug/geocode-cache")
+def debug_geocode_cache():
+    return geocode_cache_stats()
+
+@app.get("/debug/providers")
+def debug_providers():
+    return {"models": provider_health.snapshot(), "hedging": hedge_stats()}
+
+@app.get("/debug/semantic-cache")
+def debug_semantic_cache():
+    return semantic_cache_stats()
+
+@app.get("/debug/fx")
+def debug_fx():
+    return fx_stats()
+
+@app.get("/debug/indexes")
+def debug_indexes():
+    return index_report()
+
+@app.get("/debug/itinerary-cache")
+def debug_itinerary_cache():
+    return {"itineraries": itinerary_cache_stats(), "ownership": ownership_cache_stats()}
+
+@app.get("/debug/prompt-audit")
+def debug_prompt_audit():
+    return audit_stats()
+
 @app.get("/test-auth")
 def test_auth(user=Depends(get_current_user)):
     # Save user to MongoDB
@@ -68,9 +163,12 @@ def test_auth(user=Depends(get_current_user)):
 try:
     from backend.trips.routes import router as trips_router
     from backend.ai.routes import router as ai_router
+    from backend.jobs.routes import router as jobs_router
 except ImportError:
     from trips.routes import router as trips_router
     from ai.routes import router as ai_router
+    from jobs.routes import router as jobs_router
 
 app.include_router(trips_router, tags=["Trips"])
 app.include_router(ai_router, tags=["AI"])
+app.include_router(jobs_router, tags=["Jobs"])
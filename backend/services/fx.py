@@ -0,0 +1,180 @@
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+try:
+    from backend.services.http_client import http_get
+except ImportError:
+    from services.http_client import http_get
+
+# FX rates as units of each currency per 1 unit of the base currency. The table
+# is loaded once from a local file and then refreshed in the background from a
+# pluggable source; readers always see a complete table because a refresh
+# builds a new one and swaps the module reference.
+RATES_FILE = Path(os.getenv("FX_RATES_FILE", Path(__file__).resolve().parent.parent / "data" / "fx_rates.json"))
+RATES_URL = os.getenv("FX_RATES_URL")
+REFRESH_S = float(os.getenv("FX_REFRESH_S", str(6 * 3600)))
+DEFAULT_CURRENCY = os.getenv("DEFAULT_CURRENCY", "INR").upper()
+
+CURRENCY_SYMBOLS = {
+    "INR": "₹", "USD": "$", "EUR": "€", "GBP": "£", "AED": "AED ", "SGD": "S$",
+    "AUD": "A$", "CAD": "C$", "JPY": "¥", "THB": "฿", "LKR": "Rs ", "NPR": "Rs "
+}
+
+# Prefixes seen in provider price strings -> currency code ("$" is USD)
+_SYMBOL_CODES = {
+    "₹": "INR", "RS": "INR", "RS.": "INR", "$": "USD", "US$": "USD", "€": "EUR", "£": "GBP",
+    "S$": "SGD", "A$": "AUD", "C$": "CAD", "¥": "JPY", "฿": "THB"
+}
+_PRICE = re.compile(r"\s*((?:[^\d\s.,]+\.?)?)\s*(\d[\d,]*(?:\.\d+)?|\.\d+)\s*([A-Za-z]{3})?")
+
+class RateTable:
+    def __init__(self, rates, base="USD", as_of=None, source="local"):
+        self.rates = rates
+        self.base = base
+        self.as_of = as_of
+        self.source = source
+        self.loaded_at = time.time()
+
+    def convert(self, amount, from_code, to_code):
+        if from_code == to_code:
+            return amount
+        src = self.rates.get(from_code)
+        dst = self.rates.get(to_code)
+        if not src or not dst:
+            return None
+        return amount / src * dst
+
+def _table_from_payload(payload, source):
+    """
+    Validates a {"base", "rates", "asOf"} payload. Raises on anything that
+    would make conversions wrong, so a bad refresh never replaces a good table.
+    """
+    rates = {str(code).upper(): float(rate) for code, rate in (payload.get("rates") or {}).items()}
+    base = str(payload.get("base", "USD")).upper()
+    rates.setdefault(base, 1.0)
+    if any(rate <= 0 for rate in rates.values()):
+        raise ValueError("FX rates must be positive")
+    if DEFAULT_CURRENCY not in rates:
+        raise ValueError(f"FX table has no rate for {DEFAULT_CURRENCY}")
+    return RateTable(rates, base, payload.get("asOf") or payload.get("time_last_update_utc"), source)
+
+def file_source():
+    with open(RATES_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+def url_source():
+    # Any endpoint returning {"base"/"base_code", "rates": {...}}
+    response = http_get("fx", RATES_URL, timeout=10)
+    response.raise_for_status()
+    payload = response.json()
+    payload.setdefault("base", payload.get("base_code", "USD"))
+    return payload
+
+_source = url_source if RATES_URL else file_source
+_table = _table_from_payload(file_source(), "local")
+_refresher = None
+_refresher_lock = threading.Lock()
+_counters = {"refreshes": 0, "refresh_errors": 0}
+
+def set_rate_source(source):
+    """
+    Plugs in a different rate source: a callable returning the same payload
+    as the local file. Takes effect on the next refresh.
+    """
+    global _source
+    _source = source
+
+def refresh_rates():
+    global _table
+    try:
+        name = getattr(_source, "__name__", "custom")
+        _table = _table_from_payload(_source(), name)
+        _counters["refreshes"] += 1
+        return True
+    except Exception as e:
+        _counters["refresh_errors"] += 1
+        print(f"DEBUG: FX refresh failed, keeping rates from {_table.as_of}: {e}")
+        return False
+
+def _refresh_loop():
+    while True:
+        refresh_rates()
+        time.sleep(REFRESH_S)
+
+def _ensure_refresher():
+    # Started lazily by the first conversion, like the job workers
+    global _refresher
+    if _refresher is not None:
+        return
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = threading.Thread(target=_refresh_loop, name="fx-refresh", daemon=True)
+            _refresher.start()
+
+def current_rates():
+    _ensure_refresher()
+    return _table
+
+def supported_currency(code):
+    return str(code or "").upper() in _table.rates
+
+def currency_symbol(code):
+    code = str(code or "").upper()
+    return CURRENCY_SYMBOLS.get(code, f"{code} ")
+
+def trip_currency(trip):
+    """
+    (code, symbol) the trip's itinerary is priced in: the trip's own currency
+    when the rate table supports it, otherwise DEFAULT_CURRENCY.
+    """
+    code = str(trip.get("currency") or DEFAULT_CURRENCY).upper()
+    if not supported_currency(code):
+        code = DEFAULT_CURRENCY
+    return code, currency_symbol(code)
+
+def convert(amount, from_code, to_code):
+    return current_rates().convert(amount, from_code.upper(), to_code.upper())
+
+def normalize_price(raw, target_currency=DEFAULT_CURRENCY, source_currency=DEFAULT_CURRENCY):
+    """
+    Amount of a provider price in `target_currency`, or None when the price
+    cannot be read. The currency comes from the string ("$35", "₹3,500",
+    "35 EUR"); plain numbers are in `source_currency`.
+    "$35" -> 2905.0 (INR at 83)
+    """
+    table = current_rates()
+    target_currency = target_currency.upper()
+    if isinstance(raw, (int, float)) and not isinstance(raw, bool):
+        amount, code = float(raw), source_currency.upper()
+    else:
+        match = _PRICE.search(str(raw or ""))
+        if not match:
+            return None
+        prefix, number, suffix = match.groups()
+        amount = float(number.replace(",", ""))
+        if suffix and suffix.upper() in table.rates:
+            code = suffix.upper()
+        elif prefix:
+            code = _SYMBOL_CODES.get(prefix.upper()) or prefix.upper()
+        else:
+            code = source_currency.upper()
+    value = table.convert(amount, code, target_currency)
+    return round(value, 2) if value is not None else None
+
+def format_price(amount, currency=DEFAULT_CURRENCY):
+    # Whole units except for small amounts, where cents matter
+    text = f"{amount:.0f}" if amount >= 10 or float(amount).is_integer() else f"{amount:.2f}"
+    return f"{currency_symbol(currency)}{text}"
+
+def fx_stats():
+    return {
+        "base": _table.base,
+        "asOf": _table.as_of,
+        "source": _table.source,
+        "currencies": sorted(_table.rates),
+        "ageSeconds": round(time.time() - _table.loaded_at),
+        **_counters
+    }
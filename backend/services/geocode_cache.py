@@ -0,0 +1,149 @@
+import re
+import threading
+import unicodedata
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+try:
+    from backend.database.db import db
+    from backend.utils.cache import TTLCache
+except ImportError:
+    from database.db import db
+    from utils.cache import TTLCache
+
+POSITIVE_TTL_S = 30 * 24 * 3600
+NEGATIVE_TTL_S = 10 * 60
+
+# Hardcoded fallbacks for stability (especially during DNS issues)
+SEED_COORDINATES = {
+    "Chennai": (13.0827, 80.2707),
+    "Kerala": (10.8505, 76.2711),
+    "Delhi": (28.6139, 77.2090),
+    "Mumbai": (19.0760, 72.8777),
+    "Bengaluru": (12.9716, 77.5946),
+    "Bangalore": (12.9716, 77.5946),
+    "Tirupati": (13.6288, 79.4192)
+}
+
+# Returned by lookup_geocode when neither tier knows the place
+MISS = object()
+
+_memory = TTLCache(maxsize=4096, ttl=POSITIVE_TTL_S)
+# Seeded coordinates live outside the LRU so eviction can never drop them
+_seeded = {}
+# Its expiresAt TTL index is declared in database/indexes.py
+_collection = db["geocode_cache"] if db is not None else None
+# key -> [lock, holders]; an entry lives only while a lookup holds or waits on it
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_key(place_name):
+    """
+    Canonical cache key: unicode-normalized, case-folded, punctuation dropped,
+    whitespace collapsed. "St. Paul's  Cathedral" -> "st pauls cathedral".
+    """
+    text = unicodedata.normalize("NFKC", str(place_name)).casefold()
+    text = _PUNCTUATION.sub("", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+@contextmanager
+def key_lock(place_name):
+    """
+    Per-key lock so concurrent cold lookups for one place share a single
+    network call instead of each hitting the geocoder. The lock is dropped
+    when its last holder leaves, so the table only holds in-flight keys.
+    """
+    key = normalize_key(place_name)
+    with _key_locks_guard:
+        entry = _key_locks.get(key)
+        if entry is None:
+            entry = _key_locks[key] = [threading.Lock(), 0]
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _key_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _key_locks[key]
+
+def seed_geocodes(mapping):
+    """
+    Pre-seeds known coordinates. Seeded entries are checked before both
+    tiers, never expire or get evicted, and are not written to the
+    persistent store.
+    """
+    for name, coords in mapping.items():
+        _seeded[normalize_key(name)] = tuple(coords)
+
+def lookup_geocode(place_name):
+    """
+    Returns cached (lat, lng), (None, None) for a cached negative result,
+    or MISS when neither tier has the place.
+    """
+    key = normalize_key(place_name)
+    coords = _seeded.get(key)
+    if coords is not None:
+        return coords
+    coords = _memory.get(key, MISS)
+    if coords is not MISS:
+        return coords
+
+    if _collection is None:
+        return MISS
+    try:
+        doc = _collection.find_one({"_id": key})
+    except Exception as e:
+        print(f"DEBUG: Geocode cache read error: {e}")
+        return MISS
+    if not doc:
+        return MISS
+
+    # Mongo's TTL monitor only runs once a minute, so check expiry ourselves
+    expires_at = doc["expiresAt"]
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+    if remaining <= 0:
+        return MISS
+
+    coords = (doc["lat"], doc["lng"]) if doc.get("found") else (None, None)
+    _memory.set(key, coords, ttl=remaining)
+    return coords
+
+def store_geocode(place_name, lat, lng):
+    """
+    Writes a lookup result to both tiers. A None latitude is cached as a
+    negative result with the short NEGATIVE_TTL_S.
+    """
+    key = normalize_key(place_name)
+    if key in _seeded:
+        return
+    found = lat is not None and lng is not None
+    ttl = POSITIVE_TTL_S if found else NEGATIVE_TTL_S
+    coords = (lat, lng) if found else (None, None)
+    _memory.set(key, coords, ttl=ttl)
+
+    if _collection is None:
+        return
+    try:
+        _collection.update_one(
+            {"_id": key},
+            {"$set": {
+                "lat": lat,
+                "lng": lng,
+                "found": found,
+                "expiresAt": datetime.now(timezone.utc) + timedelta(seconds=ttl)
+            }},
+            upsert=True
+        )
+    except Exception as e:
+        print(f"DEBUG: Geocode cache write error: {e}")
+
+def geocode_cache_stats():
+    return _memory.stats()
+
+seed_geocodes(SEED_COORDINATES)
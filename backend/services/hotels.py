@@ -1,10 +1,13 @@
 import os
-import requests
 from dotenv import load_dotenv
 try:
     from backend.services.places import get_coordinates
+    from backend.services.http_client import http_get
+    from backend.services.search_cache import cached_search, search_key, stay_bucket
 except ImportError:
     from services.places import get_coordinates
+    from services.http_client import http_get
+    from services.search_cache import cached_search, search_key, stay_bucket
 
 load_dotenv()
 
@@ -12,15 +15,13 @@ def search_hotels(location, check_in_date=None, check_out_date=None):
     """
     Search for hotels using SerpAPI's Google Hotels engine.
     Returns a list of hotel dictionaries.
+    Results are cached per destination and stay bucket (check-in week and
+    nights, see stay_bucket), stale-while-revalidate.
     """
-    api_key = os.getenv("SERPAPI_API_KEY")
-    if not api_key:
-        print("Warning: SERPAPI_API_KEY not found in .env")
-        return []
-
-    url = "https://serpapi.com/search"
     from datetime import datetime, timedelta
     
+    key = search_key("hotels", location, *stay_bucket(check_in_date, check_out_date))
+
     # SerpAPI's google_hotels engine MANDATES check_in_date and check_out_date
     if not check_in_date or not check_out_date:
         now = datetime.now()
@@ -30,6 +31,16 @@ def search_hotels(location, check_in_date=None, check_out_date=None):
         if not check_out_date:
             check_out_date = (now + timedelta(days=9)).strftime("%Y-%m-%d")
 
+    return cached_search(key, lambda: _fetch_hotels(location, check_in_date, check_out_date))
+
+def _fetch_hotels(location, check_in_date, check_out_date):
+    api_key = os.getenv("SERPAPI_API_KEY")
+    if not api_key:
+        print("Warning: SERPAPI_API_KEY not found in .env")
+        return []
+
+    url = "https://serpapi.com/search"
+
     params = {
         "engine": "google_hotels",
         "q": f"Hotels in {location}",
@@ -43,7 +54,7 @@ def search_hotels(location, check_in_date=None, check_out_date=None):
 
     try:
         print(f"DEBUG: Searching hotels in {location} ({check_in_date} to {check_out_date})...", flush=True)
-        response = requests.get(url, params=params, timeout=25)
+        response = http_get("serpapi", url, params=params, timeout=25)
         response.raise_for_status()
         data = response.json()
         
@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import weakref
+import requests
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Per-provider pool sizing and retry policy.
+# Retries only cover transport failures and the listed statuses; OpenRouter has
+# none because call_llm already cascades across models.
+PROVIDERS = {
+    "openrouteservice": {"pool_maxsize": 20, "retries": 2, "backoff": 0.5, "status_forcelist": (429, 502, 503, 504)},
+    "serpapi": {"pool_maxsize": 10, "retries": 1, "backoff": 1.0, "status_forcelist": (502, 503, 504)},
+    "openweathermap": {"pool_maxsize": 10, "retries": 2, "backoff": 0.3, "status_forcelist": (429, 502, 503, 504)},
+    "openrouter": {"pool_maxsize": 50, "retries": 0, "backoff": 0, "status_forcelist": ()},
+    "fx": {"pool_maxsize": 2, "retries": 2, "backoff": 1.0, "status_forcelist": (429, 502, 503, 504)},
+}
+
+# Async client limits (OpenRouter is the only async provider today)
+ASYNC_LIMITS = httpx.Limits(max_connections=500, max_keepalive_connections=100, keepalive_expiry=30)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+# Per provider: requests sent, and new connections opened for them (misses)
+_async_stats = {}
+
+# Event loop the sync wrappers (call_llm, generate_itinerary, ...) run their
+# coroutines on. asyncio.run would build a new loop, and with it a new
+# client and connection pool, on every call.
+_background_loop = None
+_background_lock = threading.Lock()
+
+def _build_session(provider):
+    policy = PROVIDERS[provider]
+    retry = Retry(
+        total=policy["retries"],
+        backoff_factor=policy["backoff"],
+        status_forcelist=policy["status_forcelist"],
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=policy["pool_maxsize"], max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session(provider):
+    """
+    Returns the shared keep-alive session for a provider, creating it on first use.
+    """
+    session = _sessions.get(provider)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(provider)
+            if session is None:
+                session = _build_session(provider)
+                _sessions[provider] = session
+    return session
+
+def http_get(provider, url, **kwargs):
+    return get_session(provider).get(url, **kwargs)
+
+def http_post(provider, url, **kwargs):
+    return get_session(provider).post(url, **kwargs)
+
+def _counting_hooks(provider):
+    """
+    Event hooks counting answered requests and, through httpcore's trace
+    extension, the connections opened for them. Same hit/miss meaning as
+    the requests pools: a hit reused a kept-alive connection.
+    """
+    counters = _async_stats.setdefault(provider, {"requests": 0, "misses": 0})
+
+    async def trace(event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            counters["misses"] += 1
+
+    async def on_request(request):
+        request.extensions["trace"] = trace
+
+    async def on_response(response):
+        counters["requests"] += 1
+
+    return {"request": [on_request], "response": [on_response]}
+
+def get_async_client(provider):
+    """
+    Returns a pooled httpx.AsyncClient for the provider on the running event loop.
+    Clients are per loop because httpx connections cannot cross loops.
+    """
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.get(loop)
+    if clients is None:
+        clients = {}
+        _async_clients[loop] = clients
+    client = clients.get(provider)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=60, limits=ASYNC_LIMITS,
+            event_hooks=_counting_hooks(provider)
+        )
+        clients[provider] = client
+    return client
+
+async def close_async_clients():
+    """
+    Closes the clients of the running loop (app shutdown).
+    """
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+def _get_background_loop():
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="sync-bridge", daemon=True).start()
+            _background_loop = loop
+    return _background_loop
+
+def run_sync(coro):
+    """
+    Runs a coroutine from synchronous code on the shared background loop and
+    returns its result, so sync callers reuse one set of pooled clients.
+    Must not be called from a coroutine.
+    """
+    loop = _get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is not None:
+        coro.close()
+        raise RuntimeError("run_sync() called from a running event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+def get_pool_stats():
+    """
+    Connection-pool counters per provider and host.
+    A hit is a request served on a kept-alive connection, a miss opened a new one.
+    """
+    stats = {}
+    for provider, session in list(_sessions.items()):
+        hosts = {}
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                misses = pool.num_connections
+                hits = max(pool.num_requests - pool.num_connections, 0)
+                hosts[pool.host] = {"requests": pool.num_requests, "hits": hits, "misses": misses}
+        stats[provider] = {
+            "hits": sum(h["hits"] for h in hosts.values()),
+            "misses": sum(h["misses"] for h in hosts.values()),
+            "hosts": hosts
+        }
+    for provider, counters in list(_async_stats.items()):
+        requests_sent, misses = counters["requests"], counters["misses"]
+        stats.setdefault(provider, {"hits": 0, "misses": 0, "hosts": {}})["async"] = {
+            "requests": requests_sent,
+            "hits": max(requests_sent - misses, 0),
+            "misses": misses
+        }
+    return stats
@@ -1,43 +1,48 @@
-import requests
 import os
 from dotenv import load_dotenv
+try:
+    from backend.services.http_client import http_get
+    from backend.services.geocode_cache import lookup_geocode, store_geocode, key_lock, MISS
+except ImportError:
+    from services.http_client import http_get
+    from services.geocode_cache import lookup_geocode, store_geocode, key_lock, MISS
 
 load_dotenv()
 
 ORS_API_KEY = os.getenv("OPENROUTE_API_KEY")
 
 def get_coordinates(place_name):
-    # Hardcoded fallbacks for stability (especially during DNS issues)
-    fallbacks = {
-        "Chennai": (13.0827, 80.2707),
-        "Kerala": (10.8505, 76.2711),
-        "Delhi": (28.6139, 77.2090),
-        "Mumbai": (19.0760, 72.8777),
-        "Bengaluru": (12.9716, 77.5946),
-        "Bangalore": (12.9716, 77.5946),
-        "Tirupati": (13.6288, 79.4192)
-    }
-    
-    if place_name in fallbacks:
-        return fallbacks[place_name]
+    # Seeded fallbacks and previous lookups are served from the geocode cache
+    cached = lookup_geocode(place_name)
+    if cached is not MISS:
+        return cached
 
-    url = "https://api.openrouteservice.org/geocode/search"
-    params = {
-        "text": place_name,
-        "api_key": ORS_API_KEY,
-        "size": 1
-    }
-    try:
-        # Increase to 30s for slower regional connections
-        resp = requests.get(url, params=params, timeout=30)
-        if resp.status_code == 200:
-            data = resp.json()
-            if data['features']:
-                feature = data['features'][0]
-                coords = feature['geometry']['coordinates']
-                return coords[1], coords[0] # lat, lon
-    except Exception as e:
-        print(f"DEBUG: Geocoding Error: {e}")
+    with key_lock(place_name):
+        # Another thread may have resolved it while we waited
+        cached = lookup_geocode(place_name)
+        if cached is not MISS:
+            return cached
+
+        url = "https://api.openrouteservice.org/geocode/search"
+        params = {
+            "text": place_name,
+            "api_key": ORS_API_KEY,
+            "size": 1
+        }
+        try:
+            # Increase to 30s for slower regional connections
+            resp = http_get("openrouteservice", url, params=params, timeout=30)
+            if resp.status_code == 200:
+                data = resp.json()
+                if data['features']:
+                    feature = data['features'][0]
+                    coords = feature['geometry']['coordinates']
+                    store_geocode(place_name, coords[1], coords[0])
+                    return coords[1], coords[0] # lat, lon
+                # Definitive "not found": remember it briefly
+                store_geocode(place_name, None, None)
+        except Exception as e:
+            print(f"DEBUG: Geocoding Error: {e}")
     
     return None, None
 
@@ -58,7 +63,7 @@ def get_places(destination, interest):
     }
     try:
         # 30s for reliability
-        resp = requests.get(url, params=params, timeout=30)
+        resp = http_get("openrouteservice", url, params=params, timeout=30)
         if resp.status_code == 200:
             data = resp.json()
             places = []
@@ -1,6 +1,11 @@
 import os
-import requests
 from dotenv import load_dotenv
+try:
+    from backend.services.http_client import http_get
+    from backend.services.search_cache import cached_search, search_key
+except ImportError:
+    from services.http_client import http_get
+    from services.search_cache import cached_search, search_key
 
 load_dotenv()
 
@@ -8,7 +13,12 @@ def search_restaurants(location):
     """
     Search for restaurants using SerpAPI's Google Local engine.
     Returns a list of restaurant dictionaries.
+    Results are cached per destination (stale-while-revalidate). The query
+    has no dates, so the key has no date bucket; the TTLs bound freshness.
     """
+    return cached_search(search_key("restaurants", location), lambda: _fetch_restaurants(location))
+
+def _fetch_restaurants(location):
     api_key = os.getenv("SERPAPI_API_KEY")
     if not api_key:
         print("Warning: SERPAPI_API_KEY not found in .env")
@@ -24,7 +34,7 @@ def search_restaurants(location):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=25)
+        response = http_get("serpapi", url, params=params, timeout=25)
         response.raise_for_status()
         data = response.json()
         
@@ -0,0 +1,95 @@
+import threading
+import time
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from backend.services.geocode_cache import normalize_key
+    from backend.utils.cache import TTLCache
+except ImportError:
+    from services.geocode_cache import normalize_key
+    from utils.cache import TTLCache
+
+# Results younger than FRESH_TTL_S are served as-is; up to STALE_TTL_S they are
+# served immediately while a background refresh fetches a new copy.
+FRESH_TTL_S = 3600
+STALE_TTL_S = 24 * 3600
+
+_cache = TTLCache(maxsize=512, ttl=STALE_TTL_S)
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search-refresh")
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+_counters_lock = threading.Lock()
+_counters = {"stale_served": 0, "refreshes": 0, "refresh_errors": 0}
+
+def _count(name):
+    # Bumped from request threads and the refresh executor alike
+    with _counters_lock:
+        _counters[name] += 1
+
+def search_key(namespace, destination, *date_bucket):
+    """
+    Cache key for a provider search: namespace, normalized destination and
+    the date bucket the results depend on (e.g. check-in/check-out).
+    """
+    parts = [namespace, normalize_key(destination)] + [str(d) for d in date_bucket if d]
+    return "|".join(parts)
+
+def stay_bucket(check_in=None, check_out=None):
+    """
+    Date bucket for hotel searches: ISO week of check-in plus the number of
+    nights. Stays in the same week with the same length share results.
+    Without explicit dates the search uses a rolling default stay, so it
+    gets one shared "undated" bucket instead of a key that changes daily.
+    ("2026-10-20", "2026-10-22") -> ("2026-W43", "2n"), (None, None) -> ("undated",)
+    """
+    try:
+        start, end = date.fromisoformat(str(check_in)[:10]), date.fromisoformat(str(check_out)[:10])
+    except ValueError:
+        return ("undated",)
+    year, week, _ = start.isocalendar()
+    return (f"{year}-W{week:02d}", f"{max((end - start).days, 1)}n")
+
+def _refresh(key, fetch):
+    try:
+        value = fetch()
+        if value:
+            _cache.set(key, value)
+        _count("refreshes")
+    except Exception as e:
+        _count("refresh_errors")
+        print(f"DEBUG: Search cache refresh failed for {key}: {e}")
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+def _schedule_refresh(key, fetch):
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    _refresh_executor.submit(_refresh, key, fetch)
+
+def cached_search(key, fetch, fresh_ttl=FRESH_TTL_S):
+    """
+    Stale-while-revalidate lookup. `fetch` is only called inline on a miss;
+    empty results (provider errors, missing keys) are never cached.
+    """
+    value = _cache.get(key)
+    if value is not None:
+        entry = _cache.peek(key)
+        if entry is not None and time.monotonic() - entry[1] >= fresh_ttl:
+            _count("stale_served")
+            _schedule_refresh(key, fetch)
+        return value
+
+    value = fetch()
+    if value:
+        _cache.set(key, value)
+    return value
+
+def search_cache_stats():
+    with _counters_lock:
+        counters = dict(_counters)
+    with _refreshing_lock:
+        refreshing = len(_refreshing)
+    return {**_cache.stats(), **counters, "refreshing": refreshing}
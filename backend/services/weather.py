@@ -1,6 +1,9 @@
 import os
-import requests
 from dotenv import load_dotenv
+try:
+    from backend.services.http_client import http_get
+except ImportError:
+    from services.http_client import http_get
 
 load_dotenv()
 
@@ -11,7 +14,7 @@ def get_weather(city):
 
     url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
     try:
-        response = requests.get(url, timeout=5)
+        response = http_get("openweathermap", url, timeout=5)
         if response.status_code == 200:
             return response.json()
     except Exception as e:
@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+# Same search path main.py sets up: the project root for `backend.*` imports
+# and the backend dir for the local fallbacks
+backend_dir = Path(__file__).resolve().parent.parent
+for path in (backend_dir.parent, backend_dir):
+    if str(path) not in sys.path:
+        sys.path.append(str(path))
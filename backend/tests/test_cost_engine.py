@@ -0,0 +1,35 @@
+import copy
+import random
+from backend.ai.cost_engine import calculate_costs, parse_cost, parse_costs, reprice_batch
+
+def test_ranges_cost_their_lower_bound():
+    assert parse_cost("₹500-800") == 500.0
+    assert parse_cost("₹1,200 - ₹1,500") == 1200.0
+    assert parse_costs(["₹500-800", "1,200 INR"]).tolist() == [500.0, 1200.0]
+
+def test_rupee_abbreviation_dot_is_not_a_decimal_point():
+    raws = ["Rs.500", "Rs. 500", "Rs.2,999", "Rs.2,999 per night", ".75"]
+    expected = [500.0, 500.0, 2999.0, 2999.0, 0.75]
+    assert [parse_cost(raw) for raw in raws] == expected
+    assert parse_costs(raws).tolist() == expected
+
+def test_negative_costs_are_rejected():
+    raws = ["-500", "₹-1,200", -300, -2.5, float("nan"), "Free", None, 750]
+    assert [parse_cost(raw) for raw in raws] == [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 750.0]
+    assert parse_costs(raws).tolist() == [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 750.0]
+
+def test_single_itinerary_matches_batch():
+    rng = random.Random(3)
+    costs = [120, 99.5, "₹1,250", "$35.50", "₹500-800", "-200", -40, None, "Free", "2000 INR", "Rs.2,999 per night"]
+    categories = ["food", "Hotel", "attraction", None, "Museum", "hotel"]
+    for _ in range(50):
+        days = [
+            {"dayNumber": d, "places": [
+                {"estimatedCost": rng.choice(costs), "category": rng.choice(categories)}
+                for _ in range(rng.randint(0, 7))
+            ]}
+            for d in range(1, rng.randint(1, 9))
+        ]
+        single, batch = copy.deepcopy(days), copy.deepcopy(days)
+        assert calculate_costs(single) == reprice_batch([batch])[0]
+        assert [d["totalDayCost"] for d in single] == [d["totalDayCost"] for d in batch]
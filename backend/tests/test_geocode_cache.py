@@ -0,0 +1,40 @@
+import threading
+import time
+from backend.services import geocode_cache
+
+def test_key_locks_are_shared_while_in_flight_and_dropped_after():
+    inside = []
+    peak = []
+    start = threading.Barrier(8)
+
+    def lookup(name):
+        start.wait()
+        with geocode_cache.key_lock(name):
+            inside.append(name)
+            peak.append(len(inside))
+            time.sleep(0.01)
+            inside.remove(name)
+
+    # Spellings of one place normalize to the same key
+    names = ["St. Paul's Cathedral", "st pauls  cathedral"] * 4
+    threads = [threading.Thread(target=lookup, args=(n,)) for n in names]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert max(peak) == 1
+    assert geocode_cache._key_locks == {}
+
+def test_distinct_places_leave_no_locks_behind():
+    for i in range(100):
+        with geocode_cache.key_lock(f"Place {i}"):
+            pass
+    assert geocode_cache._key_locks == {}
+
+def test_seeded_city_survives_lru_eviction(monkeypatch):
+    monkeypatch.setattr(geocode_cache, "_collection", None)
+    for i in range(geocode_cache._memory.maxsize + 10):
+        geocode_cache.store_geocode(f"Filler {i}", 1.0, 2.0)
+    geocode_cache.store_geocode("Chennai", 0.0, 0.0)
+    assert geocode_cache.lookup_geocode("chennai") == geocode_cache.SEED_COORDINATES["Chennai"]
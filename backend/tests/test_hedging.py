@@ -0,0 +1,53 @@
+import asyncio
+from backend.ai import hedging
+from backend.ai import itinerary
+
+def test_request_slots_cap_concurrent_attempts_across_hedged_calls(monkeypatch):
+    monkeypatch.setattr(hedging, "hedge_threshold", lambda: 0.01)
+    monkeypatch.setattr(hedging, "SLOT_POLL_S", 0.01)
+    running = []
+    peak = []
+
+    async def run_attempt(model, first_byte):
+        running.append(model)
+        peak.append(len(running))
+        # Never sends a first byte, so every call wants to hedge
+        await asyncio.sleep(0.05)
+        running.remove(model)
+        return {"days": [model]}
+
+    async def scenario():
+        slots = asyncio.Semaphore(3)
+        calls = [
+            hedging.hedged_call(["a", "b", "c"], run_attempt, max_inflight=2, log=lambda msg: None, slots=slots)
+            for _ in range(5)
+        ]
+        return await asyncio.gather(*calls)
+
+    results = asyncio.run(scenario())
+    assert len(results) == 5
+    assert max(peak) == 3
+
+def test_hedged_mode_keeps_the_retry_rounds(monkeypatch):
+    calls = []
+
+    async def hedged_call(models, run_attempt, log=print, slots=None):
+        calls.append(slots)
+        if len(calls) < 3:
+            raise Exception("All hedged attempts failed")
+        return "model-a", {"days": [{"dayNumber": 1}]}
+
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setenv("MOCK_AI", "false")
+    monkeypatch.setenv("OFFLINE_MODE", "false")
+    monkeypatch.setattr(itinerary, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(itinerary, "hedged_call", hedged_call)
+    monkeypatch.setattr(itinerary, "candidate_models", lambda trip: ["model-a", "model-b"])
+    monkeypatch.setattr(itinerary.asyncio, "sleep", no_sleep)
+
+    slots = object()
+    parsed = asyncio.run(itinerary.call_llm_async("plan", {"days": 1}, slots=slots))
+    assert parsed["_used_model"] == "model-a"
+    assert calls == [slots, slots, slots]
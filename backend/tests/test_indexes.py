@@ -0,0 +1,42 @@
+from backend.database import indexes
+
+class FakeCollection:
+    def __init__(self, info):
+        self.info = info
+        self.dropped = []
+
+    def index_information(self):
+        return self.info
+
+    def drop_index(self, name):
+        self.dropped.append(name)
+        del self.info[name]
+
+def _info(models):
+    return {m.document["name"]: {"key": list(m.document["key"].items())} for m in models}
+
+def _fake_db(monkeypatch, trips_info):
+    collections = {name: FakeCollection(_info(models)) for name, models in indexes.INDEXES.items()}
+    collections["trips"] = FakeCollection(trips_info)
+    monkeypatch.setattr(indexes, "db", collections)
+    return collections
+
+def test_changed_key_spec_under_declared_name_is_reported_missing(monkeypatch):
+    trips_info = _info(indexes.INDEXES["trips"])
+    trips_info["user_recent_cards"] = {"key": [("user_id", 1), ("_id", -1.0)]}
+    _fake_db(monkeypatch, trips_info)
+    assert indexes.missing_indexes() == {"trips": ["user_recent_cards"]}
+
+def test_matching_indexes_are_not_missing(monkeypatch):
+    _fake_db(monkeypatch, _info(indexes.INDEXES["trips"]))
+    assert indexes.missing_indexes() == {}
+
+def test_retired_index_dropped_once_replacement_exists(monkeypatch):
+    trips_info = _info(indexes.INDEXES["trips"])
+    trips_info["user_recent"] = {"key": [("user_id", 1), ("_id", -1)]}
+    collections = _fake_db(monkeypatch, trips_info)
+    present = {"trips": [m.document["name"] for m in indexes.INDEXES["trips"]]}
+
+    assert indexes.drop_retired_indexes({"trips": present["trips"][:-1]}) == {}
+    assert indexes.drop_retired_indexes(present) == {"trips": ["user_recent"]}
+    assert collections["trips"].dropped == ["user_recent"]
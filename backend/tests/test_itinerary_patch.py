@@ -0,0 +1,25 @@
+from backend.ai.itinerary_patch import apply_itinerary_patch
+from backend.ai.cost_engine import calculate_costs
+
+def _itinerary():
+    hotel = {"name": "Old Palace", "category": "hotel", "timeSlot": "evening", "estimatedCost": 9000}
+    lunch = {"name": "Cafe", "category": "food", "timeSlot": "lunch", "estimatedCost": 500}
+    return {
+        "days": [{"dayNumber": n, "places": [dict(lunch, name=f"Cafe {n}"), dict(hotel)]} for n in (1, 2)],
+        "topHotels": [
+            {"name": "Old Palace", "price": "₹9,000"},
+            {"name": "Budget Inn", "price": "₹2,500"},
+            {"name": "Unpriced Lodge"}
+        ]
+    }
+
+def test_hotel_switch_takes_the_new_hotels_rate():
+    days, _, affected, applied, errors = apply_itinerary_patch(_itinerary(), [{"op": "hotel", "name": "budget inn"}])
+    assert (applied, errors, affected) == (1, [], {1, 2})
+    assert [p["estimatedCost"] for d in days for p in d["places"] if p["category"] == "hotel"] == [2500, 2500]
+    assert calculate_costs(days)["stay"] == 5000
+
+def test_hotel_switch_without_a_price_clears_the_old_rate():
+    days, _, _, applied, _ = apply_itinerary_patch(_itinerary(), [{"op": "hotel", "name": "Unpriced Lodge"}])
+    assert applied == 1
+    assert calculate_costs(days)["stay"] == 0
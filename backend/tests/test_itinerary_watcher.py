@@ -0,0 +1,58 @@
+import asyncio
+from backend.database import access
+from backend.utils import spatial
+
+class _Stream:
+    resume_token = None
+
+    def __init__(self, changes):
+        self._changes = changes
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._changes:
+            # Stop the watcher once the scripted changes are consumed
+            raise asyncio.CancelledError()
+        return self._changes.pop(0)
+
+class _Collection:
+    def __init__(self, changes):
+        self._changes = changes
+
+    def watch(self, pipeline, **kwargs):
+        return _Stream(self._changes)
+
+def _watch(monkeypatch, changes):
+    monkeypatch.setattr(access, "async_itineraries_collection", _Collection(changes))
+    try:
+        asyncio.run(access.watch_itinerary_changes())
+    except asyncio.CancelledError:
+        pass
+
+def _cache(trip_id):
+    access._remember_itinerary(trip_id, {"tripId": trip_id, "days": []}, access._itinerary_epoch)
+    spatial._indexes.set(trip_id, object())
+
+def test_update_drops_the_trips_spatial_index(monkeypatch):
+    _cache("t1")
+    _cache("t2")
+    _watch(monkeypatch, [{"operationType": "update", "fullDocument": {"tripId": "t1"}}])
+    assert access._cached_itinerary("t1") is None
+    assert spatial._indexes.get("t1") is None
+    assert spatial._indexes.get("t2") is not None
+
+def test_delete_drops_every_spatial_index(monkeypatch):
+    _cache("t1")
+    _cache("t2")
+    _watch(monkeypatch, [{"operationType": "delete"}])
+    assert access._cached_itinerary("t1") is None
+    assert spatial._indexes.get("t1") is None
+    assert spatial._indexes.get("t2") is None
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from backend.jobs import queue
+
+class RecordingBackend:
+    def __init__(self):
+        self.submitted = []
+
+    async def submit(self, job_id, run_job):
+        self.submitted.append(job_id)
+
+def _orphan(job_id, status, payload):
+    stale = datetime.now(timezone.utc) - timedelta(seconds=queue.JOB_ORPHAN_AFTER_S + 60)
+    return {
+        "jobId": job_id, "type": "itinerary.generate", "userId": "u1", "tripId": payload["trip_id"],
+        "payload": payload, "workerId": "dead-worker", "heartbeatAt": stale,
+        "status": status, "stage": status, "stages": [], "result": None, "error": None,
+        "createdAt": stale, "updatedAt": stale
+    }
+
+def test_orphaned_jobs_are_requeued_or_failed_and_keep_their_payload():
+    async def scenario():
+        store = queue.MemoryJobStore()
+        backend = RecordingBackend()
+        jobs = queue.JobQueue(store, backend)
+        seen = []
+
+        async def handler(job, progress):
+            seen.append(job["payload"])
+            return {"ok": True}
+
+        jobs.register("itinerary.generate", handler)
+        await store.insert(_orphan("queued-job", "queued", {"trip_id": "t1", "use_cache": False}))
+        await store.insert(_orphan("running-job", "running", {"trip_id": "t2", "use_cache": True}))
+
+        assert await jobs.recover() == {"requeued": 1, "failed": 1}
+        assert backend.submitted == ["queued-job"]
+        failed = await store.get("running-job")
+        assert failed["status"] == "failed" and failed["workerId"] == queue.WORKER_ID
+
+        # The requeued job runs with the payload stored on its document
+        await jobs._run("queued-job")
+        assert seen == [{"trip_id": "t1", "use_cache": False}]
+        assert (await store.get("queued-job"))["status"] == "succeeded"
+
+        # Claimed jobs belong to this worker now and are not recovered twice
+        assert await jobs.recover() == {"requeued": 0, "failed": 0}
+
+    asyncio.run(scenario())
+
+def test_jobs_with_a_fresh_heartbeat_are_left_alone():
+    async def scenario():
+        store = queue.MemoryJobStore()
+        backend = RecordingBackend()
+        jobs = queue.JobQueue(store, backend)
+        jobs.register("itinerary.generate", lambda job, progress: None)
+        job = _orphan("live-job", "queued", {"trip_id": "t1"})
+        job["heartbeatAt"] = datetime.now(timezone.utc)
+        await store.insert(job)
+
+        assert await jobs.recover() == {"requeued": 0, "failed": 0}
+        assert backend.submitted == []
+
+    asyncio.run(scenario())
+
+def test_subscriber_leaving_early_drops_the_job_event():
+    async def scenario():
+        store = queue.MemoryJobStore()
+        jobs = queue.JobQueue(store, RecordingBackend())
+        jobs.register("itinerary.generate", lambda job, progress: None)
+        job = await jobs.enqueue("itinerary.generate", {"trip_id": "t1"}, "u1")
+
+        first = jobs.subscribe(job["jobId"])
+        second = jobs.subscribe(job["jobId"])
+        assert (await first.__anext__())["status"] == "queued"
+        assert (await second.__anext__())["status"] == "queued"
+
+        # Both clients disconnect while the job is still queued
+        await first.aclose()
+        assert job["jobId"] in jobs._changed
+        await second.aclose()
+        assert job["jobId"] not in jobs._changed
+
+    asyncio.run(scenario())
@@ -0,0 +1,45 @@
+from backend.utils.json_stream import IncrementalJSONParser, parse_json_stream
+
+def test_complete_document():
+    assert parse_json_stream('```json\n{"days": [{"x": 1}], "tips": ["a"]}\n```') == {"days": [{"x": 1}], "tips": ["a"]}
+
+def test_days_are_emitted_as_they_complete():
+    parser = IncrementalJSONParser(paths=("days[*]",))
+    assert parser.feed('{"days": [{"dayNumber": 1}, {"dayNum') == [("days[*]", {"dayNumber": 1})]
+    assert parser.feed('ber": 2}]}') == [("days[*]", {"dayNumber": 2})]
+    assert parser.complete
+
+def test_prose_before_fence_is_skipped():
+    assert parse_json_stream('Note [draft]:\n```json\n{"days": [1]}\n```') == {"days": [1]}
+    assert parse_json_stream('See [1, 2] below\n```\n{"days": [1]}\n```') == {"days": [1]}
+
+def test_fence_arriving_after_a_prose_bracket_restarts_the_stream():
+    parser = IncrementalJSONParser(paths=("days[*]",))
+    text = 'Plan [v2]:\n```json\n{"days": [{"dayNumber": 1}, {"dayNumber": 2}]}\n```'
+    emitted = []
+    for i in range(0, len(text), 4):
+        emitted += parser.feed(text[i:i + 4])
+    assert emitted == [("days[*]", {"dayNumber": 1}), ("days[*]", {"dayNumber": 2})]
+    assert parser.finish() == {"days": [{"dayNumber": 1}, {"dayNumber": 2}]}
+
+def test_truncation_drops_an_element_with_nothing_complete():
+    assert parse_json_stream('{"days": [{"x": 1}, {"y": "ab') == {"days": [{"x": 1}]}
+
+def test_truncation_keeps_the_partial_element():
+    assert parse_json_stream('{"days": [{"x": 1}, {"y": 2, "places": [{"n": 1}, {"n"', ("days[*]",)) == {
+        "days": [{"x": 1}, {"y": 2, "places": [{"n": 1}]}]
+    }
+    # Cut inside day 1 keeps the partial day rather than losing `days`
+    assert parse_json_stream('```json\n{"days": [{"dayNumber": 1, "places": [{"n": 1}, {"n"') == {
+        "days": [{"dayNumber": 1, "places": [{"n": 1}]}]
+    }
+
+def test_closing_fence_ends_truncated_text():
+    assert parse_json_stream('```json\n{"a": 1, "b": [2\n```\nDone') == {"a": 1, "b": [2]}
+
+def test_truncation_keeps_complete_members_of_open_objects():
+    assert parse_json_stream('{"a": 1, "c": {"d": 2, "e"') == {"a": 1, "c": {"d": 2}}
+    assert parse_json_stream('{"a": [1, 2, 3') == {"a": [1, 2, 3]}
+
+def test_truncation_drops_empty_open_container():
+    assert parse_json_stream('{"a": 1, "c": {') == {"a": 1}
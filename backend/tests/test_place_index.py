@@ -0,0 +1,53 @@
+import pytest
+from backend.utils import place_index
+from backend.utils.place_index import PlaceIndex, filter_unique_by_name
+
+def _index(filler):
+    # Enough unrelated places to switch from the plain scan to the postings lookup
+    index = PlaceIndex()
+    for i in range(filler):
+        index.add(f"Filler Spot {i}")
+    return index
+
+@pytest.mark.parametrize("filler", [0, place_index.SCAN_BELOW * 2])
+@pytest.mark.parametrize("first, second", [
+    # Words shared out of order, not as one run
+    ("Lake Masjid Bistro", "Masjid Lake Hill Bistro"),
+    # Prefix too short to identify a place
+    ("Park Street", "Park Street Social"),
+    ("Birla Mandir", "Birla Planetarium"),
+    ("Gate 1 Food Court", "Gate 2 Food Court"),
+])
+def test_near_miss_names_stay_distinct(filler, first, second):
+    index = _index(filler)
+    assert index.add_if_new(first)
+    assert index.add_if_new(second)
+
+@pytest.mark.parametrize("filler", [0, place_index.SCAN_BELOW * 2])
+@pytest.mark.parametrize("first, second", [
+    ("The Victoria Memorial", "Victoria Memorial Hall"),
+    ("Café de Flore", "CAFE DE FLORE!"),
+    ("Indian Museum", "Indian Museum Cafe"),
+])
+def test_variants_of_one_place_merge(filler, first, second):
+    index = _index(filler)
+    assert index.add_if_new(first, item=first)
+    assert index.find(second) == first
+    assert not index.add_if_new(second)
+
+def test_name_matches_far_apart_are_different_branches():
+    index = PlaceIndex()
+    assert index.add_if_new("Indian Coffee House", 22.5765, 88.3636)
+    # Same chain in another city
+    assert index.add_if_new("Indian Coffee House MG Road", 12.9747, 77.6069)
+    # Without coordinates the name alone decides
+    assert not index.add_if_new("Indian Coffee House MG Road")
+
+def test_filter_unique_by_name_keeps_first_of_each_place():
+    items = [
+        {"name": "Victoria Memorial", "lat": 22.5448, "lng": 88.3426},
+        {"name": "The Victoria Memorial Hall", "lat": 22.5449, "lng": 88.3427},
+        {"name": "Marble Palace", "lat": 22.5815, "lng": 88.3602},
+        {"name": None},
+    ]
+    assert filter_unique_by_name(items) == [items[0], items[2]]
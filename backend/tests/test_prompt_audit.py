@@ -0,0 +1,27 @@
+from backend.database import audit
+
+class _Collection:
+    def __init__(self):
+        self.docs = []
+
+    def insert_one(self, doc):
+        self.docs.append(doc)
+
+    def find_one(self, query):
+        for doc in self.docs:
+            if all(doc.get(k) == v for k, v in query.items()):
+                return dict(doc)
+        return None
+
+def test_audit_reads_back_only_for_its_trip(monkeypatch):
+    monkeypatch.setattr(audit, "prompt_audits_collection", _Collection())
+    monkeypatch.setattr(audit, "PROMPT_AUDIT_ENABLED", True)
+
+    audit_id = audit.record_prompt("generate", "plan 3 days", {"days": []}, "t1", "i1")
+    # Wait for the background writer
+    audit._executor.submit(lambda: None).result()
+
+    record = audit.get_prompt_audit(audit_id, "t1")
+    assert record["prompt"] == "plan 3 days"
+    assert record["response"] == '{"days": []}'
+    assert audit.get_prompt_audit(audit_id, "t2") is None
@@ -0,0 +1,40 @@
+from backend.ai import prompt_budget
+
+MODELS = ["openai/gpt-4o-mini", "google/gemini-2.0-flash"]
+
+class OfflineTiktoken:
+    calls = 0
+
+    @classmethod
+    def get_encoding(cls, name):
+        cls.calls += 1
+        raise ConnectionError("cannot fetch cl100k_base.tiktoken")
+
+class FakeEncoder:
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+class FakeTiktoken:
+    @staticmethod
+    def get_encoding(name):
+        return FakeEncoder()
+
+def _use(monkeypatch, module):
+    monkeypatch.setattr(prompt_budget, "tiktoken", module)
+    monkeypatch.setattr(prompt_budget, "_encoder", None)
+    monkeypatch.setattr(prompt_budget, "_encoder_failed", False)
+
+def test_unloadable_encoding_falls_back_to_a_labelled_tighter_estimate(monkeypatch):
+    _use(monkeypatch, OfflineTiktoken)
+    assert prompt_budget.estimate_tokens("a" * 40) == 10
+    assert prompt_budget.tokenizer_name() == "chars/4 estimate"
+    assert prompt_budget.budget_for(MODELS) == int(12000 * prompt_budget.FALLBACK_BUDGET_FACTOR)
+    assert prompt_budget.savings_report("Test", "a" * 80, "a" * 40)["tokenizer"] == "chars/4 estimate"
+    # The failed load is not retried on every call
+    assert OfflineTiktoken.calls == 1
+
+def test_tokenizer_counts_and_full_budget_when_available(monkeypatch):
+    _use(monkeypatch, FakeTiktoken)
+    assert prompt_budget.estimate_tokens("one two three") == 3
+    assert prompt_budget.tokenizer_name() == "tiktoken/cl100k_base"
+    assert prompt_budget.budget_for(MODELS) == 12000
@@ -0,0 +1,90 @@
+import asyncio
+import time
+import pytest
+from backend.ai import itinerary, openrouter_client
+from backend.ai import provider_health as ph
+from backend.ai.provider_health import ProviderHealthRegistry, CLOSED, OPEN, HALF_OPEN
+
+def _opened(registry, model):
+    for _ in range(ph.CONSECUTIVE_FAILURES):
+        registry.record_failure(model, "boom", 0.1)
+    health = registry._get(model)
+    assert health.state == OPEN
+    # Cooldown already over
+    health.opened_at = time.time() - ph.BREAKER_COOLDOWN_S - 1
+    return health
+
+def test_rank_leaves_open_breaker_unchanged():
+    registry = ProviderHealthRegistry()
+    health = _opened(registry, "a")
+    for _ in range(3):
+        registry.rank(["a", "b"])
+    assert registry.available("a")
+    assert health.state == OPEN
+    assert registry.snapshot()["a"]["state"] == OPEN
+
+def test_single_probe_in_flight():
+    registry = ProviderHealthRegistry()
+    health = _opened(registry, "a")
+    assert registry.begin_call("a")
+    assert health.state == HALF_OPEN
+    assert not registry.begin_call("a")
+    assert not registry.available("a")
+
+    registry.record_success("a", 0.2)
+    assert health.state == CLOSED
+    assert registry.begin_call("a") and registry.begin_call("a")
+
+def test_failed_probe_reopens_and_cancelled_probe_frees_slot():
+    registry = ProviderHealthRegistry()
+    health = _opened(registry, "a")
+    assert registry.begin_call("a")
+    registry.cancel_call("a")
+    assert registry.begin_call("a")
+
+    registry.record_failure("a", "still down", 0.1)
+    assert health.state == OPEN
+    assert not registry.begin_call("a")
+
+def test_open_breaker_rejects_calls_during_cooldown():
+    registry = ProviderHealthRegistry()
+    for _ in range(ph.CONSECUTIVE_FAILURES):
+        registry.record_failure("a", "boom", 0.1)
+    assert not registry.available("a")
+    assert not registry.begin_call("a")
+    assert registry._get("a").state == OPEN
+
+def test_openrouter_429_puts_model_in_quota_cooldown(monkeypatch):
+    posts = []
+
+    class RateLimited:
+        status_code = 429
+        text = "Rate limit exceeded"
+
+    class Client:
+        async def post(self, url, headers=None, json=None):
+            posts.append(json["model"])
+            return RateLimited()
+
+    async def no_sleep(seconds):
+        pass
+
+    registry = ProviderHealthRegistry()
+    monkeypatch.setenv("MOCK_AI", "false")
+    monkeypatch.setenv("OFFLINE_MODE", "false")
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(openrouter_client, "get_async_client", lambda name: Client())
+    monkeypatch.setattr(itinerary, "HEDGE_ENABLED", False)
+    monkeypatch.setattr(itinerary, "provider_health", registry)
+    monkeypatch.setattr(itinerary, "candidate_models", lambda trip: ["or/model"])
+    monkeypatch.setattr(itinerary.asyncio, "sleep", no_sleep)
+
+    with pytest.raises(Exception, match="All providers returned errors"):
+        asyncio.run(itinerary.call_llm_async("plan", {"days": 1}))
+
+    # Later rounds skip the model instead of calling it again
+    assert posts == ["or/model"]
+    health = registry._get("or/model")
+    assert health.quota_until > time.time()
+    assert "429" in health.last_error
+    assert not registry.available("or/model")
@@ -0,0 +1,34 @@
+import pytest
+from backend.jobs import reprice
+
+class FakeCheckpoints:
+    def __init__(self):
+        self.docs = {}
+
+    def find_one(self, query):
+        doc = self.docs.get(query["_id"])
+        return dict(doc) if doc else None
+
+    def insert_one(self, doc):
+        self.docs[doc["_id"]] = dict(doc)
+
+    def delete_one(self, query):
+        self.docs.pop(query["_id"], None)
+
+def test_checkpoint_stores_the_rate_the_run_uses():
+    checkpoints = FakeCheckpoints()
+    checkpoint = reprice._load_checkpoint(checkpoints, "run", False, 0.2)
+    assert checkpoint["transportRate"] == 0.2
+    assert reprice._load_checkpoint(checkpoints, "run", False, 0.2)["transportRate"] == 0.2
+
+def test_resume_with_another_rate_is_refused_unless_restarted():
+    checkpoints = FakeCheckpoints()
+    reprice._load_checkpoint(checkpoints, "run", False, 0.2)
+    checkpoints.docs["run"]["lastId"] = "some-id"
+
+    with pytest.raises(RuntimeError, match="transport rate 0.2"):
+        reprice._load_checkpoint(checkpoints, "run", False, 0.15)
+    assert checkpoints.docs["run"]["lastId"] == "some-id"
+
+    checkpoint = reprice._load_checkpoint(checkpoints, "run", True, 0.15)
+    assert (checkpoint["transportRate"], checkpoint["lastId"]) == (0.15, None)
@@ -0,0 +1,22 @@
+from backend.services import hotels, search_cache
+from backend.services.search_cache import search_key, stay_bucket
+
+def test_stay_bucket():
+    assert stay_bucket("2026-10-20", "2026-10-22") == ("2026-W43", "2n")
+    # Same ISO week and length share a bucket
+    assert stay_bucket("2026-10-19", "2026-10-21") == stay_bucket("2026-10-25", "2026-10-27")
+    assert stay_bucket("2026-10-20", "2026-10-23") != stay_bucket("2026-10-20", "2026-10-22")
+    assert stay_bucket(None, None) == ("undated",)
+    assert stay_bucket("2026-10-20", None) == ("undated",)
+
+def test_hotel_searches_in_one_bucket_share_a_cache_entry(monkeypatch):
+    calls = []
+    monkeypatch.setattr(hotels, "_fetch_hotels", lambda *args: calls.append(args) or [{"name": "Hotel"}])
+    search_cache._cache.clear()
+
+    hotels.search_hotels("Kolkata", "2026-10-19", "2026-10-21")
+    hotels.search_hotels(" kolkata", "2026-10-23", "2026-10-25")
+    hotels.search_hotels("Kolkata")
+    hotels.search_hotels("Kolkata")
+    assert len(calls) == 2
+    assert search_key("hotels", "Kolkata", *stay_bucket(None, None)) == "hotels|kolkata|undated"
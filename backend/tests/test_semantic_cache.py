@@ -0,0 +1,90 @@
+from backend.ai import semantic_cache
+from backend.ai.long_trip import day_chunks, merge_day_chunks
+
+def _trip(days=3, budget=9000):
+    return {"destination": "Kolkata", "days": days, "budget": budget, "travel_pace": "Balanced", "interests": ["Food"]}
+
+def _day(number, cost=500):
+    return {
+        "dayNumber": number,
+        "places": [{"name": f"Place {number}", "category": "food", "estimatedCost": cost}]
+    }
+
+def setup_function():
+    semantic_cache._cache.clear()
+
+def test_complete_itinerary_is_cached():
+    trip = _trip()
+    assert semantic_cache.store_itinerary(trip, {"days": [_day(1), _day(2), _day(3)]})
+    assert semantic_cache.get_cached_itinerary(trip) is not None
+
+def test_budget_level_is_part_of_the_key():
+    trip = _trip()
+    assert semantic_cache.store_itinerary({**trip, "budget_level": "Luxury"}, {"days": [_day(1), _day(2), _day(3)]})
+    assert semantic_cache.get_cached_itinerary({**trip, "budget_level": "Budget"}) is None
+    assert semantic_cache.get_cached_itinerary({**trip, "budget_level": "Luxury"}) is not None
+
+def test_long_trip_with_failed_chunk_is_not_cached():
+    trip = _trip(days=6)
+    chunks = day_chunks(6)
+    skeleton = {"days": [{"dayNumber": n, "area": "Centre", "places": [f"Place {n}"]} for n in range(1, 7)]}
+    results = [{"days": [_day(n) for n in chunk]} for chunk in chunks]
+    results[1] = TimeoutError("chunk timed out")
+    merged = merge_day_chunks(skeleton, chunks, results, [], 6)
+
+    assert merged["_failed_chunks"] == 1
+    assert len(merged["days"]) == 6
+    assert not semantic_cache.store_itinerary(trip, merged)
+    assert semantic_cache.get_cached_itinerary(trip) is None
+
+def test_chunk_missing_a_day_counts_as_failed():
+    chunks = day_chunks(4)
+    results = [{"days": [_day(1), _day(2)]}, {"days": [_day(3)]}]
+    merged = merge_day_chunks({"days": []}, chunks, results, [], 4)
+    assert merged["_failed_chunks"] == 1
+
+def test_truncated_stream_is_not_cached():
+    trip = _trip()
+    itinerary = {"days": [_day(1), _day(2), _day(3)], "_truncated": True}
+    assert not semantic_cache.store_itinerary(trip, itinerary)
+    assert semantic_cache.get_cached_itinerary(trip) is None
+
+def test_missing_days_are_not_cached():
+    trip = _trip(days=3)
+    assert not semantic_cache.store_itinerary(trip, {"days": [_day(1), _day(2), {"dayNumber": 3, "places": []}]})
+    assert semantic_cache.get_cached_itinerary(trip) is None
+
+def test_hit_keeps_the_cached_place_costs():
+    trip = _trip(budget=9000)
+    itinerary = {"days": [
+        {"dayNumber": n, "places": [{"name": f"Place {n}", "category": "food", "estimatedCost": "₹1,200-1,500"}]}
+        for n in (1, 2, 3)
+    ]}
+    assert semantic_cache.store_itinerary(trip, itinerary)
+
+    # Same budget bucket, higher budget: nothing is scaled up
+    cached = semantic_cache.get_cached_itinerary(_trip(budget=10800))
+    assert [d["places"][0]["estimatedCost"] for d in cached["days"]] == ["₹1,200-1,500"] * 3
+
+def test_hit_skips_enrichment(monkeypatch):
+    import asyncio
+    from backend.ai import itinerary
+
+    def no_enrichment(trip):
+        raise AssertionError("enrichment ran on a cache hit")
+
+    trip = _trip()
+    assert semantic_cache.store_itinerary(trip, {"days": [_day(1), _day(2), _day(3)]})
+    monkeypatch.setattr(itinerary, "_prepare_generation", no_enrichment)
+    monkeypatch.setattr(itinerary, "search_hotels", lambda *args: [
+        {"name": "Real Hotel", "description": "From SerpApi", "price": "₹4,000", "link": "https://hotel"}
+    ])
+    monkeypatch.setattr(itinerary, "async_itineraries_collection", None)
+    monkeypatch.setattr(itinerary, "invalidate_itinerary", lambda trip_id: None)
+    monkeypatch.setattr(itinerary, "record_prompt", lambda *args: None)
+
+    result = asyncio.run(itinerary.generate_itinerary_async({**trip, "trip_id": "t1", "user_id": "u1"}))
+    assert [d["dayNumber"] for d in result["days"]] == [1, 2, 3]
+    assert result["costSummary"]["food"] == 1500
+    # Real hotels are injected on a hit too, not the plan's invented ones
+    assert [h["name"] for h in result["topHotels"]] == ["Real Hotel"]
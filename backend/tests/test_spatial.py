@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from backend.utils import geo, spatial
+
+CENTER = (48.8584, 2.2945)
+
+def _itinerary():
+    places = [
+        {"name": "Far", "lat": 48.8738, "lng": 2.2950},
+        {"name": "Near", "lat": 48.8606, "lng": 2.2976},
+        {"name": "Mid", "lat": 48.8530, "lng": 2.3499},
+        {"name": "No coords", "lat": None, "lng": None},
+        {"name": "Zero", "lat": 0, "lng": 0},
+    ]
+    return {"days": [{"places": places[:2]}, {"places": places[2:]}]}
+
+def test_within_filters_by_radius_nearest_first():
+    index = spatial.SpatialIndex.from_itinerary(_itinerary())
+    assert len(index) == 3
+
+    found = index.within(*CENTER, 2000)
+    assert [p["name"] for p in found] == ["Near", "Far"]
+
+    everything = index.within(*CENTER, 10000)
+    assert [p["name"] for p in everything] == ["Near", "Far", "Mid"]
+    assert [p["distance"] for p in everything] == sorted(p["distance"] for p in everything)
+    assert index.within(*CENTER, 100) == []
+
+def test_within_matches_scalar_geo():
+    index = spatial.SpatialIndex.from_itinerary(_itinerary())
+    for place in index.within(*CENTER, 10000):
+        assert place["distance"] == pytest.approx(geo.haversine(*CENTER, place["lat"], place["lng"]), abs=0.1)
+        assert place["bearing"] == pytest.approx(geo.calculate_bearing(*CENTER, place["lat"], place["lng"]), abs=0.1)
+
+def test_invalidation_during_load_is_not_cached():
+    spatial.clear_spatial_indexes()
+
+    async def load_and_invalidate():
+        # A regeneration lands while the old itinerary is being read
+        spatial.invalidate_spatial_index("trip-1")
+        return _itinerary()
+
+    async def scenario():
+        stale = await spatial.cached_spatial_index("trip-1", load_and_invalidate)
+        assert len(stale) == 3
+        assert spatial._indexes.get("trip-1") is None
+
+        async def load():
+            return {"days": [{"places": [{"name": "New", "lat": 48.86, "lng": 2.30}]}]}
+
+        fresh = await spatial.cached_spatial_index("trip-1", load)
+        assert spatial._indexes.get("trip-1") is fresh
+        spatial.invalidate_spatial_index("trip-1")
+        assert spatial._indexes.get("trip-1") is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import time
+from backend.ai import streaming, singleflight
+from backend.ai import provider_health as ph
+from backend.ai.provider_health import ProviderHealthRegistry, HALF_OPEN
+
+TRIP = {"trip_id": "t1", "user_id": "u1", "destination": "Kolkata", "days": 2, "budget": 6000}
+
+def _place(name, cost, slot="morning"):
+    return {"name": name, "category": "attraction", "estimatedCost": cost, "timeSlot": slot, "lat": 22.5, "lng": 88.3}
+
+def _patch(monkeypatch, stream_llm_text):
+    ctx = {
+        "prompt": "plan", "prompt_places": [], "real_hotels": [], "duration": 2,
+        "currency_symbol": "₹", "currency_code": "INR", "enrichment": {"timings": {}},
+        "weather": None, "kept_places": [], "prompt_report": None
+    }
+    stored = []
+    monkeypatch.setenv("MOCK_AI", "false")
+    monkeypatch.setenv("OFFLINE_MODE", "false")
+    monkeypatch.setattr(streaming, "_prepare_generation", lambda trip: ctx)
+    monkeypatch.setattr(streaming, "candidate_models", lambda trip: ["model-a"])
+    monkeypatch.setattr(streaming, "stream_llm_text", stream_llm_text)
+    monkeypatch.setattr(streaming, "get_cached_itinerary", lambda trip, use_cache: None)
+    monkeypatch.setattr(streaming, "store_itinerary", lambda trip, raw: stored.append(raw))
+    monkeypatch.setattr(streaming, "async_itineraries_collection", None)
+    monkeypatch.setattr(streaming, "invalidate_itinerary", lambda trip_id: None)
+    monkeypatch.setattr("backend.ai.itinerary.record_prompt", lambda *args: None)
+    return stored
+
+def _parse(raw_events):
+    events = []
+    for raw in raw_events:
+        head, data = raw.strip().split("\n", 1)
+        events.append((head[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+def _run(monkeypatch, text):
+    async def stream_llm_text(prompt, model_name):
+        for i in range(0, len(text), 40):
+            yield text[i:i + 40]
+
+    stored = _patch(monkeypatch, stream_llm_text)
+
+    async def collect():
+        return [e async for e in streaming.stream_itinerary_events(dict(TRIP))]
+
+    return _parse(asyncio.run(collect())), stored
+
+def _days():
+    return [
+        {"dayNumber": 1, "places": [_place("Victoria Memorial", 500), _place("Indian Museum", 300, "afternoon"), _place("Park Street", 200, "evening")]},
+        {"dayNumber": 2, "places": [_place("Kalighat Temple", 100), _place("Howrah Bridge", 0, "afternoon"), _place("Prinsep Ghat", 0, "evening")]},
+    ]
+
+def test_string_costs_validate_and_are_streamed(monkeypatch):
+    days = [
+        {"dayNumber": 1, "places": [_place("Victoria Memorial", "₹500"), _place("Indian Museum", "₹300", "afternoon"), _place("Park Street", 200, "evening")]},
+        {"dayNumber": 2, "places": [_place("Kalighat Temple", "₹100"), _place("Howrah Bridge", 0, "afternoon"), _place("Prinsep Ghat", 0, "evening")]},
+    ]
+    events, _ = _run(monkeypatch, json.dumps({"days": days}))
+    streamed = [data for name, data in events if name == "day"]
+    assert [d["dayNumber"] for d in streamed] == [1, 2]
+    assert streamed[0]["places"][0]["estimatedCost"] == 500.0
+
+def test_invalid_day_is_not_streamed_but_still_stored(monkeypatch):
+    # Day 1 is missing timeSlot and fails DayPlan validation
+    bad = {"dayNumber": 1, "places": [{"name": "Victoria Memorial", "category": "attraction", "estimatedCost": 500}]}
+    good = {"dayNumber": 2, "places": [_place("Victoria Memorial", 500), _place("Indian Museum", 300, "afternoon"), _place("Park Street", 200, "evening")]}
+    events, stored = _run(monkeypatch, json.dumps({"days": [bad, good]}))
+
+    streamed = [data for name, data in events if name == "day"]
+    assert [d["dayNumber"] for d in streamed] == [2]
+    # The rejected day did not feed the uniqueness filter
+    assert [p["name"] for p in streamed[0]["places"]][0] == "Victoria Memorial"
+
+    done = [data for name, data in events if name == "done"][0]
+    assert [d["dayNumber"] for d in done["days"]] == [1, 2]
+    assert "Area Exploration" not in json.dumps(done["days"])
+    assert [d["dayNumber"] for d in stored[0]["days"]] == [1, 2]
+
+def test_disconnect_mid_stream_frees_the_probe_slot(monkeypatch):
+    registry = ProviderHealthRegistry()
+    for _ in range(ph.CONSECUTIVE_FAILURES):
+        registry.record_failure("model-a", "boom", 0.1)
+    registry._get("model-a").opened_at = time.time() - ph.BREAKER_COOLDOWN_S - 1
+
+    async def stream_llm_text(prompt, model_name):
+        yield '{"days": ['
+        await asyncio.sleep(10)
+
+    _patch(monkeypatch, stream_llm_text)
+    monkeypatch.setattr(streaming, "provider_health", registry)
+
+    async def scenario():
+        async def consume():
+            async for _ in streaming.stream_itinerary_events(dict(TRIP)):
+                pass
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        assert registry._get("model-a").state == HALF_OPEN
+        assert not registry.available("model-a")
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    # The abandoned probe no longer blocks the next one
+    assert registry.available("model-a")
+
+def test_concurrent_streams_for_one_trip_share_a_generation(monkeypatch):
+    text = json.dumps({"days": _days()})
+    calls = []
+
+    async def stream_llm_text(prompt, model_name):
+        calls.append(model_name)
+        for i in range(0, len(text), 40):
+            await asyncio.sleep(0.001)
+            yield text[i:i + 40]
+
+    _patch(monkeypatch, stream_llm_text)
+    monkeypatch.setattr(singleflight, "_leases", None)
+
+    async def collect():
+        return [e async for e in streaming.coalesced_itinerary_events(dict(TRIP))]
+
+    async def scenario():
+        return await asyncio.gather(collect(), collect())
+
+    first, second = (_parse(events) for events in asyncio.run(scenario()))
+    assert calls == ["model-a"]
+    for events in (first, second):
+        assert [d["dayNumber"] for name, d in events if name == "day"] == [1, 2]
+        assert events[-1][0] == "done"
+    assert first[-1][1]["itineraryId"] == second[-1][1]["itineraryId"]
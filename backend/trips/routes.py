@@ -1,20 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 import uuid
+from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
 try:
-    from backend.database.db import trips_collection
+    from backend.database.db import async_trips_collection
     from backend.auth.dependencies import get_current_user
     from backend.trips.schema import Trip
+    from backend.services.fx import trip_currency
 except ImportError:
-    from database.db import trips_collection
+    from database.db import async_trips_collection
     from auth.dependencies import get_current_user
     from trips.schema import Trip
+    from services.fx import trip_currency
 
 router = APIRouter()
 
+# Trip listing pages: newest first, keyset-paginated on _id
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+MAX_RECENT = 20
+
+# Fields the dashboard cards render
+CARD_PROJECTION = {
+    "trip_id": 1, "destination": 1, "status": 1, "budget": 1, "currency": 1,
+    "start_date": 1, "end_date": 1, "days": 1
+}
+# Only fields stored in the user_recent_cards index, so the query is covered
+RECENT_PROJECTION = {"_id": 1, "trip_id": 1, "destination": 1, "status": 1}
+
 @router.post("/trip/create")
-def create_trip(data: dict, user=Depends(get_current_user)):
-    if trips_collection is None:
+async def create_trip(data: dict, user=Depends(get_current_user)):
+    if async_trips_collection is None:
         raise HTTPException(status_code=500, detail="Database not connected")
 
     trip_id = str(uuid.uuid4())
@@ -43,19 +60,55 @@ def create_trip(data: dict, user=Depends(get_current_user)):
         "budget": data["budget"],
         "interests": data["interests"],
         "travel_pace": data.get("travel_pace", "Balanced"),
+        # Budget and itinerary prices are in this currency (unsupported codes fall back to the default)
+        "currency": trip_currency(data)[0],
         "status": "CREATED"
     }
-    trips_collection.insert_one(trip)
+    await async_trips_collection.insert_one(trip)
     trip["_id"] = str(trip["_id"])
     return trip
 
 @router.get("/trips")
-def list_trips(user=Depends(get_current_user)):
+async def list_trips(response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, view: str = "card", user=Depends(get_current_user)):
+    """
+    One page of the user's trips, newest first. Pass the X-Next-Cursor
+    response header back as `cursor` for the next page; it is absent on the
+    last page. view=full returns whole trip documents instead of card fields.
+    """
     print(f"DEBUG: Fetching trips for user {user['uid']}", flush=True)
-    if trips_collection is None:
+    if async_trips_collection is None:
         raise HTTPException(status_code=500, detail="Database not connected")
-    
-    trips = list(trips_collection.find({"user_id": user["uid"]}).sort("_id", -1))
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = {"user_id": user["uid"]}
+    if cursor:
+        try:
+            query["_id"] = {"$lt": ObjectId(cursor)}
+        except (InvalidId, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    projection = None if view == "full" else CARD_PROJECTION
+    # One extra document tells whether another page exists
+    trips = await async_trips_collection.find(query, projection).sort("_id", -1).limit(limit + 1).to_list(length=limit + 1)
+    if len(trips) > limit:
+        trips = trips[:limit]
+        response.headers["X-Next-Cursor"] = str(trips[-1]["_id"])
+    for trip in trips:
+        trip["_id"] = str(trip["_id"])
+    return trips
+
+@router.get("/trip/recent")
+async def recent_trips(limit: int = 5, user=Depends(get_current_user)):
+    """
+    Lightweight recent-trips list answered from the user_recent_cards index alone.
+    """
+    if async_trips_collection is None:
+        raise HTTPException(status_code=500, detail="Database not connected")
+
+    limit = max(1, min(limit, MAX_RECENT))
+    trips = await async_trips_collection.find({"user_id": user["uid"]}, RECENT_PROJECTION).sort("_id", -1).limit(limit).to_list(length=limit)
     for trip in trips:
+        # Creation time is part of the ObjectId
+        trip["createdAt"] = trip["_id"].generation_time.isoformat()
         trip["_id"] = str(trip["_id"])
     return trips
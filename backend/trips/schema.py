@@ -43,7 +43,7 @@ class Itinerary(BaseModel):
     travel_tips: List[str] = Field(default_factory=list, alias="travelTips")
     ai_version: str = Field(default="gpt-3.5-turbo", alias="aiVersion")
     generated_from: str = Field(default="initial", alias="generatedFrom") # initial / regenerate
-    last_prompt_used: Optional[str] = Field(None, alias="lastPromptUsed")
+    prompt_audit_id: Optional[str] = Field(None, alias="promptAuditId")
     created_at: datetime = Field(default_factory=datetime.utcnow, alias="createdAt")
     updated_at: datetime = Field(default_factory=datetime.utcnow, alias="updatedAt")
 
@@ -60,4 +60,5 @@ class Trip(BaseModel):
     budget_level: str = "Balanced" # Economy / Balanced / Luxury
     interests: List[str]
     travel_pace: str = "Balanced" # Relaxed / Balanced / Fast-Paced
+    currency: str = "INR" # ISO code from the FX rate table
     status: str = "CREATED"
@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache with a per-entry time-to-live.
+    Tracks hits and misses so callers can report hit rates.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key):
+        """
+        Returns (value, stored_at, expires_at) without checking expiry or
+        touching the hit counters, or None when the key is absent.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            return None if entry is None else (entry[0], entry[2], entry[1])
+
+    def set(self, key, value, ttl=None):
+        now = time.monotonic()
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (value, now + ttl, now)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.peek(key) is not None
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 4) if total else 0.0
+        }
+
+class ByteLRUCache:
+    """
+    Thread-safe LRU cache bounded by the total size of its values in bytes
+    (as measured by `sizeof`), with an optional time-to-live. Values larger
+    than the whole budget are not stored.
+    """
+
+    def __init__(self, max_bytes, sizeof, ttl=None):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (entry[1] is not None and entry[1] <= now):
+                if entry is not None:
+                    self._pop(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _pop(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+        return entry
+
+    def set(self, key, value):
+        size = self.sizeof(value)
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._pop(key)
+            if size > self.max_bytes:
+                return False
+            self._data[key] = (value, expires, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "bytes": self.bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": round(self.hits / total, 4) if total else 0.0
+        }
@@ -0,0 +1,311 @@
+import json
+import re
+
+# One token per match: a complete string, a structural character, or a bare
+# scalar (number / true / false / null). Leading whitespace is skipped.
+_TOKEN = re.compile(r'\s*(?:("[^"\\]*(?:\\.[^"\\]*)*")|([{}\[\]:,])|([^\s{}\[\]:,"]+))')
+_ROOT_START = re.compile(r"[{\[]")
+_FENCE = re.compile(r"```")
+_PATH_TOKEN = re.compile(r"([^.\[\]]+)|\[(\*|\d+)\]")
+_decoder = json.JSONDecoder()
+_UNSET = object()
+
+class _Frame:
+    __slots__ = ("kind", "start", "path", "key", "index", "expect_key", "has_content", "restore")
+
+    def __init__(self, kind, start, path, restore):
+        self.kind = kind
+        self.start = start
+        self.path = path
+        self.key = None
+        self.index = 0
+        self.expect_key = kind == "{"
+        self.has_content = False
+        # Safe point (end, depth) from just before this container opened
+        self.restore = restore
+
+def _compile_path(pattern):
+    """
+    "days[*]" -> ("days", "*"), "a.b[2]" -> ("a", "b", 2)
+    """
+    tokens = []
+    for name, index in _PATH_TOKEN.findall(pattern):
+        if name:
+            tokens.append(name)
+        else:
+            tokens.append("*" if index == "*" else int(index))
+    return tuple(tokens)
+
+def _matches(pattern, path):
+    if len(pattern) != len(path):
+        return False
+    for want, got in zip(pattern, path):
+        if want == "*":
+            if not isinstance(got, int):
+                return False
+        elif want != got:
+            return False
+    return True
+
+class IncrementalJSONParser:
+    """
+    Streaming JSON parser for LLM output.
+
+    feed() accepts chunks as they arrive and returns (path, value) pairs for
+    every completed value matching one of `paths` (e.g. "days[*]"). finish()
+    returns the whole document; if the text stopped early it is cut back to
+    the last complete value, open containers with nothing complete inside
+    are dropped, and the remaining containers (including a partial array
+    element such as a cut-off day) are closed.
+
+    The root value starts at the first '{' or '[' after a ``` / ```json
+    fence, or at the first bracket when no fence comes before it. A root
+    that starts after prose is provisional: if a fence shows up later the
+    parser starts over after it. Text after the root value closes (or a
+    closing fence) is ignored.
+    """
+
+    def __init__(self, paths=()):
+        self._patterns = [(p, _compile_path(p)) for p in paths]
+        self._depths = {len(t) for _, t in self._patterns}
+        self._chunks = []
+        self._joined = ""
+        self._joined_len = 0
+        self._length = 0
+        # Unscanned tail (an unterminated string or scalar) and its offset
+        self._pending = ""
+        self._pending_start = 0
+        self._stack = []
+        self._started = False
+        self._root_start = 0
+        # Root started after prose with no fence yet; a later fence restarts it
+        self._provisional = False
+        self._fenced = False
+        # A closing fence ended the text early
+        self._closed = False
+        self.complete = False
+        self._safe_end = 0
+        self._safe_depth = 0
+
+    def _restart(self, offset):
+        """
+        Drops a provisional root and rescans from the fence at `offset`.
+        Returns the text to scan.
+        """
+        self._stack = []
+        self._started = False
+        self._provisional = False
+        self.complete = False
+        self._safe_end = 0
+        self._safe_depth = 0
+        self._pending = ""
+        self._pending_start = offset
+        return self._text()[offset:]
+
+    def _find_root(self, work):
+        """
+        Index in `work` where the root value starts, or None if it has not
+        arrived yet.
+        """
+        bracket = _ROOT_START.search(work)
+        fence = _FENCE.search(work)
+        if fence is not None and (bracket is None or fence.start() < bracket.start()):
+            self._fenced = True
+            bracket = _ROOT_START.search(work, fence.end())
+        if bracket is None:
+            return None
+        self._provisional = not self._fenced and bool(work[:bracket.start()].strip())
+        return bracket.start()
+
+    def _text(self):
+        if self._joined_len != self._length:
+            self._joined = "".join(self._chunks)
+            self._chunks = [self._joined]
+            self._joined_len = self._length
+        return self._joined
+
+    def _child_path(self):
+        if not self._stack:
+            return ()
+        top = self._stack[-1]
+        return top.path + ((top.key,) if top.kind == "{" else (top.index,))
+
+    def _has_targets_below(self, path):
+        """
+        True if some requested path lies strictly inside the value at `path`,
+        in which case the container must be walked rather than skipped.
+        """
+        for _, tokens in self._patterns:
+            if len(tokens) > len(path) and _matches(tokens[:len(path)], path):
+                return True
+        return False
+
+    def _value_done(self, path, start, end, emitted, value=_UNSET):
+        """
+        Bookkeeping after any complete value (scalar or container).
+        """
+        if self._patterns and len(path) in self._depths:
+            for name, tokens in self._patterns:
+                if _matches(tokens, path):
+                    if value is _UNSET:
+                        value = json.loads(self._text()[start:end])
+                    emitted.append((name, value))
+                    break
+        if self._stack:
+            top = self._stack[-1]
+            top.has_content = True
+            if top.kind == "[":
+                top.index += 1
+        else:
+            self.complete = True
+        self._safe_end = end
+        self._safe_depth = len(self._stack)
+
+    def feed(self, chunk):
+        emitted = []
+        if not chunk or self._closed or (self.complete and not self._provisional):
+            return emitted
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+
+        if self.complete:
+            # Provisional root already closed: only a fence changes the result
+            tick = chunk.find("`")
+            if tick < 0:
+                return emitted
+            base = self._length - len(chunk) + tick
+            work = self._restart(base)
+        else:
+            work = self._pending + chunk
+            base = self._pending_start
+        while True:
+            restart = self._scan(work, base, emitted)
+            if restart is None:
+                return emitted
+            work = self._restart(restart)
+            base = restart
+
+    def _scan(self, work, base, emitted):
+        """
+        Tokenizes `work` (text starting at offset `base`). Returns the offset
+        of a fence that invalidates a provisional root, else None.
+        """
+        i = 0
+        if not self._started:
+            i = self._find_root(work)
+            if i is None:
+                # Keep the text: a fence may be split across chunks
+                self._pending = work
+                self._pending_start = base
+                return None
+            self._started = True
+            self._root_start = base + i
+
+        stack = self._stack
+        n = len(work)
+        while i < n:
+            m = _TOKEN.match(work, i)
+            # No match: unterminated string or trailing whitespace.
+            # A scalar touching the end may still be growing.
+            if m is None or (m.end() == n and m.group(3) is not None):
+                break
+            string, punct, scalar = m.groups()
+            start = base + m.start(m.lastindex)
+            end = base + m.end()
+            i = m.end()
+
+            if punct is not None:
+                if punct == "{" or punct == "[":
+                    # Containers already complete in the buffer are decoded in
+                    # one C-level call instead of token by token
+                    path = self._child_path()
+                    value = _UNSET
+                    if not self._has_targets_below(path):
+                        try:
+                            value, skip_to = _decoder.raw_decode(work, m.start(2))
+                        except json.JSONDecodeError:
+                            pass
+                    if value is not _UNSET:
+                        i = skip_to
+                        self._value_done(path, start, base + skip_to, emitted, value)
+                        if self.complete:
+                            return self._root_closed(work, i, base)
+                        continue
+                    stack.append(_Frame(punct, start, path, (self._safe_end, self._safe_depth)))
+                    self._safe_end = end
+                    self._safe_depth = len(stack)
+                elif punct == "}" or punct == "]":
+                    frame = stack.pop()
+                    self._value_done(frame.path, frame.start, end, emitted)
+                elif punct == ":":
+                    stack[-1].expect_key = False
+                elif stack[-1].kind == "{":
+                    stack[-1].expect_key = True
+            elif string is not None:
+                top = stack[-1]
+                if top.kind == "{" and top.expect_key:
+                    top.key = json.loads(string) if "\\" in string else string[1:-1]
+                else:
+                    self._value_done(self._child_path(), start, end, emitted)
+            elif scalar.startswith("`"):
+                # Backticks are never JSON: this is a fence
+                if self._provisional:
+                    return start
+                self._closed = True
+                self._pending = ""
+                return None
+            else:
+                self._value_done(self._child_path(), start, end, emitted)
+
+            if self.complete:
+                return self._root_closed(work, i, base)
+
+        self._pending = work[i:]
+        self._pending_start = base + i
+        return None
+
+    def _root_closed(self, work, i, base):
+        self._pending = ""
+        if self._provisional:
+            tick = work.find("`", i)
+            if tick >= 0:
+                return base + tick
+        return None
+
+    def finish(self):
+        """
+        Returns the parsed document, recovering from truncation if needed.
+        Raises ValueError if no JSON value was started.
+        """
+        if not self._started:
+            raise ValueError("No JSON value found in text")
+        text = self._text()
+        if not self.complete:
+            # A scalar running to the end of the text counts only if it parses
+            m = _TOKEN.match(self._pending)
+            top = self._stack[-1]
+            if m is not None and m.group(3) is not None and (top.kind == "[" or not top.expect_key):
+                try:
+                    json.loads(m.group(3))
+                    start = self._pending_start + m.start(3)
+                    self._value_done(self._child_path(), start, start + len(m.group(3)), [])
+                except json.JSONDecodeError:
+                    pass
+        if self.complete:
+            return json.loads(text[self._root_start:self._safe_end])
+        end, depth = self._safe_end, self._safe_depth
+        # An open container with nothing complete inside ({"days": [{"y": "ab)
+        # is an empty shell: cut back to before it opened. Containers that
+        # hold a complete value, e.g. a cut-off day with some places, are kept
+        while depth > 1 and not self._stack[depth - 1].has_content:
+            end, depth = self._stack[depth - 1].restore
+        closers = "".join("}" if f.kind == "{" else "]" for f in reversed(self._stack[:depth]))
+        return json.loads(text[self._root_start:end] + closers)
+
+def parse_json_stream(text, paths=()):
+    """
+    One-shot convenience: parse a complete or truncated text.
+    """
+    parser = IncrementalJSONParser(paths)
+    parser.feed(text)
+    return parser.finish()
@@ -0,0 +1,205 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+try:
+    from backend.utils.geo import haversine
+except ImportError:
+    from utils.geo import haversine
+
+# Place identity: two names refer to the same place when their trigram sets are
+# close, when one name's words appear, in order, inside the other ("The
+# Victoria Memorial" / "Victoria Memorial Hall"), or when they are moderately
+# similar and a few hundred metres apart. Name matches between places known to
+# be kilometres apart are branches or namesakes, not duplicates. Trigram
+# postings and a coordinate grid keep each lookup to a handful of candidates
+# instead of every name seen so far.
+NAME_THRESHOLD = 0.8
+NEAR_THRESHOLD = 0.5
+NEAR_RADIUS_M = 150
+FAR_RADIUS_M = 2000
+# Trigrams shared by more entries than this are too common to select candidates
+MAX_POSTING = 64
+# Below this many places a plain scan is cheaper than the postings lookup
+SCAN_BELOW = 64
+
+STOPWORDS = frozenset({"the", "a", "an", "of", "and", "at", "in", "on", "by", "de", "la", "le"})
+_APOSTROPHES = re.compile(r"['’`]")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_CELL_DEG = NEAR_RADIUS_M / 111320.0
+
+def name_tokens(name):
+    """
+    Accent- and case-folded words without punctuation or stopwords.
+    "The Café de Flore!" -> ("cafe", "flore"), "Flury's" -> ("flurys",)
+    """
+    text = str(name or "")
+    if text.isascii():
+        text = text.casefold()
+    else:
+        text = unicodedata.normalize("NFKD", text).casefold()
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = _PUNCTUATION.sub(" ", _APOSTROPHES.sub("", text))
+    return tuple(t for t in text.split() if t not in STOPWORDS)
+
+def trigrams(tokens):
+    text = f"  {' '.join(tokens)} "
+    return frozenset([text[i:i + 3] for i in range(len(text) - 2)])
+
+def dice(a, b):
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+def _token_subset(a, b):
+    """
+    True when the shorter of two name keys (tokens joined by spaces) is a run
+    of consecutive words of the longer one, and long enough to identify a
+    place on its own.
+    """
+    shorter, longer = (a, b) if len(a) <= len(b) else (b, a)
+    # Short names ("Fort", "Park Street") are too generic to identify a place
+    return len(shorter) > 12 and f" {shorter} " in f" {longer} "
+
+def _coords(lat, lng):
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+    if lat == 0 and lng == 0:
+        return None
+    return lat, lng
+
+class PlaceIndex:
+    """
+    Incremental identity index over place names and coordinates. `find`
+    returns the item of an already indexed place that matches, or None.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._numbers = []
+        self._grams = []
+        self._coords = []
+        self._items = []
+        self._exact = {}
+        self._postings = {}
+        self._grid = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / _CELL_DEG)), int(math.floor(lng / _CELL_DEG))
+
+    def _nearby(self, coords):
+        row, col = self._cell(*coords)
+        # Longitude cells narrow towards the poles; widen the search to match
+        span = int(math.ceil(1 / max(math.cos(math.radians(coords[0])), 0.1)))
+        for r in range(row - 1, row + 2):
+            for c in range(col - span, col + span + 1):
+                yield from self._grid.get((r, c), ())
+
+    def _candidates(self, grams, coords):
+        if len(self._items) < SCAN_BELOW:
+            return range(len(self._items))
+        counts = Counter()
+        probed = 0
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting and len(posting) <= MAX_POSTING:
+                counts.update(posting)
+                probed += 1
+        # A match shares at least a quarter of the trigrams; leave some slack
+        # for the common trigrams that were not probed
+        floor = max(1, probed // 4)
+        candidates = {i for i, n in counts.items() if n >= floor}
+        if coords is not None:
+            candidates.update(self._nearby(coords))
+        return candidates
+
+    def _find(self, tokens, grams, coords):
+        key = " ".join(tokens)
+        if key in self._exact:
+            return self._items[self._exact[key]]
+
+        numbers = {t for t in tokens if t.isdigit()}
+        for i in self._candidates(grams, coords):
+            # "Gate 1" and "Gate 2", "Phase 2" and "Phase 3" are different places
+            if numbers != self._numbers[i]:
+                continue
+            similarity = dice(grams, self._grams[i])
+            subset = similarity < NAME_THRESHOLD and _token_subset(key, self._keys[i])
+            if similarity < NEAR_THRESHOLD and not subset:
+                continue
+            other = self._coords[i]
+            distance = None
+            if coords is not None and other is not None:
+                distance = haversine(coords[0], coords[1], other[0], other[1])
+                if distance > FAR_RADIUS_M:
+                    continue
+            if similarity >= NAME_THRESHOLD or subset:
+                return self._items[i]
+            if distance is not None and distance <= NEAR_RADIUS_M:
+                return self._items[i]
+        return None
+
+    def _add(self, tokens, grams, coords, item):
+        i = len(self._items)
+        key = " ".join(tokens)
+        self._keys.append(key)
+        self._numbers.append({t for t in tokens if t.isdigit()})
+        self._grams.append(grams)
+        self._coords.append(coords)
+        self._items.append(item)
+        self._exact.setdefault(key, i)
+        # Small indexes are scanned; postings are built once they are needed
+        if i + 1 == SCAN_BELOW:
+            for j in range(i + 1):
+                self._post(j)
+        elif i + 1 > SCAN_BELOW:
+            self._post(i)
+
+    def _post(self, i):
+        for gram in self._grams[i]:
+            self._postings.setdefault(gram, []).append(i)
+        if self._coords[i] is not None:
+            self._grid.setdefault(self._cell(*self._coords[i]), []).append(i)
+
+    def find(self, name, lat=None, lng=None):
+        tokens = name_tokens(name)
+        if not tokens:
+            return None
+        return self._find(tokens, trigrams(tokens), _coords(lat, lng))
+
+    def add(self, name, lat=None, lng=None, item=None):
+        tokens = name_tokens(name)
+        if tokens:
+            self._add(tokens, trigrams(tokens), _coords(lat, lng), item if item is not None else name)
+
+    def add_if_new(self, name, lat=None, lng=None, item=None):
+        """
+        Indexes the place unless it matches one already indexed. Returns True
+        when it was new.
+        """
+        tokens = name_tokens(name)
+        if not tokens:
+            return True
+        grams, coords = trigrams(tokens), _coords(lat, lng)
+        if self._find(tokens, grams, coords) is not None:
+            return False
+        self._add(tokens, grams, coords, item if item is not None else name)
+        return True
+
+def filter_unique_by_name(data_list):
+    """
+    Candidate pool (hotels, restaurants, attractions) without duplicates,
+    keeping the first of each place. Items without a name are dropped.
+    """
+    index = PlaceIndex()
+    unique = []
+    for item in data_list:
+        name = item.get("name")
+        if name and index.add_if_new(name, item.get("lat"), item.get("lng"), item):
+            unique.append(item)
+    return unique
@@ -0,0 +1,143 @@
+import math
+import os
+import numpy as np
+try:
+    from backend.utils.cache import TTLCache
+except ImportError:
+    from utils.cache import TTLCache
+
+EARTH_RADIUS_M = 6371000
+# Grid cell edge in degrees (~1.1 km of latitude)
+CELL_DEG = 0.01
+# Radius queries spanning more cells than this scan the flat arrays instead
+MAX_CELLS = 64
+
+# Built indexes per trip. Regeneration invalidates explicitly; the TTL bounds
+# staleness when another worker process rewrote the itinerary.
+SPATIAL_INDEX_TTL_S = int(os.getenv("SPATIAL_INDEX_TTL_S", "300"))
+_indexes = TTLCache(maxsize=int(os.getenv("SPATIAL_INDEX_SIZE", "1024")), ttl=SPATIAL_INDEX_TTL_S)
+# Bumped on every invalidation so a build that raced one is not cached
+_epoch = 0
+
+def haversine_many(lat, lng, lats, lngs):
+    """
+    Vectorized utils.geo.haversine from one point to arrays of points (meters).
+    """
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+def bearing_many(lat, lng, lats, lngs):
+    """
+    Vectorized utils.geo.calculate_bearing (degrees clockwise from north).
+    """
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lat2, dlng = np.radians(lats), np.radians(lngs) - lng1
+    y = np.sin(dlng) * np.cos(lat2)
+    x = math.cos(lat1) * np.sin(lat2) - math.sin(lat1) * np.cos(lat2) * np.cos(dlng)
+    return (np.degrees(np.arctan2(y, x)) + 360) % 360
+
+def _cell(lat, lng):
+    return int(math.floor(lat / CELL_DEG)), int(math.floor(lng / CELL_DEG))
+
+class SpatialIndex:
+    """
+    Grid index over the places of one itinerary. Places without usable
+    coordinates are left out.
+    """
+
+    def __init__(self, places):
+        self.places = []
+        lats, lngs = [], []
+        for place in places:
+            try:
+                lat, lng = float(place.get("lat")), float(place.get("lng"))
+            except (TypeError, ValueError):
+                continue
+            # Same rule as before: a 0 coordinate means "unknown"
+            if not lat or not lng:
+                continue
+            self.places.append(place)
+            lats.append(lat)
+            lngs.append(lng)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+
+        cells = {}
+        for i, (lat, lng) in enumerate(zip(lats, lngs)):
+            cells.setdefault(_cell(lat, lng), []).append(i)
+        self.cells = {key: np.asarray(ids, dtype=np.int64) for key, ids in cells.items()}
+
+    @classmethod
+    def from_itinerary(cls, itinerary):
+        return cls(p for day in itinerary.get("days", []) for p in day.get("places", []))
+
+    def __len__(self):
+        return len(self.places)
+
+    def _bbox_candidates(self, lat, lng, radius):
+        dlat = math.degrees(radius / EARTH_RADIUS_M)
+        dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        (row0, col0), (row1, col1) = _cell(lat - dlat, lng - dlng), _cell(lat + dlat, lng + dlng)
+        if (row1 - row0 + 1) * (col1 - col0 + 1) > MAX_CELLS:
+            ids = np.arange(len(self.places))
+        else:
+            found = [self.cells[(r, c)] for r in range(row0, row1 + 1) for c in range(col0, col1 + 1) if (r, c) in self.cells]
+            if not found:
+                return found
+            ids = np.concatenate(found)
+        # Bounding-box prefilter before any trigonometry
+        lats, lngs = self.lats[ids], self.lngs[ids]
+        mask = (np.abs(lats - lat) <= dlat) & (np.abs(lngs - lng) <= dlng)
+        return ids[mask]
+
+    def within(self, lat, lng, radius):
+        """
+        Places within `radius` meters, nearest first, each with "distance"
+        (meters) and "bearing" (degrees) from the query point.
+        """
+        if not len(self.places):
+            return []
+        ids = self._bbox_candidates(lat, lng, radius)
+        if not len(ids):
+            return []
+        distances = haversine_many(lat, lng, self.lats[ids], self.lngs[ids])
+        keep = distances <= radius
+        ids, distances = ids[keep], distances[keep]
+        bearings = bearing_many(lat, lng, self.lats[ids], self.lngs[ids])
+        order = np.argsort(distances, kind="stable")
+        return [
+            {**self.places[i], "distance": round(d, 1), "bearing": round(b, 1)}
+            for i, d, b in zip(ids[order].tolist(), distances[order].tolist(), bearings[order].tolist())
+        ]
+
+async def cached_spatial_index(key, load_itinerary):
+    """
+    Index for `key` (a trip id) from the in-process cache, built from
+    `await load_itinerary()` on a miss. A missing itinerary is not cached,
+    nor is one loaded while an invalidation happened.
+    """
+    index = _indexes.get(key)
+    if index is None:
+        epoch = _epoch
+        itinerary = await load_itinerary()
+        if not itinerary:
+            return None
+        index = SpatialIndex.from_itinerary(itinerary)
+        if epoch == _epoch:
+            _indexes.set(key, index)
+    return index
+
+def invalidate_spatial_index(key):
+    global _epoch
+    _epoch += 1
+    _indexes.delete(key)
+
+def clear_spatial_indexes():
+    global _epoch
+    _epoch += 1
+    _indexes.clear()
+
+def spatial_index_stats():
+    return _indexes.stats()
@@ -12,7 +12,7 @@ const RecentTrips = () => {
     useEffect(() => {
         const fetchTrips = async () => {
             try {
-                const data = await apiService.listTrips(auth);
+                const data = await apiService.listRecentTrips(auth);
                 setTrips(data);
             } catch (error) {
                 console.error("Fetch Trips Error:", error);
@@ -68,8 +68,9 @@ const RecentTrips = () => {
                             <h4 className="font-bold text-gray-900 text-sm">{trip.destination}</h4>
                             <p className="text-xs text-gray-500 mb-1">{trip.status}</p>
                             <div className="flex items-center gap-1.5">
+                                <Calendar size={12} className="text-blue-600" />
                                 <span className="text-[10px] font-bold text-blue-600 uppercase tracking-wide">
-                                    Budget: ₹{trip.budget}
+                                    {new Date(trip.createdAt).toLocaleDateString()}
                                 </span>
                             </div>
                         </div>
@@ -9,13 +9,16 @@ const MyTripsPage = () => {
     const navigate = useNavigate();
     const [trips, setTrips] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [searchTerm, setSearchTerm] = useState('');
 
     useEffect(() => {
         const fetchTrips = async () => {
             try {
-                const data = await apiService.listTrips(auth);
-                setTrips(data);
+                const page = await apiService.listTrips(auth);
+                setTrips(page.trips);
+                setNextCursor(page.nextCursor);
             } catch (error) {
                 console.error("Fetch Trips Error:", error);
             } finally {
@@ -37,6 +40,19 @@ const MyTripsPage = () => {
         }
     }, []);
 
+    const loadMoreTrips = async () => {
+        setLoadingMore(true);
+        try {
+            const page = await apiService.listTrips(auth, nextCursor);
+            setTrips(prev => [...prev, ...page.trips]);
+            setNextCursor(page.nextCursor);
+        } catch (error) {
+            console.error("Fetch Trips Error:", error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const filteredTrips = trips.filter(trip =>
         trip.destination.toLowerCase().includes(searchTerm.toLowerCase())
     );
@@ -74,7 +90,7 @@ const MyTripsPage = () => {
                         <div className="flex items-center gap-6 px-4 border-l border-slate-100 hidden md:flex">
                             <div className="text-center">
                                 <div className="text-xs font-bold text-slate-400 uppercase tracking-wider">Total Trips</div>
-                                <div className="text-xl font-bold text-slate-900">{trips.length}</div>
+                                <div className="text-xl font-bold text-slate-900">{trips.length}{nextCursor ? '+' : ''}</div>
                             </div>
                         </div>
                     </div>
@@ -140,6 +156,19 @@ const MyTripsPage = () => {
                             ))}
                         </div>
                     )}
+
+                    {!loading && nextCursor && (
+                        <div className="flex justify-center mt-8">
+                            <button
+                                onClick={loadMoreTrips}
+                                disabled={loadingMore}
+                                className="bg-white border border-slate-200 hover:border-blue-200 text-blue-600 px-6 py-2.5 rounded-xl font-bold flex items-center gap-2 transition-all disabled:opacity-60"
+                            >
+                                {loadingMore && <Loader2 className="animate-spin" size={18} />}
+                                Load more trips
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
         </AppLayout>
@@ -23,12 +23,25 @@ export const apiService = {
         return response.json();
     },
 
-    listTrips: async (auth) => {
+    listTrips: async (auth, cursor = null) => {
         const headers = await getHeaders(auth);
-        const response = await fetch(`${BASE_URL}/trips`, {
+        // /trips is paginated: one page per call, pass nextCursor back for the next
+        const params = new URLSearchParams();
+        if (cursor) params.set("cursor", cursor);
+        const response = await fetch(`${BASE_URL}/trips?${params}`, {
             headers
         });
         if (!response.ok) throw new Error("Failed to fetch trips");
+        const trips = await response.json();
+        return { trips, nextCursor: response.headers.get("X-Next-Cursor") };
+    },
+
+    listRecentTrips: async (auth, limit = 5) => {
+        const headers = await getHeaders(auth);
+        const response = await fetch(`${BASE_URL}/trip/recent?limit=${limit}`, {
+            headers
+        });
+        if (!response.ok) throw new Error("Failed to fetch recent trips");
         return response.json();
     },
 